@@ -15,16 +15,77 @@ from .models import (
     # Assessment
     InternalAssessment,
     # Attendance
-    Lecture, Attendance,
+    Lecture, Attendance, AttendanceSummary,
     # Timetable
     Timetable,
     # Results
-    SemesterResult, SubjectResult,
+    SemesterResult, SubjectResult, ResultStanding, GradingPolicy,
     # Finance
-    FeeStructure, FeeReceipt,
+    FeeStructure, FeeReceipt, ReceiptSequence, FeeCollectionSnapshot,
     # Other
-    LeaveRequest, Notification, AcademicCalendar
+    LeaveRequest, Notification, AcademicCalendar, Holiday
 )
+from .admit_cards import issue_admit_cards
+from .grading import regrade_for_policy
+from .invigilation import assign_invigilators
+from .results import Cohort, cohorts_for_exams, compute_results
+from .standings import cohorts_for_results, publish_results, refresh_standings
+
+
+def _report_results(modeladmin, request, results):
+    students = sum(count for count, _ in results.values())
+    subject_results = sum(count for _, count in results.values())
+    modeladmin.message_user(
+        request,
+        f"Computed {subject_results} subject results for {students} students "
+        f"across {len(results)} cohort(s).",
+    )
+
+
+@admin.action(description="Compute results for the selected exams' cohorts")
+def compute_exam_results(modeladmin, request, queryset):
+    _report_results(modeladmin, request, compute_results(cohorts_for_exams(queryset)))
+
+
+@admin.action(description="Issue admit cards for the selected exams")
+def issue_exam_admit_cards(modeladmin, request, queryset):
+    issued = issue_admit_cards(queryset)
+    created = sum(count for _, count in issued.values())
+    modeladmin.message_user(
+        request,
+        f"Issued {created} new admit card(s) for {len(issued)} exam(s). "
+        f"Render PDFs with: manage.py generate_admit_cards",
+    )
+
+
+@admin.action(description="Assign invigilators to the selected exams")
+def assign_exam_invigilators(modeladmin, request, queryset):
+    assignments, unassigned, _ = assign_invigilators(queryset)
+    message = f"Assigned invigilators to {len(assignments)} exam(s)."
+    if unassigned:
+        message += f" {len(unassigned)} exam(s) had no eligible faculty."
+    modeladmin.message_user(request, message)
+
+
+@admin.action(description="Recompute results for the selected cohorts")
+def recompute_semester_results(modeladmin, request, queryset):
+    cohorts = {
+        Cohort(*row)
+        for row in queryset.values_list('student__degree_program__department_id', 'semester', 'academic_year')
+        .order_by().distinct()
+        if row[0] is not None
+    }
+    _report_results(modeladmin, request, compute_results(cohorts))
+
+
+@admin.action(description="Publish selected results and refresh CGPA / ranks")
+def publish_semester_results(modeladmin, request, queryset):
+    published, standings = publish_results(queryset)
+    modeladmin.message_user(
+        request,
+        f"Published {published} result(s); refreshed {standings} standing(s). "
+        f"Warm the PDF cache with: manage.py prerender_results --semester N",
+    )
 
 
 @admin.register(Department)
@@ -86,6 +147,7 @@ class ExamScheduleAdmin(admin.ModelAdmin):
     list_filter = ('exam_type', 'exam_date', 'status')
     search_fields = ('subject__code', 'academic_year')
     date_hierarchy = 'exam_date'
+    actions = [compute_exam_results, issue_exam_admit_cards, assign_exam_invigilators]
 
 
 @admin.register(AdmitCard)
@@ -125,6 +187,14 @@ class AttendanceAdmin(admin.ModelAdmin):
     date_hierarchy = 'lecture__date'
 
 
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ('student', 'subject_offering', 'lecture_type', 'conducted', 'present', 'absent', 'late')
+    list_filter = ('lecture_type', 'subject_offering__academic_year')
+    search_fields = ('student__roll_number', 'subject_offering__subject__code')
+    readonly_fields = ('conducted', 'present', 'absent', 'late', 'updated_at')
+
+
 @admin.register(Timetable)
 class TimetableAdmin(admin.ModelAdmin):
     list_display = ('subject_offering', 'day', 'start_time', 'end_time', 'lecture_type')
@@ -137,6 +207,13 @@ class SemesterResultAdmin(admin.ModelAdmin):
     list_display = ('student', 'semester', 'academic_year', 'sgpa', 'status')
     list_filter = ('semester', 'academic_year', 'status')
     search_fields = ('student__roll_number', 'student__name')
+    actions = [recompute_semester_results, publish_semester_results]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # A hand-edited result (published or not) re-ranks its cohort once
+        for cohort in cohorts_for_results(SemesterResult.objects.filter(pk=obj.pk)):
+            refresh_standings(*cohort)
 
 
 @admin.register(SubjectResult)
@@ -146,6 +223,30 @@ class SubjectResultAdmin(admin.ModelAdmin):
     search_fields = ('semester_result__student__roll_number', 'subject__code')
 
 
+@admin.action(description="Regrade the results governed by the selected policies")
+def regrade_policy_results(modeladmin, request, queryset):
+    total = 0
+    for policy in queryset.filter(is_active=True):
+        total += sum(regrade_for_policy(policy).values())
+    modeladmin.message_user(request, f"Regraded {total} subject result(s).")
+
+
+@admin.register(GradingPolicy)
+class GradingPolicyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'method', 'subject', 'exam_type', 'cutoffs', 'pass_floor', 'is_active')
+    list_filter = ('method', 'is_active')
+    search_fields = ('name', 'subject__code', 'exam_type__name')
+    autocomplete_fields = ('subject',)
+    actions = [regrade_policy_results]
+
+
+@admin.register(ResultStanding)
+class ResultStandingAdmin(admin.ModelAdmin):
+    list_display = ('semester_result', 'cgpa', 'division_rank', 'department_rank', 'percentile')
+    list_filter = ('semester_result__semester', 'semester_result__academic_year')
+    search_fields = ('semester_result__student__roll_number', 'semester_result__student__name')
+
+
 @admin.register(FeeStructure)
 class FeeStructureAdmin(admin.ModelAdmin):
     list_display = ('student', 'semester', 'academic_year', 'fees_to_be_collected', 'paid', 'outstanding')
@@ -156,12 +257,32 @@ class FeeStructureAdmin(admin.ModelAdmin):
 
 @admin.register(FeeReceipt)
 class FeeReceiptAdmin(admin.ModelAdmin):
-    list_display = ('receipt_number', 'student', 'amount', 'payment_date', 'payment_mode')
-    list_filter = ('payment_date', 'payment_mode')
+    list_display = ('receipt_number', 'student', 'amount', 'payment_date', 'payment_mode', 'reconciled_at')
+    list_filter = ('payment_date', 'payment_mode', ('reconciled_at', admin.EmptyFieldListFilter))
     search_fields = ('receipt_number', 'student__roll_number', 'transaction_id')
     date_hierarchy = 'payment_date'
 
 
+@admin.register(FeeCollectionSnapshot)
+class FeeCollectionSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('degree_program', 'semester', 'academic_year', 'students', 'fees_to_be_collected', 'paid',
+                    'outstanding', 'outstanding_over_90', 'refreshed_at')
+    list_filter = ('academic_year', 'semester', 'department')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReceiptSequence)
+class ReceiptSequenceAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'last_value', 'updated_at')
+    search_fields = ('prefix',)
+    readonly_fields = ('prefix', 'last_value', 'updated_at')
+
+
 @admin.register(LeaveRequest)
 class LeaveRequestAdmin(admin.ModelAdmin):
     list_display = ('student', 'start_date', 'end_date', 'status', 'approved_by')
@@ -182,3 +303,10 @@ class AcademicCalendarAdmin(admin.ModelAdmin):
     list_display = ('academic_year', 'semester', 'start_date', 'end_date')
     list_filter = ('academic_year', 'semester')
     search_fields = ('academic_year',)
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ('date', 'name')
+    search_fields = ('name',)
+    date_hierarchy = 'date'
@@ -0,0 +1,251 @@
+"""
+Admit card generation.
+
+Allocates an AdmitCard for every roster student of each ExamSchedule with
+``bulk_create``, then renders one PDF per card with reportlab and packs them
+into one ZIP archive per (academic year, department, semester, division).
+An archive always holds all of its division's cards for the year, so a run
+for a few exams rebuilds the archives it touches in full. Rendering is CPU
+bound, so cards are cut into chunks and fanned out across a
+``ProcessPoolExecutor``; workers only receive plain dicts and never touch the
+database.
+"""
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import reduce
+from io import BytesIO
+from operator import or_
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .marks import exam_roster
+from .models import AdmitCard
+
+ADMIT_CARD_BATCH_SIZE = 1000
+RENDER_CHUNK_SIZE = 100
+ADMIT_CARD_DIR = os.path.join(settings.MEDIA_ROOT, 'admit_cards')
+
+
+def admit_number(exam, roll_number):
+    """Stable, unique admit number for a (exam, student) pair."""
+    return f"{exam.academic_year}/{exam.id:05d}/{roll_number}"
+
+
+def issue_admit_cards(exams, batch_size=ADMIT_CARD_BATCH_SIZE):
+    """Create missing admit cards for every roster student of ``exams``.
+
+    Idempotent: rows go through ``bulk_create(ignore_conflicts=True)`` on
+    (exam_schedule, student), so existing cards and their seat numbers are
+    kept. Returns ``{exam_id: (roster_size, created)}``.
+    """
+    issued = {}
+    for exam in exams.select_related('subject'):
+        roster = list(exam_roster(exam).values_list('id', 'roll_number'))
+        before = AdmitCard.objects.filter(exam_schedule=exam).count()
+        with transaction.atomic():
+            AdmitCard.objects.bulk_create(
+                [
+                    AdmitCard(exam_schedule=exam, student_id=student_id,
+                              admit_number=admit_number(exam, roll_number))
+                    for student_id, roll_number in roster
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+        created = AdmitCard.objects.filter(exam_schedule=exam).count() - before
+        issued[exam.id] = (len(roster), created)
+    return issued
+
+
+def archive_cards(exams):
+    """Valid cards of every archive that ``exams`` have cards in, across all of its exams."""
+    groups = (
+        AdmitCard.objects.filter(exam_schedule__in=exams, is_valid=True)
+        .values_list('exam_schedule__academic_year', 'student__degree_program__department_id',
+                     'student__semester', 'student__division')
+        .order_by().distinct()
+    )
+    conditions = [
+        Q(exam_schedule__academic_year=academic_year, student__degree_program__department_id=department_id,
+          student__semester=semester, student__division=division)
+        for academic_year, department_id, semester, division in groups
+    ]
+    if not conditions:
+        return AdmitCard.objects.none()
+    return (
+        AdmitCard.objects.filter(reduce(or_, conditions), is_valid=True)
+        .exclude(exam_schedule__status='cancelled')
+    )
+
+
+def admit_card_payloads(exams):
+    """Picklable render input for every card of the archives ``exams`` touch (see :func:`archive_cards`)."""
+    rows = (
+        archive_cards(exams)
+        .order_by('student__degree_program__department__code', 'student__semester', 'student__division',
+                  'student__roll_number', 'exam_schedule__exam_date')
+        .values(
+            'admit_number', 'seat_number',
+            'student__name', 'student__roll_number', 'student__division', 'student__semester',
+            'student__degree_program__name', 'student__degree_program__department__code',
+            'exam_schedule__subject__code', 'exam_schedule__subject__name',
+            'exam_schedule__exam_type__name', 'exam_schedule__academic_year',
+            'exam_schedule__exam_date', 'exam_schedule__start_time', 'exam_schedule__end_time',
+            'exam_schedule__room_number',
+        )
+    )
+    for row in rows.iterator(chunk_size=ADMIT_CARD_BATCH_SIZE):
+        yield {
+            'admit_number': row['admit_number'],
+            'seat_number': row['seat_number'] or '-',
+            'name': row['student__name'],
+            'roll_number': row['student__roll_number'],
+            'division': row['student__division'] or '-',
+            'semester': row['student__semester'],
+            'program': row['student__degree_program__name'] or '-',
+            'department': row['student__degree_program__department__code'] or '-',
+            'subject_code': row['exam_schedule__subject__code'],
+            'subject_name': row['exam_schedule__subject__name'],
+            'exam_type': row['exam_schedule__exam_type__name'],
+            'academic_year': row['exam_schedule__academic_year'],
+            'exam_date': row['exam_schedule__exam_date'].strftime('%d %B %Y'),
+            'timing': f"{row['exam_schedule__start_time']:%H:%M} - {row['exam_schedule__end_time']:%H:%M}",
+            'room': row['exam_schedule__room_number'] or 'TBA',
+        }
+
+
+def render_admit_card_pdf(card):
+    """Render one admit card payload to PDF bytes."""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.6 * inch, bottomMargin=0.6 * inch)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'AdmitTitle', parent=styles['Heading1'], fontSize=22, alignment=TA_CENTER,
+        textColor=colors.HexColor('#1a73e8'), fontName='Helvetica-Bold', spaceAfter=6,
+    )
+    subtitle_style = ParagraphStyle(
+        'AdmitSubtitle', parent=styles['Normal'], fontSize=11, alignment=TA_CENTER,
+        textColor=colors.HexColor('#666666'), spaceAfter=18,
+    )
+
+    elements = [
+        Paragraph("EXAMINATION ADMIT CARD", title_style),
+        Paragraph(f"{escape(card['exam_type'])} Examination &middot; {escape(card['academic_year'])}", subtitle_style),
+    ]
+    details = Table(
+        [
+            ['Admit Number:', card['admit_number'], 'Seat Number:', card['seat_number']],
+            ['Student Name:', card['name'], 'Roll Number:', card['roll_number']],
+            ['Programme:', card['program'], 'Semester / Div:', f"{card['semester']} / {card['division']}"],
+        ],
+        colWidths=[1.3 * inch, 2.4 * inch, 1.3 * inch, 1.9 * inch],
+    )
+    details.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8f9fa')),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
+        ('TEXTCOLOR', (2, 0), (2, -1), colors.HexColor('#666666')),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e0e0e0')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ]))
+    elements += [details, Spacer(1, 0.3 * inch)]
+
+    paper = Table(
+        [
+            ['Subject', 'Date', 'Time', 'Room'],
+            [f"{card['subject_code']} - {card['subject_name']}", card['exam_date'], card['timing'], card['room']],
+        ],
+        colWidths=[3.1 * inch, 1.5 * inch, 1.3 * inch, 1.0 * inch],
+    )
+    paper.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a73e8')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e0e0e0')),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    elements += [
+        paper,
+        Spacer(1, 0.4 * inch),
+        Paragraph(
+            "Carry this admit card and your college ID to the examination hall. "
+            "Report 15 minutes before the start time.",
+            styles['Normal'],
+        ),
+    ]
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def archive_key(card):
+    """``(academic_year, department, semester, division)`` of the archive a card belongs to."""
+    return card['academic_year'], card['department'], card['semester'], card['division']
+
+
+def archive_filename(key):
+    academic_year, department, semester, division = key
+    return f"{academic_year}_{department}_sem{semester}_division_{division}.zip".replace('/', '-')
+
+
+def render_admit_card_chunk(cards):
+    """Worker entry point: ``[(archive key, archive name, pdf bytes), ...]`` for a chunk."""
+    return [
+        (archive_key(card), f"{card['roll_number']}_{card['subject_code']}_{card['exam_type']}.pdf".replace('/', '-'),
+         render_admit_card_pdf(card))
+        for card in cards
+    ]
+
+
+def _chunks(cards, size):
+    for start in range(0, len(cards), size):
+        yield cards[start:start + size]
+
+
+def render_admit_cards(exams, output_dir=ADMIT_CARD_DIR, workers=None, chunk_size=RENDER_CHUNK_SIZE):
+    """Render the archives ``exams`` touch, one ZIP per :func:`archive_key` in ``output_dir``.
+
+    Chunks of ``chunk_size`` cards are rendered in a process pool of
+    ``workers`` processes (CPU count by default) while this process appends
+    finished PDFs to the per-division archives. Archives are named like
+    ``2025-26_CE_sem5_division_A.zip``, so divisions of different
+    departments, semesters or years never share or overwrite a file, and each
+    is rewritten with every valid card of the division, not just ``exams``.
+    Returns ``{archive key: (archive path, card count)}``.
+    """
+    # Read everything before the pool forks so no worker inherits an open cursor
+    cards = list(admit_card_payloads(exams))
+    os.makedirs(output_dir, exist_ok=True)
+    archives, counts = {}, {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render_admit_card_chunk, chunk) for chunk in _chunks(cards, chunk_size)]
+            for future in as_completed(futures):
+                for key, name, pdf in future.result():
+                    if key not in archives:
+                        path = os.path.join(output_dir, archive_filename(key))
+                        archives[key] = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED)
+                        counts[key] = 0
+                    # PDFs are already compressed; storing avoids a second deflate pass
+                    archives[key].writestr(name, pdf)
+                    counts[key] += 1
+    finally:
+        for archive in archives.values():
+            archive.close()
+    return {key: (archive.filename, counts[key]) for key, archive in archives.items()}
@@ -6,4 +6,5 @@ class AdminConfig(AppConfig):
     name = 'admin_app'
 
     def ready(self):
+        import admin_app.checks  # noqa: F401
         import admin_app.signals  # noqa: F401
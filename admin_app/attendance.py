@@ -0,0 +1,231 @@
+"""
+Attendance services: read model maintenance, bulk marking and export filters.
+
+AttendanceSummary keeps one row per (student, subject_offering, lecture_type)
+with conducted/present/absent/late counters. The counters are recomputed for
+the affected (student, offering) pairs whenever a Lecture, Attendance or
+StudentEnrollment row changes, so the student attendance pages read a handful
+of pre-aggregated rows instead of counting Lecture/Attendance per subject.
+"""
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Attendance, AttendanceSummary, Lecture, StudentEnrollment
+
+SUMMARY_COUNTERS = ['conducted', 'present', 'absent', 'late']
+
+
+def refresh_attendance_summaries(offering_ids, student_ids=None):
+    """Recompute AttendanceSummary rows for the given offerings.
+
+    When ``student_ids`` is given only those students are refreshed, which is
+    what the per-row signal handlers use. Runs a fixed number of queries
+    regardless of how many students or lectures are involved.
+    """
+    offering_ids = {oid for oid in offering_ids if oid is not None}
+    if not offering_ids:
+        return 0
+    if student_ids is not None:
+        student_ids = {sid for sid in student_ids if sid is not None}
+        if not student_ids:
+            return 0
+
+    # Lectures conducted per (offering, lecture_type)
+    conducted = {}
+    types_by_offering = {}
+    lecture_rows = (
+        Lecture.objects.filter(subject_offering_id__in=offering_ids, is_conducted=True)
+        .values('subject_offering_id', 'lecture_type')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for row in lecture_rows:
+        conducted[(row['subject_offering_id'], row['lecture_type'])] = row['total']
+        types_by_offering.setdefault(row['subject_offering_id'], []).append(row['lecture_type'])
+
+    # Who should have counters: active enrollments plus anyone with a record
+    enrollments = StudentEnrollment.objects.filter(subject_offering_id__in=offering_ids, status='active')
+    attendances = Attendance.objects.filter(
+        lecture__subject_offering_id__in=offering_ids, lecture__is_conducted=True
+    )
+    if student_ids is not None:
+        enrollments = enrollments.filter(student_id__in=student_ids)
+        attendances = attendances.filter(student_id__in=student_ids)
+
+    counters = {}
+    for student_id, offering_id in enrollments.values_list('student_id', 'subject_offering_id'):
+        for lecture_type in types_by_offering.get(offering_id, []):
+            counters[(student_id, offering_id, lecture_type)] = {
+                'conducted': conducted[(offering_id, lecture_type)], 'present': 0, 'absent': 0, 'late': 0,
+            }
+
+    status_rows = (
+        attendances
+        .values('student_id', 'lecture__subject_offering_id', 'lecture__lecture_type')
+        .annotate(
+            present=Count('id', filter=Q(status='present')),
+            absent=Count('id', filter=Q(status='absent')),
+            late=Count('id', filter=Q(status='late')),
+        )
+        .order_by()
+    )
+    for row in status_rows:
+        offering_id = row['lecture__subject_offering_id']
+        lecture_type = row['lecture__lecture_type']
+        entry = counters.setdefault(
+            (row['student_id'], offering_id, lecture_type),
+            {'conducted': conducted.get((offering_id, lecture_type), 0), 'present': 0, 'absent': 0, 'late': 0},
+        )
+        entry['present'] = row['present']
+        entry['absent'] = row['absent']
+        entry['late'] = row['late']
+
+    summaries = [
+        AttendanceSummary(
+            student_id=student_id,
+            subject_offering_id=offering_id,
+            lecture_type=lecture_type,
+            **values,
+        )
+        for (student_id, offering_id, lecture_type), values in counters.items()
+    ]
+
+    with transaction.atomic():
+        existing = AttendanceSummary.objects.filter(subject_offering_id__in=offering_ids)
+        if student_ids is not None:
+            existing = existing.filter(student_id__in=student_ids)
+        stale_ids = [
+            pk for pk, student_id, offering_id, lecture_type
+            in existing.values_list('id', 'student_id', 'subject_offering_id', 'lecture_type')
+            if (student_id, offering_id, lecture_type) not in counters
+        ]
+        if stale_ids:
+            AttendanceSummary.objects.filter(id__in=stale_ids).delete()
+        if summaries:
+            AttendanceSummary.objects.bulk_create(
+                summaries,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['student', 'subject_offering', 'lecture_type'],
+                update_fields=SUMMARY_COUNTERS + ['updated_at'],
+            )
+
+    return len(summaries)
+
+
+def refresh_for_lecture(lecture):
+    """Refresh every student of a lecture's offering (conducted count changed)."""
+    refresh_attendance_summaries([lecture.subject_offering_id])
+
+
+def refresh_for_student(student_id, offering_id):
+    """Refresh a single (student, offering) pair after an attendance change."""
+    refresh_attendance_summaries([offering_id], student_ids=[student_id])
+
+
+ATTENDANCE_STATUSES = [status for status, _ in Attendance.STATUS_CHOICES]
+
+
+def mark_lecture_attendance(lecture, roster, marked_by=None):
+    """Upsert a whole lecture's attendance in one transaction.
+
+    ``roster`` maps each status ('present', 'absent', 'late') to a list of
+    Student ids. Students are validated against the offering's active
+    enrollments with a single query and written with one
+    ``bulk_create(update_conflicts=True)`` on the (lecture, student) key.
+
+    Returns a list of ``{'student': id, 'status': ..., 'outcome': ...}`` dicts
+    where outcome is one of created, updated, not_enrolled, duplicate or
+    invalid.
+    """
+    requested = {}
+    outcomes = []
+    for status, student_ids in roster.items():
+        for raw_id in student_ids or []:
+            if status not in ATTENDANCE_STATUSES:
+                outcomes.append({'student': raw_id, 'status': status, 'outcome': 'invalid'})
+                continue
+            try:
+                student_id = int(raw_id)
+            except (TypeError, ValueError):
+                outcomes.append({'student': raw_id, 'status': status, 'outcome': 'invalid'})
+                continue
+            if student_id in requested:
+                requested[student_id] = None  # listed under more than one status
+            else:
+                requested[student_id] = status
+
+    enrolled = set(
+        StudentEnrollment.objects.filter(
+            subject_offering_id=lecture.subject_offering_id,
+            status='active',
+            student_id__in=list(requested),
+        ).values_list('student_id', flat=True)
+    )
+
+    to_write = {}
+    for student_id, status in requested.items():
+        if status is None:
+            outcomes.append({'student': student_id, 'status': None, 'outcome': 'duplicate'})
+        elif student_id not in enrolled:
+            outcomes.append({'student': student_id, 'status': status, 'outcome': 'not_enrolled'})
+        else:
+            to_write[student_id] = status
+
+    if not to_write:
+        return outcomes
+
+    with transaction.atomic():
+        # Materialized lectures become conducted once attendance is taken
+        newly_conducted = Lecture.objects.filter(id=lecture.id, is_conducted=False).update(is_conducted=True)
+        existing = set(
+            Attendance.objects.filter(lecture=lecture, student_id__in=list(to_write))
+            .values_list('student_id', flat=True)
+        )
+        Attendance.objects.bulk_create(
+            [
+                Attendance(lecture=lecture, student_id=student_id, status=status, marked_by=marked_by)
+                for student_id, status in to_write.items()
+            ],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['lecture', 'student'],
+            update_fields=['status', 'marked_by', 'marked_date'],
+        )
+        if newly_conducted:
+            lecture.is_conducted = True
+            refresh_attendance_summaries([lecture.subject_offering_id])
+        else:
+            refresh_attendance_summaries([lecture.subject_offering_id], student_ids=list(to_write))
+
+    for student_id, status in to_write.items():
+        outcomes.append({
+            'student': student_id,
+            'status': status,
+            'outcome': 'updated' if student_id in existing else 'created',
+        })
+    return outcomes
+
+
+def filter_attendance_export(queryset, params):
+    """Apply the optional ``start``/``end``/``offering`` export filters.
+
+    Raises ValueError for malformed values so views can report them.
+    """
+    start = params.get('start')
+    end = params.get('end')
+    offering = params.get('offering')
+
+    if start:
+        queryset = queryset.filter(lecture__date__gte=date.fromisoformat(start))
+    if end:
+        queryset = queryset.filter(lecture__date__lte=date.fromisoformat(end))
+    if offering:
+        queryset = queryset.filter(lecture__subject_offering_id=int(offering))
+    return queryset
+
+
+def wants_gzip(params):
+    return params.get('gzip', '').lower() in ('1', 'true', 'yes')
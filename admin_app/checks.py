@@ -0,0 +1,52 @@
+"""
+System checks for admin_app.
+
+The result, marks-analytics and timetable caches invalidate by moving
+version tokens stored in the default cache, so every gunicorn worker and
+management command has to share that cache. A per-process backend would let
+workers serve stale pages indefinitely, so it is an error outside DEBUG, as
+is a database cache whose table has not been created.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import connections
+
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+DATABASE_BACKEND = 'django.core.cache.backends.db.DatabaseCache'
+
+
+def _problem(msg, hint, id):
+    level = Warning if settings.DEBUG else Error
+    return level(msg, hint=hint, id=id)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [_problem(
+            f"The default cache ({backend}) is private to each process.",
+            "Set REDIS_URL or use django.core.cache.backends.db.DatabaseCache so cache "
+            "invalidations reach every worker.",
+            'admin_app.E001',
+        )]
+    return []
+
+
+@register(Tags.caches, Tags.database)
+def check_cache_table(app_configs, databases=None, **kwargs):
+    config = settings.CACHES.get('default', {})
+    if config.get('BACKEND') != DATABASE_BACKEND or not databases:
+        return []
+    problems = []
+    for alias in databases:
+        if config['LOCATION'] not in connections[alias].introspection.table_names():
+            problems.append(_problem(
+                f"Cache table '{config['LOCATION']}' does not exist in database '{alias}'.",
+                "Run 'python manage.py createcachetable'.",
+                'admin_app.E002',
+            ))
+    return problems
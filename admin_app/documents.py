@@ -0,0 +1,325 @@
+"""
+Content-addressed PDF cache for student documents.
+
+Result and fee-receipt PDFs are rendered from a plain payload built out of
+the source rows (ids, ``updated_at`` and every value printed on the page).
+The SHA-256 of that payload is both the file name under PDF_CACHE_DIR and
+the ETag, so a repeat download streams the stored file, a matching
+``If-None-Match`` gets a 304 without touching disk, and any edit to the
+rows produces a new key instead of needing explicit invalidation.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+
+from .models import SemesterResult
+
+PDF_CACHE_DIR = settings.PDF_CACHE_DIR
+# Bump when a renderer's layout changes so stale files stop matching
+PDF_RENDER_VERSION = 1
+PRERENDER_CHUNK_SIZE = 50
+
+
+def receipt_payload(receipt):
+    """Everything the receipt PDF shows; expects student__user and fee_structure loaded."""
+    return {
+        'kind': 'receipt',
+        'id': receipt.id,
+        'receipt_number': receipt.receipt_number,
+        'transaction_id': receipt.transaction_id or 'N/A',
+        'student_name': receipt.student.name,
+        'username': receipt.student.user.username,
+        'semester': receipt.fee_structure.semester,
+        'payment_date': receipt.payment_date.strftime('%d %B %Y'),
+        'payment_mode': receipt.get_payment_mode_display(),
+        'bank_name': receipt.bank_name or 'N/A',
+        'amount': f"₹{receipt.amount:,.0f}",
+        'created_at': receipt.created_at.strftime('%d %B %Y at %I:%M %p'),
+    }
+
+
+def result_payload(sem_result):
+    """Everything the result PDF shows; expects student__user and subject_results__subject loaded."""
+    rows, total_gpa = [], 0
+    subject_results = list(sem_result.subject_results.all())
+    for result in subject_results:
+        rows.append([
+            result.subject.name,
+            f"{result.internal_marks:.1f}" if result.internal_marks else "-",
+            f"{result.external_marks:.1f}" if result.external_marks else "-",
+            f"{result.practical_marks:.1f}" if result.practical_marks else "-",
+            f"{result.total_marks:.1f}",
+            result.grade,
+            str(result.gpa),
+        ])
+        total_gpa += result.gpa
+    return {
+        'kind': 'result',
+        'id': sem_result.id,
+        'updated_at': sem_result.updated_at.isoformat(),
+        'semester': sem_result.semester,
+        'student_name': sem_result.student.name,
+        'username': sem_result.student.user.username,
+        'rows': rows,
+        'average_gpa': str(round(total_gpa / len(subject_results), 2) if subject_results else 0),
+    }
+
+
+def document_key(payload):
+    """Hex SHA-256 of ``payload``; identical content always maps to the same file."""
+    blob = json.dumps([PDF_RENDER_VERSION, payload], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def cache_path(payload, key):
+    return os.path.join(PDF_CACHE_DIR, payload['kind'], key[:2], f"{key}.pdf")
+
+
+def render_receipt_pdf(receipt):
+    """Render a ``receipt_payload`` to PDF bytes."""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor('#1a73e8'),
+        spaceAfter=10, alignment=TA_CENTER, fontName='Helvetica-Bold',
+    )
+    subtitle_style = ParagraphStyle(
+        'Subtitle', parent=styles['Normal'], fontSize=12, textColor=colors.HexColor('#666666'),
+        spaceAfter=20, alignment=TA_CENTER,
+    )
+    badge_style = ParagraphStyle(
+        'Badge', parent=styles['Normal'], fontSize=12, textColor=colors.HexColor('#2e7d32'),
+        backColor=colors.HexColor('#e8f5e9'), borderColor=colors.HexColor('#2e7d32'), borderWidth=1,
+        borderPadding=8, alignment=TA_CENTER, fontName='Helvetica-Bold',
+    )
+    elements = [
+        Paragraph("COLLEGE PAYMENT RECEIPT", title_style),
+        Paragraph("Official Fee Payment Confirmation", subtitle_style),
+        Spacer(1, 0.2 * inch),
+        Paragraph("✓ Payment Verified", badge_style),
+        Spacer(1, 0.3 * inch),
+    ]
+
+    table = Table(
+        [
+            ['Receipt Number:', receipt['receipt_number'], 'Transaction ID:', receipt['transaction_id']],
+            ['Student Name:', receipt['student_name'], 'Student ID:', receipt['username']],
+            ['Semester:', f"Semester {receipt['semester']}", 'Payment Date:', receipt['payment_date']],
+            ['Payment Mode:', receipt['payment_mode'], 'Payment Gateway:', receipt['bank_name']],
+        ],
+        colWidths=[1.5 * inch, 2.5 * inch, 1.5 * inch, 2.5 * inch],
+    )
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8f9fa')),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
+        ('TEXTCOLOR', (2, 0), (2, -1), colors.HexColor('#666666')),
+        ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#202124')),
+        ('TEXTCOLOR', (3, 0), (3, -1), colors.HexColor('#202124')),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTNAME', (3, 0), (3, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e0e0e0')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+    ]))
+    elements += [table, Spacer(1, 0.4 * inch)]
+
+    amount_style = ParagraphStyle(
+        'Amount', parent=styles['Normal'], fontSize=36, textColor=colors.HexColor('#0d47a1'),
+        alignment=TA_CENTER, fontName='Helvetica-Bold', spaceAfter=5,
+    )
+    amount_label_style = ParagraphStyle(
+        'AmountLabel', parent=styles['Normal'], fontSize=14, textColor=colors.HexColor('#1565c0'),
+        alignment=TA_CENTER, fontName='Helvetica-Bold', spaceBefore=10,
+    )
+    amount_table = Table(
+        [[Paragraph("AMOUNT PAID", amount_label_style)], [Paragraph(escape(receipt['amount']), amount_style)]],
+        colWidths=[6 * inch],
+    )
+    amount_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#e3f2fd')),
+        ('BOX', (0, 0), (-1, -1), 2, colors.HexColor('#1a73e8')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 20),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
+    ]))
+
+    footer_style = ParagraphStyle(
+        'Footer', parent=styles['Normal'], fontSize=10, textColor=colors.HexColor('#666666'), alignment=TA_CENTER,
+    )
+    timestamp_style = ParagraphStyle(
+        'Timestamp', parent=styles['Normal'], fontSize=9, textColor=colors.HexColor('#999999'), alignment=TA_CENTER,
+    )
+    elements += [
+        amount_table,
+        Spacer(1, 0.4 * inch),
+        Paragraph("<b>Note:</b> This is a computer-generated receipt and does not require a signature.", footer_style),
+        Spacer(1, 0.1 * inch),
+        Paragraph("For any queries, please contact the accounts department.", footer_style),
+        Spacer(1, 0.2 * inch),
+        Paragraph(f"Generated on {receipt['created_at']}", timestamp_style),
+    ]
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def render_result_pdf(result):
+    """Render a ``result_payload`` to PDF bytes."""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle', parent=styles['Heading1'], fontSize=22, textColor=colors.HexColor('#1a73e8'),
+        spaceAfter=10, alignment=TA_CENTER, fontName='Helvetica-Bold',
+    )
+    data = [['Subject', 'Internal', 'External', 'Practical', 'Total', 'Grade', 'GPA']]
+    data += result['rows']
+    data.append(['', '', '', '', 'Average GPA:', '', result['average_gpa']])
+
+    table = Table(data, colWidths=[2 * inch] + [0.8 * inch] * 6)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a73e8')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#f0f0f0')]),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#e3f2fd')),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ]))
+    doc.build([
+        Paragraph(f"SEMESTER {result['semester']} RESULTS", title_style),
+        Paragraph(
+            f"Student: {escape(result['student_name'])} | ID: {escape(result['username'])}", styles['Normal'],
+        ),
+        Spacer(1, 0.3 * inch),
+        table,
+    ])
+    return buffer.getvalue()
+
+
+RENDERERS = {'receipt': render_receipt_pdf, 'result': render_result_pdf}
+
+
+def store_pdf(path, pdf):
+    """Write ``pdf`` to ``path`` atomically so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(pdf)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+def cached_pdf(payload, key=None):
+    """Path of the rendered PDF for ``payload``, rendering it on a cache miss."""
+    key = key or document_key(payload)
+    path = cache_path(payload, key)
+    if not os.path.exists(path):
+        store_pdf(path, RENDERERS[payload['kind']](payload))
+    return path
+
+
+def pdf_response(request, payload, filename):
+    """Serve ``payload`` as a PDF download, honouring ``If-None-Match``.
+
+    The response is private and must be revalidated, so a recomputed result
+    reaches the student on the next click while unchanged ones cost a 304.
+    """
+    key = document_key(payload)
+    etag = quote_etag(key)
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            open(cached_pdf(payload, key), 'rb'), as_attachment=True, filename=filename,
+            content_type='application/pdf',
+        )
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def render_payload_chunk(payloads):
+    """Worker entry point: ``[(payload, key, pdf bytes), ...]`` for a chunk."""
+    return [(payload, key, RENDERERS[payload['kind']](payload)) for payload, key in payloads]
+
+
+def prerender_results(semester_results, workers=None, chunk_size=PRERENDER_CHUNK_SIZE):
+    """Warm the cache with every result PDF of ``semester_results``.
+
+    Payloads whose file already exists are skipped; the rest are rendered in
+    a process pool (CPU count by default) and written by this process.
+    Returns ``(rendered, already_cached)``.
+    """
+    pending, cached = [], 0
+    results = semester_results.select_related('student__user').prefetch_related('subject_results__subject')
+    for sem_result in results.iterator(chunk_size=500):
+        payload = result_payload(sem_result)
+        if not payload['rows']:
+            continue
+        key = document_key(payload)
+        if os.path.exists(cache_path(payload, key)):
+            cached += 1
+        else:
+            pending.append((payload, key))
+
+    rendered = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(render_payload_chunk, pending[start:start + chunk_size])
+                for start in range(0, len(pending), chunk_size)
+            ]
+            for future in as_completed(futures):
+                for payload, key, pdf in future.result():
+                    store_pdf(cache_path(payload, key), pdf)
+                    rendered += 1
+    return rendered, cached
+
+
+def prerender_semester(semester, academic_year=None, published_only=True, **kwargs):
+    """``prerender_results`` for one semester (optionally one academic year)."""
+    results = SemesterResult.objects.filter(semester=semester)
+    if academic_year:
+        results = results.filter(academic_year=academic_year)
+    if published_only:
+        results = results.filter(published=True)
+    return prerender_results(results, **kwargs)
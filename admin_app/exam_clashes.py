@@ -0,0 +1,111 @@
+"""
+Student-level exam clash detection.
+
+Builds an in-memory map from each student to the ExamSchedule intervals
+they sit, using two queries: one for the exams and one for the active
+StudentEnrollments of those exams' subjects. Students with the same set of
+exams (a whole division, usually) share one sorted sweep, so a university
+timetable costs one sweep per distinct exam set rather than per student.
+Exams that merely touch (one ends when the next starts) do not clash.
+"""
+import heapq
+from collections import defaultdict
+
+from .models import ExamSchedule, StudentEnrollment
+
+EXAM_FIELDS = (
+    'id', 'subject_id', 'academic_year', 'exam_date', 'start_time', 'end_time',
+    'subject__code', 'subject__name', 'exam_type__name',
+)
+
+
+def exam_payload(row):
+    """Display representation of an exam row."""
+    return {
+        'id': row['id'],
+        'code': row['subject__code'],
+        'subject': row['subject__name'],
+        'type': row['exam_type__name'],
+        'date': row['exam_date'],
+        'time': f"{row['start_time']:%H:%M} – {row['end_time']:%H:%M}",
+    }
+
+
+def _overlapping_pairs(intervals):
+    """Sweep ``[(date, start, end, exam_id)]`` and yield clashing exam id pairs."""
+    active = []  # heap of (date, end, exam_id) still running
+    for exam_date, start, end, exam_id in sorted(intervals):
+        while active and (active[0][0] < exam_date or active[0][1] <= start):
+            heapq.heappop(active)
+        for _, _, other_id in active:
+            yield (other_id, exam_id) if other_id < exam_id else (exam_id, other_id)
+        heapq.heappush(active, (exam_date, end, exam_id))
+
+
+def student_exam_clashes(exams=None):
+    """Find every student sitting two overlapping exams.
+
+    Returns ``(clashes, exams_by_id)`` where ``clashes`` maps an
+    ``(exam_a_id, exam_b_id)`` pair to the list of ``(student_id,
+    roll_number)`` caught in it, and ``exams_by_id`` holds the exam rows.
+    """
+    if exams is None:
+        exams = ExamSchedule.objects.all()
+    rows = list(exams.exclude(status='cancelled').order_by().values(*EXAM_FIELDS))
+    exams_by_id = {row['id']: row for row in rows}
+    exams_by_subject = defaultdict(list)
+    for row in rows:
+        exams_by_subject[(row['subject_id'], row['academic_year'])].append(row['id'])
+
+    student_exams = defaultdict(set)
+    rolls = {}
+    enrollments = StudentEnrollment.objects.filter(
+        status='active', subject_offering__subject_id__in={row['subject_id'] for row in rows},
+    ).values_list('student_id', 'student__roll_number', 'subject_offering__subject_id',
+                  'subject_offering__academic_year')
+    for student_id, roll_number, subject_id, academic_year in enrollments.iterator(chunk_size=5000):
+        exam_ids = exams_by_subject.get((subject_id, academic_year))
+        if exam_ids:
+            student_exams[student_id].update(exam_ids)
+            rolls[student_id] = roll_number
+
+    students_by_signature = defaultdict(list)
+    for student_id, exam_ids in student_exams.items():
+        if len(exam_ids) > 1:
+            students_by_signature[frozenset(exam_ids)].append(student_id)
+
+    clashes = defaultdict(list)
+    for signature, student_ids in students_by_signature.items():
+        intervals = [
+            (exams_by_id[exam_id]['exam_date'], exams_by_id[exam_id]['start_time'],
+             exams_by_id[exam_id]['end_time'], exam_id)
+            for exam_id in signature
+        ]
+        for pair in _overlapping_pairs(intervals):
+            clashes[pair].extend((student_id, rolls[student_id]) for student_id in student_ids)
+    return dict(clashes), exams_by_id
+
+
+def clash_report(exams=None, sample_size=10):
+    """Clashing exam pairs, worst first, for display in manage_exams."""
+    clashes, exams_by_id = student_exam_clashes(exams)
+    report = []
+    for (exam_a, exam_b), students in clashes.items():
+        rolls = sorted(roll for _, roll in students)
+        report.append({
+            'exam_a': exam_payload(exams_by_id[exam_a]),
+            'exam_b': exam_payload(exams_by_id[exam_b]),
+            'student_count': len(rolls),
+            'sample_rolls': rolls[:sample_size],
+        })
+    report.sort(key=lambda item: (-item['student_count'], item['exam_a']['date']))
+    return report
+
+
+def clashes_for_exam(exam):
+    """Clash report rows involving ``exam``, checked against its date only."""
+    same_day = ExamSchedule.objects.filter(exam_date=exam.exam_date)
+    return [
+        item for item in clash_report(same_day)
+        if exam.id in (item['exam_a']['id'], item['exam_b']['id'])
+    ]
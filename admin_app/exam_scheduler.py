@@ -0,0 +1,222 @@
+"""
+Exam timetable auto-scheduler.
+
+Builds a subject conflict graph (two subjects conflict when at least one
+student is actively enrolled in both) from a single StudentEnrollment query,
+then colours it with DSATUR into exam slots: every teaching day between the
+AcademicCalendar's exam_start_date and exam_end_date (holidays and Sundays
+removed) times the daily sessions. A slot also has a seating capacity, so a
+subject only lands in a slot that has no conflicting subject and enough
+seats left. Exams already in the window that this run does not move (other
+exam types or semesters, and papers no longer 'scheduled') pre-occupy their
+slots: they take seats and block subjects sharing their students. Scheduled
+exams are written with one bulk upsert that never touches their status.
+"""
+import heapq
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import Count
+
+from .lectures import teaching_dates
+from .models import ExamSchedule, StudentEnrollment
+
+DEFAULT_SESSIONS = [(time(9, 30), time(12, 30)), (time(14, 0), time(17, 0))]
+SCHEDULE_BATCH_SIZE = 1000
+
+
+def conflict_graph(academic_year, subject_ids=None):
+    """``(sizes, adjacency)`` for the subjects offered in ``academic_year``.
+
+    ``sizes`` maps subject id to its number of enrolled students and
+    ``adjacency`` maps subject id to the set of subjects sharing a student.
+    Students with the same subject set are collapsed before pairs are
+    generated, so the pair work grows with distinct sets, not students.
+    """
+    enrollments = StudentEnrollment.objects.filter(
+        status='active', subject_offering__academic_year=academic_year,
+    )
+    if subject_ids is not None:
+        enrollments = enrollments.filter(subject_offering__subject_id__in=subject_ids)
+
+    subjects_by_student = defaultdict(set)
+    for student_id, subject_id in enrollments.values_list(
+        'student_id', 'subject_offering__subject_id'
+    ).iterator(chunk_size=5000):
+        subjects_by_student[student_id].add(subject_id)
+
+    students_per_set = defaultdict(int)
+    for subjects in subjects_by_student.values():
+        students_per_set[frozenset(subjects)] += 1
+
+    sizes = defaultdict(int)
+    adjacency = defaultdict(set)
+    for subjects, count in students_per_set.items():
+        for subject_id in subjects:
+            sizes[subject_id] += count
+            adjacency[subject_id].update(subjects)
+    for subject_id in adjacency:
+        adjacency[subject_id].discard(subject_id)
+    return dict(sizes), dict(adjacency)
+
+
+def exam_slots(calendar, sessions=DEFAULT_SESSIONS):
+    """Ordered ``[(date, start_time, end_time)]`` inside the calendar's exam window."""
+    dates = sorted(
+        exam_date
+        for day_dates in teaching_dates(calendar.exam_start_date, calendar.exam_end_date).values()
+        for exam_date in day_dates
+    )
+    return [(exam_date, start, end) for exam_date in dates for start, end in sorted(sessions)]
+
+
+def colour_subjects(sizes, adjacency, slot_count, capacity=None, occupied=()):
+    """Assign each subject a slot index with DSATUR under a per-slot seat cap.
+
+    The next subject is always the one whose neighbours already occupy the
+    most distinct slots (ties: most neighbours, then most students); it gets
+    the earliest slot free of its neighbours with enough seats left.
+    ``occupied`` lists ``(slot, subject_id, seats)`` for exams that already
+    sit in a slot; they use up seats and block that subject and its
+    neighbours. Returns ``(assignment, unscheduled)``.
+    """
+    assignment, unscheduled = {}, []
+    seats_left = [capacity] * slot_count if capacity else None
+    neighbour_slots = defaultdict(set)
+    for slot, subject_id, seats in occupied:
+        if seats_left is not None:
+            seats_left[slot] -= seats
+        for blocked_id in {subject_id, *adjacency.get(subject_id, ())}:
+            neighbour_slots[blocked_id].add(slot)
+    heap = [
+        (-len(neighbour_slots[s]), -len(adjacency.get(s, ())), -size, s) for s, size in sizes.items()
+    ]
+    heapq.heapify(heap)
+    done = set()
+
+    while heap:
+        saturation, _, _, subject_id = heapq.heappop(heap)
+        if subject_id in done or -saturation != len(neighbour_slots[subject_id]):
+            continue  # stale entry, a fresher one is queued
+        done.add(subject_id)
+        blocked = neighbour_slots[subject_id]
+        size = sizes[subject_id]
+        slot = next(
+            (
+                index for index in range(slot_count)
+                if index not in blocked and (seats_left is None or seats_left[index] >= size)
+            ),
+            None,
+        )
+        if slot is None:
+            unscheduled.append(subject_id)
+            continue
+        assignment[subject_id] = slot
+        if seats_left is not None:
+            seats_left[slot] -= size
+        for neighbour in adjacency.get(subject_id, ()):
+            if neighbour in sizes and neighbour not in done and slot not in neighbour_slots[neighbour]:
+                neighbour_slots[neighbour].add(slot)
+                heapq.heappush(heap, (
+                    -len(neighbour_slots[neighbour]), -len(adjacency[neighbour]), -sizes[neighbour], neighbour,
+                ))
+    return assignment, unscheduled
+
+
+def occupied_slots(calendar, slots, exams, sizes):
+    """``[(slot, subject_id, seats)]`` for ``exams`` overlapping one of ``slots``."""
+    slots_by_date = defaultdict(list)
+    for index, (exam_date, start, end) in enumerate(slots):
+        slots_by_date[exam_date].append((index, start, end))
+    rows = list(exams.values_list('subject_id', 'exam_date', 'start_time', 'end_time'))
+    seats = dict(sizes)
+    missing = {subject_id for subject_id, _, _, _ in rows} - set(seats)
+    if missing:
+        seats.update(
+            StudentEnrollment.objects.filter(
+                status='active', subject_offering__academic_year=calendar.academic_year,
+                subject_offering__subject_id__in=missing,
+            )
+            .values('subject_offering__subject_id')
+            .annotate(total=Count('student_id', distinct=True))
+            .order_by()
+            .values_list('subject_offering__subject_id', 'total')
+        )
+    return [
+        (index, subject_id, seats.get(subject_id, 0))
+        for subject_id, exam_date, start, end in rows
+        for index, slot_start, slot_end in slots_by_date.get(exam_date, ())
+        if start < slot_end and slot_start < end
+    ]
+
+
+def schedule_exams(calendar, exam_type, sessions=DEFAULT_SESSIONS, capacity=None, subject_ids=None,
+                   max_marks=100, passing_marks=40, dry_run=False, batch_size=SCHEDULE_BATCH_SIZE):
+    """Schedule ``exam_type`` papers for every enrolled subject of ``calendar``.
+
+    Existing 'scheduled' ExamSchedule rows for (subject, exam_type,
+    academic_year) get the new date and times; marks settings and status of
+    existing rows are kept. Papers already ongoing, completed or cancelled
+    are left where they are; every other non-cancelled exam in the window
+    counts as pre-occupied. Returns ``(exams, unscheduled_subject_ids,
+    slot_count)``.
+    """
+    slots = exam_slots(calendar, sessions)
+    sizes, adjacency = conflict_graph(calendar.academic_year, subject_ids)
+    same_papers = ExamSchedule.objects.filter(exam_type=exam_type, academic_year=calendar.academic_year)
+    locked = set(
+        same_papers.filter(subject_id__in=list(sizes)).exclude(status='scheduled')
+        .values_list('subject_id', flat=True)
+    )
+    movable = same_papers.filter(subject_id__in=[s for s in sizes if s not in locked])
+    in_window = (
+        ExamSchedule.objects.filter(exam_date__range=(calendar.exam_start_date, calendar.exam_end_date))
+        .exclude(status='cancelled')
+        .exclude(id__in=movable.values('id'))
+    )
+    occupied = occupied_slots(calendar, slots, in_window, sizes)
+    assignment, unscheduled = colour_subjects(
+        {s: size for s, size in sizes.items() if s not in locked}, adjacency, len(slots), capacity, occupied,
+    )
+
+    exams = []
+    for subject_id, slot in sorted(assignment.items(), key=lambda item: item[1]):
+        exam_date, start, end = slots[slot]
+        exams.append(ExamSchedule(
+            subject_id=subject_id,
+            exam_type=exam_type,
+            academic_year=calendar.academic_year,
+            exam_date=exam_date,
+            start_time=start,
+            end_time=end,
+            duration_minutes=int(
+                (datetime.combine(exam_date, end) - datetime.combine(exam_date, start)).total_seconds() // 60
+            ),
+            max_marks=max_marks,
+            passing_marks=passing_marks,
+        ))
+    if not dry_run and exams:
+        with transaction.atomic():
+            ExamSchedule.objects.bulk_create(
+                exams,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['subject', 'exam_type', 'academic_year'],
+                update_fields=['exam_date', 'start_time', 'end_time', 'duration_minutes'],
+            )
+    return exams, unscheduled, len(slots)
+
+
+def parse_sessions(specs):
+    """Parse ``["09:30-12:30", ...]`` into ``[(time, time), ...]``."""
+    sessions = []
+    for spec in specs:
+        try:
+            start, end = (datetime.strptime(part.strip(), '%H:%M').time() for part in spec.split('-'))
+        except ValueError:
+            raise ValueError(f"Invalid session '{spec}', expected HH:MM-HH:MM")
+        if start >= end:
+            raise ValueError(f"Session '{spec}' must end after it starts")
+        sessions.append((start, end))
+    return sessions
@@ -1,3 +1,4 @@
+from django.http import JsonResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
@@ -5,6 +6,8 @@ from collections import defaultdict
 from datetime import datetime
 from django.utils import timezone
 from .models import ExamSchedule, ExamMarks, ExamType, Subject, Student
+from .exam_clashes import clash_report, clashes_for_exam
+from .marks_analytics import exam_analytics, subject_analytics
 
 
 @staff_member_required
@@ -27,8 +30,11 @@ def manage_exams(request):
     
     # Organize exams by semester and exam type
     exams_by_semester = defaultdict(lambda: defaultdict(list))
+    # Cached per exam until its marks change; one marks query per batch of stale exams
+    analytics = exam_analytics(exams)
     
     for exam in exams:
+        exam.analytics = analytics.get(exam.id)
         exams_by_semester[exam.subject.semester][exam.exam_type.name].append(exam)
     
     # Get statistics
@@ -52,6 +58,12 @@ def manage_exams(request):
     # Get all subjects and exam types for adding new exams
     subjects = Subject.objects.all().order_by('name')
     exam_types = ExamType.objects.all().order_by('name')
+
+    # Clash detection covers one academic year (the latest unless ?academic_year= picks another)
+    clash_year = request.GET.get('academic_year') or (
+        ExamSchedule.objects.order_by('-academic_year').values_list('academic_year', flat=True).first()
+    )
+    exam_clashes = clash_report(ExamSchedule.objects.filter(academic_year=clash_year)) if clash_year else []
     
     context = {
         'exams_by_semester': exams_by_semester,
@@ -63,6 +75,9 @@ def manage_exams(request):
         'exam_types': exam_types,
         'semester_range': range(1, 9),
         'semester_counts': semester_counts,
+        # Students sitting two overlapping papers, worst pairs first
+        'exam_clashes': exam_clashes,
+        'clash_academic_year': clash_year,
     }
     
     return render(request, 'admin_app/manage_exams.html', context)
@@ -88,6 +103,17 @@ def add_exam(request):
             start_time = datetime.now().time()
             end_time = datetime.now().time()
             duration_minutes = 120
+            if request.POST.get('exam_date'):
+                exam_date = datetime.strptime(request.POST['exam_date'], '%Y-%m-%d').date()
+            if request.POST.get('start_time') and request.POST.get('end_time'):
+                start_time = datetime.strptime(request.POST['start_time'], '%H:%M').time()
+                end_time = datetime.strptime(request.POST['end_time'], '%H:%M').time()
+                if start_time >= end_time:
+                    messages.error(request, 'End time must be after start time')
+                    return redirect('admin_app:manage_exams')
+                duration_minutes = (
+                    datetime.combine(exam_date, end_time) - datetime.combine(exam_date, start_time)
+                ).seconds // 60
             
             # Check if exam already exists
             exam_schedule, created = ExamSchedule.objects.get_or_create(
@@ -111,9 +137,23 @@ def add_exam(request):
                 # Update existing exam
                 exam_schedule.max_marks = int(max_marks)
                 exam_schedule.passing_marks = int(passing_marks)
+                if request.POST.get('exam_date'):
+                    exam_schedule.exam_date = exam_date
+                if request.POST.get('start_time') and request.POST.get('end_time'):
+                    exam_schedule.start_time = start_time
+                    exam_schedule.end_time = end_time
+                    exam_schedule.duration_minutes = duration_minutes
                 exam_schedule.save()
                 messages.info(request, f'ℹ Exam already exists for {subject.name} ({exam_type.name}). Updated marks.')
-                
+
+            for clash in clashes_for_exam(exam_schedule):
+                other = clash['exam_b'] if clash['exam_a']['id'] == exam_schedule.id else clash['exam_a']
+                messages.warning(
+                    request,
+                    f"⚠ {clash['student_count']} student(s) also sit {other['code']} ({other['type']}) "
+                    f"at {other['time']} on {other['date']:%d %b %Y}, e.g. {', '.join(clash['sample_rolls'][:3])}"
+                )
+
         except Subject.DoesNotExist:
             messages.error(request, 'Subject not found')
         except ExamType.DoesNotExist:
@@ -139,3 +179,44 @@ def delete_exam(request, exam_id):
         messages.error(request, f'Error deleting exam: {str(e)}')
     
     return redirect('admin_app:manage_exams')
+
+
+@staff_member_required
+def exams_analytics(request):
+    """
+    JSON marks distribution per exam and per subject.
+
+    Select exams with repeated ``exam`` ids, or a whole ``semester``
+    (optionally narrowed by ``academic_year``). Summaries are cached per exam
+    until its marks change.
+    """
+    exams = ExamSchedule.objects.exclude(status='cancelled')
+    exam_ids = request.GET.getlist('exam')
+    semester = request.GET.get('semester')
+    try:
+        if exam_ids:
+            exams = exams.filter(id__in=[int(exam_id) for exam_id in exam_ids])
+        elif semester:
+            exams = exams.filter(subject__semester=int(semester))
+        else:
+            return JsonResponse({"error": "Pass exam ids or a semester"}, status=400)
+    except ValueError:
+        return JsonResponse({"error": "exam and semester must be integers"}, status=400)
+    if request.GET.get('academic_year'):
+        exams = exams.filter(academic_year=request.GET['academic_year'])
+
+    exams = list(exams.select_related('subject', 'exam_type'))
+    summaries = exam_analytics(exams)
+    subjects = subject_analytics(exams, summaries)
+    return JsonResponse({
+        "exams": [
+            {"id": exam.id, "subject": exam.subject.code, "type": exam.exam_type.name,
+             "academic_year": exam.academic_year, **summaries[exam.id]}
+            for exam in exams
+        ],
+        "subjects": [
+            {"id": exam.subject_id, "code": exam.subject.code, "name": exam.subject.name, **subjects[exam.subject_id]}
+            for exam in {exam.subject_id: exam for exam in exams}.values()
+            if exam.subject_id in subjects
+        ],
+    })
@@ -0,0 +1,47 @@
+"""
+Streaming CSV helpers shared by the report/export views.
+
+Rows are written straight to the socket through StreamingHttpResponse so an
+export never holds more than one database chunk in memory, optionally
+gzip-compressed on the fly.
+"""
+import csv
+import zlib
+
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back."""
+
+    def write(self, value):
+        return value
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_csv_response(header, rows, filename, compress=False):
+    """Build a StreamingHttpResponse that writes ``rows`` as CSV lazily."""
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    if compress:
+        response = StreamingHttpResponse(_gzip_stream(lines()), content_type='application/gzip')
+        filename = f"{filename}.gz"
+    else:
+        response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
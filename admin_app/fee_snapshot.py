@@ -0,0 +1,235 @@
+"""
+Fee collections snapshot.
+
+FeeCollectionSnapshot holds one row of totals per (degree program, semester,
+academic year). A refresh rebuilds rows from two grouped aggregates, one
+over FeeStructure (amounts, student count and outstanding split into
+ageing buckets) and one over FeeReceipt (receipts and amount collected),
+and swaps them in inside a transaction. Payments adjust their group's row
+with ``F()`` updates in the payment transaction itself, so the dashboard is
+current between nightly refreshes; only ageing drifts until the next one.
+The dashboard rolls the snapshot up by department, program, semester and
+year, so its cost depends on the number of groups, not of students.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import FeeCollectionSnapshot, FeeReceipt, FeeStructure, Student
+
+# (snapshot field, label, oldest age in days or None for open-ended), youngest first
+AGEING_BUCKETS = [
+    ('outstanding_0_30', '0–30 days', 30),
+    ('outstanding_31_60', '31–60 days', 60),
+    ('outstanding_61_90', '61–90 days', 90),
+    ('outstanding_over_90', '90+ days', None),
+]
+STRUCTURE_FIELDS = ['fees_to_be_collected', 'previously_paid', 'paid', 'refunded', 'outstanding']
+AMOUNT_FIELDS = [*STRUCTURE_FIELDS, *[field for field, _, _ in AGEING_BUCKETS], 'collected']
+ZERO = Decimal('0')
+
+
+def ageing_bucket(raised_on, today=None):
+    """Snapshot field of the bucket a fee raised on ``raised_on`` falls into."""
+    age = ((today or timezone.localdate()) - raised_on).days
+    for field, _, oldest in AGEING_BUCKETS:
+        if oldest is None or age <= oldest:
+            return field
+
+
+def _bucket_filters(today):
+    """``{field: Q}`` matching fee structures whose age falls in each bucket."""
+    filters, previous = {}, None
+    for field, _, oldest in AGEING_BUCKETS:
+        condition = Q()
+        if previous is not None:
+            condition &= Q(created_at__date__lt=today - timedelta(days=previous))
+        if oldest is not None:
+            condition &= Q(created_at__date__gte=today - timedelta(days=oldest))
+        filters[field] = condition
+        previous = oldest
+    return filters
+
+
+def _program_filter(field, program_id):
+    """``Q`` matching ``program_id``, including students without a program (``= NULL`` never matches)."""
+    if program_id is None:
+        return Q(**{f'{field}__isnull': True})
+    return Q(**{field: program_id})
+
+
+def _group_filter(groups, program, semester, academic_year):
+    return reduce(or_, (
+        _program_filter(program, program_id) & Q(**{semester: sem, academic_year: year})
+        for program_id, sem, year in groups
+    ))
+
+
+def refresh_fee_snapshot(academic_year=None, groups=None):
+    """Rebuild snapshot rows, all of them or one academic year's or ``groups``'.
+
+    ``groups`` is an iterable of ``(degree_program_id, semester,
+    academic_year)``. Returns the number of snapshot rows written.
+    """
+    today = timezone.localdate()
+    structures = FeeStructure.objects.all()
+    receipts = FeeReceipt.objects.all()
+    snapshots = FeeCollectionSnapshot.objects.all()
+    if academic_year:
+        structures = structures.filter(academic_year=academic_year)
+        receipts = receipts.filter(fee_structure__academic_year=academic_year)
+        snapshots = snapshots.filter(academic_year=academic_year)
+    if groups is not None:
+        groups = list(groups)
+        if not groups:
+            return 0
+        structures = structures.filter(_group_filter(groups, 'student__degree_program_id', 'semester', 'academic_year'))
+        receipts = receipts.filter(_group_filter(
+            groups, 'fee_structure__student__degree_program_id', 'fee_structure__semester',
+            'fee_structure__academic_year',
+        ))
+        snapshots = snapshots.filter(_group_filter(groups, 'degree_program_id', 'semester', 'academic_year'))
+
+    rows = (
+        structures.values('student__degree_program__department_id', 'student__degree_program_id', 'semester',
+                          'academic_year')
+        .annotate(
+            # Aliased: annotations may not reuse the names of the fields they sum
+            total_students=Count('student_id', distinct=True),
+            **{f'total_{field}': Sum(field) for field in STRUCTURE_FIELDS},
+            **{f'total_{field}': Sum('outstanding', filter=condition)
+               for field, condition in _bucket_filters(today).items()},
+        )
+        .order_by()
+    )
+    collected = {
+        (row['fee_structure__student__degree_program_id'], row['fee_structure__semester'],
+         row['fee_structure__academic_year']): row
+        for row in receipts.values('fee_structure__student__degree_program_id', 'fee_structure__semester',
+                                   'fee_structure__academic_year')
+        .annotate(total_receipts=Count('id'), total_collected=Sum('amount'))
+        .order_by()
+    }
+
+    new_rows = []
+    for row in rows:
+        key = (row['student__degree_program_id'], row['semester'], row['academic_year'])
+        receipt_row = collected.get(key, {})
+        new_rows.append(FeeCollectionSnapshot(
+            department_id=row['student__degree_program__department_id'],
+            degree_program_id=key[0],
+            semester=key[1],
+            academic_year=key[2],
+            students=row['total_students'],
+            receipts=receipt_row.get('total_receipts', 0),
+            collected=receipt_row.get('total_collected') or ZERO,
+            **{field: row[f'total_{field}'] or ZERO for field in AMOUNT_FIELDS if field != 'collected'},
+        ))
+    with transaction.atomic():
+        snapshots.delete()
+        # A concurrent rebuild of the same group may have inserted it first; either copy is
+        # current, and the unique constraints (one of them for program-less rows) keep just one
+        FeeCollectionSnapshot.objects.bulk_create(new_rows, ignore_conflicts=True)
+    return len(new_rows)
+
+
+def apply_payment(fee_structure, amount):
+    """Move ``amount`` from outstanding to paid in the structure's snapshot row.
+
+    Call inside the payment transaction. A group without a snapshot row yet
+    is rebuilt once the payment commits.
+    """
+    program_id = Student.objects.filter(pk=fee_structure.student_id).values_list('degree_program_id', flat=True).get()
+    bucket = ageing_bucket(timezone.localdate(fee_structure.created_at))
+    updated = FeeCollectionSnapshot.objects.filter(
+        _program_filter('degree_program_id', program_id), semester=fee_structure.semester,
+        academic_year=fee_structure.academic_year,
+    ).update(
+        paid=F('paid') + amount,
+        outstanding=F('outstanding') - amount,
+        collected=F('collected') + amount,
+        receipts=F('receipts') + 1,
+        refreshed_at=timezone.now(),
+        **{bucket: F(bucket) - amount},
+    )
+    if not updated:
+        group = (program_id, fee_structure.semester, fee_structure.academic_year)
+        # robust: a failed rebuild must not turn a committed payment into an error page
+        transaction.on_commit(lambda: refresh_fee_snapshot(groups=[group]), robust=True)
+
+
+def _rollup(snapshots, key, label):
+    grouped = OrderedDict()
+    for snapshot in snapshots:
+        group_key = key(snapshot)
+        entry = grouped.get(group_key)
+        if entry is None:
+            entry = grouped[group_key] = {'key': group_key, 'label': label(snapshot), 'students': 0,
+                                          'receipts': 0, **{field: ZERO for field in AMOUNT_FIELDS}}
+        entry['students'] += snapshot.students
+        entry['receipts'] += snapshot.receipts
+        for field in AMOUNT_FIELDS:
+            entry[field] += getattr(snapshot, field)
+    for entry in grouped.values():
+        due = entry['fees_to_be_collected'] - entry['refunded']
+        entry['collection_rate'] = round(float((due - entry['outstanding']) * 100 / due), 1) if due else 0.0
+    return list(grouped.values())
+
+
+def collections_overview(academic_year=None):
+    """Dashboard context: overall totals, roll-ups and ageing from the snapshot.
+
+    Student counts in roll-ups add up per (program, semester, year), so a
+    student billed for several semesters counts once per semester.
+    """
+    snapshots = FeeCollectionSnapshot.objects.select_related('department', 'degree_program')
+    years = list(
+        FeeCollectionSnapshot.objects.order_by('-academic_year').values_list('academic_year', flat=True).distinct()
+    )
+    if academic_year:
+        snapshots = snapshots.filter(academic_year=academic_year)
+    snapshots = list(snapshots)
+
+    totals = _rollup(snapshots, key=lambda s: 'all', label=lambda s: 'All')
+    totals = totals[0] if totals else {'students': 0, 'receipts': 0, 'collection_rate': 0.0,
+                                       **{field: ZERO for field in AMOUNT_FIELDS}}
+    outstanding = totals['outstanding']
+    ageing = [
+        {'field': field, 'label': label, 'amount': totals[field],
+         'share': round(float(totals[field] * 100 / outstanding), 1) if outstanding else 0.0}
+        for field, label, _ in AGEING_BUCKETS
+    ]
+    by_department = _rollup(
+        sorted(snapshots, key=lambda s: s.department.name if s.department_id else '~'),
+        key=lambda s: s.department_id, label=lambda s: s.department.name if s.department_id else 'Unassigned',
+    )
+    by_program = _rollup(
+        sorted(snapshots, key=lambda s: s.degree_program.code if s.degree_program_id else '~'),
+        key=lambda s: s.degree_program_id,
+        label=lambda s: s.degree_program.code if s.degree_program_id else 'Unassigned',
+    )
+    by_semester = _rollup(sorted(snapshots, key=lambda s: s.semester), key=lambda s: s.semester,
+                          label=lambda s: f"Semester {s.semester}")
+    by_year = _rollup(sorted(snapshots, key=lambda s: s.academic_year, reverse=True),
+                      key=lambda s: s.academic_year, label=lambda s: s.academic_year)
+    return {
+        'totals': totals,
+        'ageing': ageing,
+        'by_department': by_department,
+        'by_program': by_program,
+        'by_semester': by_semester,
+        'by_year': by_year,
+        'breakdowns': [
+            ('By Department', by_department), ('By Program', by_program),
+            ('By Semester', by_semester), ('By Academic Year', by_year),
+        ],
+        'years': years,
+        'academic_year': academic_year or '',
+        'refreshed_at': min((s.refreshed_at for s in snapshots), default=None),
+    }
@@ -0,0 +1,207 @@
+"""
+Fee structure generation.
+
+The (student, semester) pairs that still need a FeeStructure are found with
+a single anti-join: students are crossed with a generated series of
+semesters and every pair that already has a row is dropped by NOT EXISTS,
+so the database does the set difference instead of one lookup per pair.
+The missing rows are inserted with ``bulk_create(ignore_conflicts=True)``
+in batches, which also makes a run
+racing another one harmless. Amounts can differ per degree program. The
+year's collections snapshot is rebuilt after rows are added.
+
+Fee adjustments (scholarships, surcharges) are one UPDATE over a queryset;
+the database derives ``outstanding`` from the new amount by trigger.
+"""
+import argparse
+import time
+from collections import Counter
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .fee_snapshot import refresh_fee_snapshot
+from .models import DegreeProgram, FeeStructure, Student
+
+FEE_BATCH_SIZE = 1000
+MAX_SEMESTER = 8
+
+
+def current_academic_year(today=None):
+    """``2025-26`` style academic year starting in ``today``'s calendar year."""
+    today = today or date.today()
+    return f"{today.year}-{str(today.year + 1)[-2:]}"
+
+
+def amount_argument(value):
+    """argparse ``type`` for money: ``Decimal`` or a clean usage error, never a traceback."""
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise argparse.ArgumentTypeError(f"invalid amount: '{value}'")
+    if not amount.is_finite():
+        raise argparse.ArgumentTypeError(f"invalid amount: '{value}'")
+    return amount
+
+
+def parse_program_amounts(specs):
+    """Parse ``["CE=60000", "IT=55000"]`` into ``{"CE": Decimal("60000"), ...}``."""
+    amounts = {}
+    for spec in specs or []:
+        code, _, amount = spec.partition('=')
+        try:
+            amount = Decimal(amount)
+        except InvalidOperation:
+            raise ValueError(f"Invalid program amount '{spec}', expected CODE=AMOUNT")
+        if not code or not amount.is_finite() or amount < 0:
+            raise ValueError(f"Invalid program amount '{spec}', expected CODE=AMOUNT")
+        amounts[code.upper()] = amount
+    known = {code.upper() for code in DegreeProgram.objects.values_list('code', flat=True)}
+    unknown = sorted(set(amounts) - known)
+    if unknown:
+        raise ValueError(f"Unknown degree program code(s): {', '.join(unknown)}")
+    return amounts
+
+
+def missing_fee_structures(academic_year, up_to_current=True, any_year=False, max_semester=MAX_SEMESTER):
+    """Yield ``(student_id, semester, program_code)`` for fee rows that do not exist yet.
+
+    Semesters run from 1 to the student's current semester, or to
+    ``max_semester`` when ``up_to_current`` is False. A pair counts as
+    existing if it has a row for ``academic_year``, or for any year when
+    ``any_year`` is set.
+    """
+    quote = connection.ops.quote_name
+    student = quote(Student._meta.db_table)
+    program = quote(DegreeProgram._meta.db_table)
+    fee = quote(FeeStructure._meta.db_table)
+    params = [max_semester]
+    conditions = []
+    if up_to_current:
+        conditions.append(f"semesters.n <= {student}.{quote('semester')}")
+    year_filter = ''
+    if not any_year:
+        year_filter = f"AND {fee}.{quote('academic_year')} = %s"
+        params.append(academic_year)
+    conditions.append(
+        f"NOT EXISTS (SELECT 1 FROM {fee} WHERE {fee}.{quote('student_id')} = {student}.{quote('id')} "
+        f"AND {fee}.{quote('semester')} = semesters.n {year_filter})"
+    )
+    sql = (
+        "WITH RECURSIVE semesters(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM semesters WHERE n < %s) "
+        f"SELECT {student}.{quote('id')}, semesters.n, {program}.{quote('code')} "
+        f"FROM {student} CROSS JOIN semesters "
+        f"LEFT JOIN {program} ON {program}.{quote('id')} = {student}.{quote('degree_program_id')} "
+        f"WHERE {' AND '.join(conditions)} "
+        f"ORDER BY {student}.{quote('id')}, semesters.n"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(FEE_BATCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+
+
+def generate_fee_structures(academic_year, amount, program_amounts=None, up_to_current=True, any_year=False,
+                            max_semester=MAX_SEMESTER, batch_size=FEE_BATCH_SIZE, dry_run=False):
+    """Create every missing FeeStructure of ``academic_year`` in bulk.
+
+    ``program_amounts`` maps degree program codes to their fee; everyone
+    else pays ``amount``. Returns ``{'rows': n, 'created': n, 'by_program':
+    Counter, 'by_semester': Counter, 'total_amount': Decimal}``; ``created``
+    is what the database accepted (0 on a dry run).
+    """
+    program_amounts = program_amounts or {}
+    summary = {
+        'rows': 0, 'created': 0, 'by_program': Counter(), 'by_semester': Counter(), 'total_amount': Decimal('0'),
+    }
+    before = 0 if dry_run else FeeStructure.objects.count()
+    pending = []
+    # Materialise the anti-join first: SQLite cannot insert while a cursor over the table is open
+    for student_id, semester, program_code in list(missing_fee_structures(
+        academic_year, up_to_current=up_to_current, any_year=any_year, max_semester=max_semester,
+    )):
+        fee = program_amounts.get((program_code or '').upper(), amount)
+        summary['rows'] += 1
+        summary['by_program'][program_code or '-'] += 1
+        summary['by_semester'][semester] += 1
+        summary['total_amount'] += fee
+        if dry_run:
+            continue
+        pending.append(FeeStructure(
+            student_id=student_id, semester=semester, academic_year=academic_year,
+            fees_to_be_collected=fee, outstanding=fee,
+        ))
+        if len(pending) >= batch_size:
+            FeeStructure.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True)
+            pending = []
+    if pending:
+        FeeStructure.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True)
+    if not dry_run:
+        summary['created'] = FeeStructure.objects.count() - before
+        if summary['created']:
+            refresh_fee_snapshot(academic_year)
+    return summary
+
+
+def run_generation_command(command, options, **generate_kwargs):
+    """Shared ``handle()`` of the fee generation commands.
+
+    Validates ``--amount`` and ``--program-amount``, runs
+    :func:`generate_fee_structures` with ``generate_kwargs`` and writes the
+    per-program and per-semester summary to the command's stdout.
+    """
+    started = time.monotonic()
+    try:
+        program_amounts = parse_program_amounts(options['program_amounts'])
+    except ValueError as exc:
+        raise CommandError(str(exc))
+    if options['amount'] < 0:
+        raise CommandError("--amount cannot be negative")
+
+    summary = generate_fee_structures(
+        options['academic_year'] or current_academic_year(), options['amount'], program_amounts,
+        batch_size=max(1, options['batch_size']), dry_run=options['dry_run'], **generate_kwargs,
+    )
+    if not summary['rows']:
+        command.stdout.write(command.style.WARNING("No missing fee structures; nothing to create."))
+        return summary
+
+    for code, count in sorted(summary['by_program'].items()):
+        command.stdout.write(f"{code}: {count} fee structures")
+    command.stdout.write("By semester: " + ", ".join(
+        f"Sem {semester}: {count}" for semester, count in sorted(summary['by_semester'].items())
+    ))
+
+    elapsed = time.monotonic() - started
+    if options['dry_run']:
+        message = f"{summary['rows']} fee structures (₹{summary['total_amount']:,.2f}) would be created"
+    else:
+        message = f"{summary['created']} fee structures (₹{summary['total_amount']:,.2f}) created"
+    command.stdout.write(command.style.SUCCESS(f"\n✓ {message} in {elapsed:.1f}s"))
+    return summary
+
+
+def adjust_fees(fee_structures, amount):
+    """Add ``amount`` (negative for a scholarship) to every structure's fee in one UPDATE.
+
+    A fee never drops below what has already been paid plus what has been
+    refunded (outstanding is fee - paid - refunded), so outstanding cannot
+    go negative. Returns the number of rows changed; the
+    affected years' collections snapshots are rebuilt.
+    """
+    years = list(fee_structures.order_by().values_list('academic_year', flat=True).distinct())
+    changed = fee_structures.update(
+        fees_to_be_collected=Greatest(F('fees_to_be_collected') + amount, F('paid') + F('refunded')),
+        updated_at=timezone.now(),
+    )
+    for academic_year in years:
+        refresh_fee_snapshot(academic_year)
+    return changed
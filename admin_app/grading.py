@@ -0,0 +1,222 @@
+"""
+Grading engine.
+
+Turns subject totals (0-100) into grades and grade points under each
+subject's GradingPolicy. A cohort is every result of one subject in one
+academic year; its totals are loaded as a NumPy array, the five band
+cut-offs (C up to A+) are computed from it in one shot (absolute floors,
+mean + k·σ or fixed percentiles), and every row is graded by comparing
+against its own subject's cut-offs, so a whole semester grades in a few
+vectorised passes. Regrading writes SubjectResult and SemesterResult back
+in bulk, then refreshes standings like a results recompute does.
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+
+from .models import ExamSchedule, GradingPolicy, SemesterResult, SubjectResult
+from .results import GRADE_BANDS, RESULTS_BATCH_SIZE, Cohort, _decimal, grade_totals
+
+# Highest first, like GradingPolicy.cutoffs: A+, A, B+, B, C
+DEFAULT_CUTOFFS = {
+    'absolute': [floor for _, floor, _ in GRADE_BANDS[:-1]],
+    'mean_sd': [1.5, 1.0, 0.5, 0.0, -0.5],
+    'percentile': [90, 75, 55, 35, 15],
+}
+ABSOLUTE_CUTS = np.array(DEFAULT_CUTOFFS['absolute'][::-1], dtype=float)
+
+
+def policy_cutoffs(policy, totals):
+    """Ascending cut-offs (C, B, B+, A, A+) for one cohort's ``totals`` array."""
+    if policy is None or not totals.size:
+        return ABSOLUTE_CUTS
+    values = np.array(policy.cutoffs or DEFAULT_CUTOFFS[policy.method], dtype=float)[::-1]
+    if policy.method == 'absolute':
+        cuts = values
+    elif totals.size < policy.min_cohort_size:
+        # Too few students for a stable distribution
+        cuts = ABSOLUTE_CUTS
+    elif policy.method == 'mean_sd':
+        cuts = totals.mean() + values * totals.std()
+    else:
+        cuts = np.percentile(totals, values)
+    # Passing needs the cohort cut-off and the absolute floor; bands never invert
+    cuts = np.clip(cuts, 0, 100)
+    cuts[0] = max(cuts[0], float(policy.pass_floor))
+    return np.maximum.accumulate(cuts)
+
+
+def policies_for_subjects(subject_ids, academic_year):
+    """``{subject_id: GradingPolicy}`` for subjects that have one.
+
+    Subject policies first; otherwise the policy of an ExamType the subject
+    is examined with in ``academic_year`` (lowest policy id if several).
+    """
+    subject_ids = list(subject_ids)
+    policies = {
+        policy.subject_id: policy
+        for policy in GradingPolicy.objects.filter(is_active=True, subject_id__in=subject_ids)
+    }
+    by_exam_type = {
+        policy.exam_type_id: policy
+        for policy in GradingPolicy.objects.filter(is_active=True, exam_type__isnull=False)
+    }
+    if by_exam_type:
+        exam_types = (
+            ExamSchedule.objects.filter(
+                subject_id__in=[subject_id for subject_id in subject_ids if subject_id not in policies],
+                academic_year=academic_year, exam_type_id__in=by_exam_type,
+            )
+            .exclude(status='cancelled')
+            .values_list('subject_id', 'exam_type_id')
+        )
+        candidates = defaultdict(list)
+        for subject_id, exam_type_id in exam_types:
+            candidates[subject_id].append(by_exam_type[exam_type_id])
+        for subject_id, found in candidates.items():
+            policies[subject_id] = min(found, key=lambda policy: policy.id)
+    return policies
+
+
+def grade_matrix(percent, sat, subject_ids, academic_year):
+    """Grade a (students × subjects) ``percent`` matrix column by column.
+
+    Only cells the student ``sat`` shape a subject's cut-offs. Returns
+    ``(grades, gpa)`` arrays shaped like ``percent``.
+    """
+    policies = policies_for_subjects(subject_ids, academic_year)
+    cuts = np.tile(ABSOLUTE_CUTS, (len(subject_ids), 1))
+    for j, subject_id in enumerate(subject_ids):
+        policy = policies.get(subject_id)
+        if policy is not None:
+            cuts[j] = policy_cutoffs(policy, percent[sat[:, j], j])
+    return grade_totals(percent, cuts)
+
+
+def _load_results(subject_results):
+    rows = list(subject_results.values_list(
+        'id', 'semester_result_id', 'subject_id', 'total_marks', 'subject__credits',
+        'semester_result__academic_year',
+    ))
+    if not rows:
+        return None
+    ids, semester_ids, subject_ids, totals, credits, years = zip(*rows)
+    return {
+        'ids': np.array(ids),
+        'semester_ids': np.array(semester_ids),
+        'subject_ids': np.array(subject_ids),
+        'totals': np.array([float(total) for total in totals]),
+        'credits': np.array(credits, dtype=float),
+        'years': np.array(years, dtype=object),
+    }
+
+
+def regrade_results(subject_results, batch_size=RESULTS_BATCH_SIZE, dry_run=False):
+    """Regrade existing SubjectResult rows of a queryset under current policies.
+
+    Each (subject, academic year) is graded as one cohort, so narrow the
+    queryset by cohort rather than by student. SGPA and pass/fail of the
+    affected semesters are recomputed from all their subject results.
+    Returns ``{grade: count}`` over the regraded rows.
+    """
+    data = _load_results(subject_results)
+    if data is None:
+        return {}
+
+    # One row per (subject, year) cohort, graded against that cohort's cuts
+    cohort_keys = np.array([f"{s}|{y}" for s, y in zip(data['subject_ids'], data['years'])], dtype=object)
+    keys, cohort_index = np.unique(cohort_keys, return_inverse=True)
+    cohort_cuts = np.empty((len(keys), len(ABSOLUTE_CUTS)))
+    policies_by_year = {}
+    for k, key in enumerate(keys):
+        subject_id, year = key.split('|', 1)
+        if year not in policies_by_year:
+            year_subjects = np.unique(data['subject_ids'][data['years'] == year])
+            policies_by_year[year] = policies_for_subjects(year_subjects.tolist(), year)
+        cohort_cuts[k] = policy_cutoffs(
+            policies_by_year[year].get(int(subject_id)), data['totals'][cohort_index == k],
+        )
+    grades, gpa = grade_totals(data['totals'], cohort_cuts[cohort_index])
+
+    labels, counts = np.unique(grades, return_counts=True)
+    distribution = {str(label): int(count) for label, count in zip(labels, counts)}
+    if dry_run:
+        return distribution
+
+    semester_ids = np.unique(data['semester_ids'])
+    with transaction.atomic():
+        # A grade fixes gpa and status, so one UPDATE per grade and id batch
+        for grade, _, point in GRADE_BANDS:
+            row_ids = data['ids'][grades == grade].tolist()
+            for start in range(0, len(row_ids), batch_size):
+                SubjectResult.objects.filter(id__in=row_ids[start:start + batch_size]).update(
+                    grade=grade, gpa=point, status='fail' if grade == 'F' else 'pass',
+                )
+        _refresh_semesters(semester_ids.tolist(), batch_size)
+    return distribution
+
+
+def _refresh_semesters(semester_ids, batch_size):
+    """Recompute SGPA and pass/fail for SemesterResults from their subject rows."""
+    rows = list(
+        SubjectResult.objects.filter(semester_result_id__in=semester_ids)
+        .values_list('semester_result_id', 'gpa', 'subject__credits', 'grade')
+    )
+    if not rows:
+        return
+    owners, points, credits, grades = zip(*rows)
+    index = np.searchsorted(semester_ids, owners)
+    credits = np.array(credits, dtype=float)
+    size = len(semester_ids)
+    weighted = np.bincount(index, weights=np.array([float(point) for point in points]) * credits, minlength=size)
+    credit_sum = np.bincount(index, weights=credits, minlength=size)
+    failed = np.bincount(index, weights=(np.array(grades) == 'F').astype(float), minlength=size) > 0
+    sgpa = np.divide(weighted, credit_sum, out=np.zeros(size), where=credit_sum > 0)
+
+    semesters = {
+        row[0]: row[1:]
+        for row in SemesterResult.objects.filter(id__in=semester_ids).values_list(
+            'id', 'status', 'student_id', 'student__degree_program__department_id', 'semester', 'academic_year',
+        )
+    }
+    SemesterResult.objects.bulk_update(
+        [
+            SemesterResult(
+                id=semester_id,
+                sgpa=_decimal(sgpa[i]),
+                # Incomplete stays incomplete until the missing marks arrive
+                status='incomplete' if semesters[semester_id][0] == 'incomplete'
+                else ('fail' if failed[i] else 'pass'),
+            )
+            for i, semester_id in enumerate(semester_ids)
+        ],
+        ['sgpa', 'status'],
+        batch_size=batch_size,
+    )
+
+    from .result_cache import invalidate_student_results
+    from .standings import refresh_standings
+    for cohort in {Cohort(*row[2:]) for row in semesters.values() if row[2] is not None}:
+        refresh_standings(*cohort, batch_size=batch_size)
+    student_ids = list(
+        SemesterResult.objects.filter(id__in=semester_ids, published=True).values_list('student_id', flat=True)
+    )
+    if student_ids:
+        transaction.on_commit(lambda: invalidate_student_results(student_ids))
+
+
+def regrade_for_policy(policy, academic_year=None, **kwargs):
+    """Regrade every result the policy governs (optionally one academic year)."""
+    results = SubjectResult.objects.all()
+    if academic_year:
+        results = results.filter(semester_result__academic_year=academic_year)
+    if policy.subject_id:
+        results = results.filter(subject_id=policy.subject_id)
+    else:
+        examined = ExamSchedule.objects.filter(exam_type_id=policy.exam_type_id).exclude(status='cancelled')
+        if academic_year:
+            examined = examined.filter(academic_year=academic_year)
+        results = results.filter(subject_id__in=examined.values('subject_id'))
+    return regrade_results(results, **kwargs)
+
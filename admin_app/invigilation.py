@@ -0,0 +1,124 @@
+"""
+Invigilator duty roster.
+
+Assigns an active Faculty member to every ExamSchedule with a heap-based
+greedy: exams are taken in (date, start) order, and for each one faculty
+are popped from a min-heap keyed on duty minutes so far until someone is
+eligible. Eligible means not teaching the exam's subject, no Timetable
+lecture of the exam's academic year overlapping the exam on that weekday,
+and no other duty at the same time, counting duties on exams outside the
+set being planned. Skipped faculty go straight back on the heap, so loads
+stay balanced and each exam costs O(k log f) for k rejections among f
+faculty.
+"""
+import heapq
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import ExamSchedule, Faculty, SubjectOffering, Timetable
+
+WEEKDAY_NAMES = [day for day, _ in Timetable.DAY_CHOICES]
+
+
+def _overlaps(intervals, start, end):
+    return any(other_start < end and start < other_end for other_start, other_end in intervals)
+
+
+def build_roster(exams, academic_year=None, reassign=False):
+    """Plan invigilators for ``exams``; returns ``(assignments, unassigned, loads)``.
+
+    ``assignments`` maps exam id to faculty id and ``loads`` maps faculty id
+    to total duty minutes. Exams that already have an invigilator keep it
+    (and count towards that person's load) unless ``reassign`` is set.
+    """
+    exam_rows = list(
+        exams.exclude(status='cancelled')
+        .order_by('exam_date', 'start_time', 'id')
+        .values_list('id', 'subject_id', 'academic_year', 'exam_date', 'start_time', 'end_time',
+                     'duration_minutes', 'invigilator_id')
+    )
+    faculty_ids = list(Faculty.objects.filter(status='active').values_list('id', flat=True))
+    if not exam_rows or not faculty_ids:
+        return {}, [row[0] for row in exam_rows], {}
+
+    # Teaching is read from the exams' own academic years only; old timetables do not count
+    exam_years = {row[2] for row in exam_rows}
+    teaching = defaultdict(list)  # (faculty_id, academic_year, weekday) -> [(start, end)]
+    for faculty_id, year, day, start, end in Timetable.objects.filter(
+        subject_offering__faculty_id__in=faculty_ids, subject_offering__academic_year__in=exam_years,
+    ).values_list('subject_offering__faculty_id', 'subject_offering__academic_year', 'day',
+                  'start_time', 'end_time'):
+        teaching[(faculty_id, year, day)].append((start, end))
+
+    offerings = SubjectOffering.objects.filter(faculty_id__in=faculty_ids, academic_year__in=exam_years)
+    if academic_year:
+        offerings = offerings.filter(academic_year=academic_year)
+    teaches = set(offerings.values_list('faculty_id', 'subject_id', 'academic_year'))
+
+    loads = dict.fromkeys(faculty_ids, 0)
+    duties = defaultdict(list)  # (faculty_id, date) -> [(start, end)]
+    # Duties already held on these dates in exams outside the selection still block their slot
+    for faculty_id, exam_date, start, end in (
+        ExamSchedule.objects.filter(exam_date__in={row[3] for row in exam_rows}, invigilator_id__isnull=False)
+        .exclude(status='cancelled')
+        .exclude(id__in=exams.values('id'))
+        .values_list('invigilator_id', 'exam_date', 'start_time', 'end_time')
+    ):
+        duties[(faculty_id, exam_date)].append((start, end))
+
+    assignments, unassigned, pending = {}, [], []
+    for row in exam_rows:
+        exam_id, _, _, exam_date, start, end, minutes, current = row
+        if current in loads and not reassign:
+            loads[current] += minutes
+            duties[(current, exam_date)].append((start, end))
+            assignments[exam_id] = current
+        else:
+            pending.append(row)
+
+    heap = [(minutes, faculty_id) for faculty_id, minutes in loads.items()]
+    heapq.heapify(heap)
+    for exam_id, subject_id, year, exam_date, start, end, minutes, _ in pending:
+        weekday = WEEKDAY_NAMES[exam_date.weekday()] if exam_date.weekday() < len(WEEKDAY_NAMES) else None
+        skipped, chosen = [], None
+        while heap:
+            load, faculty_id = heapq.heappop(heap)
+            if (
+                (faculty_id, subject_id, year) in teaches
+                or _overlaps(teaching.get((faculty_id, year, weekday), ()), start, end)
+                or _overlaps(duties.get((faculty_id, exam_date), ()), start, end)
+            ):
+                skipped.append((load, faculty_id))
+                continue
+            chosen = faculty_id
+            break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        if chosen is None:
+            unassigned.append(exam_id)
+            continue
+        assignments[exam_id] = chosen
+        loads[chosen] += minutes
+        duties[(chosen, exam_date)].append((start, end))
+        heapq.heappush(heap, (loads[chosen], chosen))
+    return assignments, unassigned, loads
+
+
+def save_roster(assignments, batch_size=1000):
+    """Write ``{exam_id: faculty_id}`` to ExamSchedule.invigilator in one bulk_update."""
+    with transaction.atomic():
+        ExamSchedule.objects.bulk_update(
+            [ExamSchedule(id=exam_id, invigilator_id=faculty_id) for exam_id, faculty_id in assignments.items()],
+            ['invigilator'],
+            batch_size=batch_size,
+        )
+    return len(assignments)
+
+
+def assign_invigilators(exams, academic_year=None, reassign=False, dry_run=False):
+    """Plan and (unless ``dry_run``) save the roster; returns ``build_roster``'s result."""
+    assignments, unassigned, loads = build_roster(exams, academic_year=academic_year, reassign=reassign)
+    if not dry_run and assignments:
+        save_roster(assignments)
+    return assignments, unassigned, loads
@@ -0,0 +1,111 @@
+"""
+Lecture materialization.
+
+Expands every weekly Timetable slot across an AcademicCalendar teaching range
+into concrete Lecture rows up front, so attendance pages only ever read
+lectures instead of creating them per slot on page view. Materialized
+lectures start with ``is_conducted=False`` and are flipped once attendance
+is taken, which keeps future sessions out of the attendance counters.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from .models import AcademicCalendar, Holiday, Lecture, Timetable
+
+WEEKDAY_INDEX = {day: index for index, (day, _) in enumerate(Timetable.DAY_CHOICES)}
+
+
+def teaching_dates(start_date, end_date):
+    """Map weekday name -> teaching dates in [start_date, end_date], holidays removed."""
+    holidays = set(
+        Holiday.objects.filter(date__range=(start_date, end_date)).values_list('date', flat=True)
+    )
+    dates_by_day = defaultdict(list)
+    day_names = {index: day for day, index in WEEKDAY_INDEX.items()}
+    current = start_date
+    while current <= end_date:
+        day = day_names.get(current.weekday())
+        if day and current not in holidays:
+            dates_by_day[day].append(current)
+        current += timedelta(days=1)
+    return dates_by_day
+
+
+def materialize_lectures(start_date, end_date, academic_year=None, offering_ids=None,
+                         batch_size=2000, dry_run=False):
+    """Create the Lecture rows for every Timetable slot between two dates.
+
+    Idempotent: rows are inserted with ``bulk_create(ignore_conflicts=True)``
+    against the (subject_offering, date, start_time, lecture_type) key, so
+    re-running only fills gaps. Returns ``(planned, created)``.
+    """
+    dates_by_day = teaching_dates(start_date, end_date)
+
+    slots = Timetable.objects.all()
+    if academic_year:
+        slots = slots.filter(subject_offering__academic_year=academic_year)
+    if offering_ids is not None:
+        slots = slots.filter(subject_offering_id__in=offering_ids)
+    slots = slots.values_list(
+        'subject_offering_id', 'subject_offering__faculty_id', 'day',
+        'start_time', 'end_time', 'lecture_type', 'room_number',
+    )
+
+    lectures_in_range = Lecture.objects.filter(date__range=(start_date, end_date))
+    before = 0 if dry_run else lectures_in_range.count()
+
+    planned = 0
+    batch = []
+    for offering_id, faculty_id, day, start_time, end_time, lecture_type, room_number in slots.iterator():
+        for lecture_date in dates_by_day.get(day, []):
+            planned += 1
+            if dry_run:
+                continue
+            batch.append(Lecture(
+                subject_offering_id=offering_id,
+                faculty_id=faculty_id,
+                date=lecture_date,
+                start_time=start_time,
+                end_time=end_time,
+                lecture_type=lecture_type,
+                room_number=room_number,
+                is_conducted=False,
+            ))
+            if len(batch) >= batch_size:
+                Lecture.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+    if batch:
+        Lecture.objects.bulk_create(batch, ignore_conflicts=True)
+
+    created = 0 if dry_run else lectures_in_range.count() - before
+    return planned, created
+
+
+def non_teaching_reason(day):
+    """Why no lectures can exist on ``day``, or None when it is a teaching day."""
+    holiday = Holiday.objects.filter(date=day).first()
+    if holiday:
+        return f"{day:%d %b %Y} is a holiday ({holiday.name})."
+    if day.weekday() not in WEEKDAY_INDEX.values():
+        return f"{day:%d %b %Y} is not a timetabled weekday."
+    calendars = AcademicCalendar.objects.filter(start_date__lte=day, end_date__gte=day)
+    if not any(day <= calendar.get_teaching_end_date() for calendar in calendars):
+        return f"{day:%d %b %Y} is outside the teaching calendar."
+    return None
+
+
+def materialize_calendar(calendar, **kwargs):
+    """Materialize one AcademicCalendar's teaching range (up to exams)."""
+    return materialize_lectures(
+        calendar.start_date,
+        calendar.get_teaching_end_date(),
+        academic_year=calendar.academic_year,
+        **kwargs,
+    )
+
+
+def materialize_all_calendars(academic_year=None, **kwargs):
+    calendars = AcademicCalendar.objects.all()
+    if academic_year:
+        calendars = calendars.filter(academic_year=academic_year)
+    return {calendar: materialize_calendar(calendar, **kwargs) for calendar in calendars}
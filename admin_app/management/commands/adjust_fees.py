@@ -0,0 +1,61 @@
+"""
+Add an amount to (or, with a negative amount, waive part of) the fee of
+every matching fee structure in a single UPDATE, e.g. a scholarship for a
+whole program. Outstanding balances follow in the database.
+Usage:  python manage.py adjust_fees --amount -5000 [--academic-year 2025-26] [--semester N] [--program CODE] [--roll ROLL ...] [--dry-run]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+
+from admin_app.fees import adjust_fees, amount_argument
+from admin_app.models import DegreeProgram, FeeStructure
+
+
+class Command(BaseCommand):
+    help = "Apply a fee adjustment or scholarship to many fee structures at once"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--amount', type=amount_argument, required=True,
+                            help='Amount added to each fee; negative for a scholarship or waiver')
+        parser.add_argument('--academic-year', help='Only this academic year, e.g. 2025-26')
+        parser.add_argument('--semester', type=int, help='Only this semester')
+        parser.add_argument('--program', help='Only students of this degree program code')
+        parser.add_argument('--roll', action='append', dest='rolls', help='Only this roll number (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if not options['amount']:
+            raise CommandError("--amount must not be zero")
+
+        structures = FeeStructure.objects.all()
+        if options['academic_year']:
+            structures = structures.filter(academic_year=options['academic_year'])
+        if options['semester']:
+            structures = structures.filter(semester=options['semester'])
+        if options['program']:
+            if not DegreeProgram.objects.filter(code__iexact=options['program']).exists():
+                raise CommandError(f"Unknown degree program code: {options['program']}")
+            structures = structures.filter(student__degree_program__code__iexact=options['program'])
+        if options['rolls']:
+            structures = structures.filter(student__roll_number__in=options['rolls'])
+
+        before = structures.aggregate(rows=Count('id'), outstanding=Sum('outstanding'))
+        if not before['rows']:
+            self.stdout.write(self.style.WARNING("No fee structures match."))
+            return
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"\n✓ {before['rows']} fee structures would change by ₹{options['amount']:,.2f} each "
+                f"(outstanding now ₹{before['outstanding']:,.2f})"
+            ))
+            return
+
+        changed = adjust_fees(structures, options['amount'])
+        after = structures.aggregate(outstanding=Sum('outstanding'))
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✓ {changed} fee structures adjusted by ₹{options['amount']:,.2f}; outstanding "
+            f"₹{before['outstanding']:,.2f} → ₹{after['outstanding']:,.2f} in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,59 @@
+"""
+Compute SubjectResult and SemesterResult rows from exam and internal marks.
+Without filters every cohort (department × semester × academic year) that
+has exams is recomputed. Safe to re-run: rows are upserted, ``published`` is kept.
+Usage:  python manage.py compute_results [--department CODE] [--semester N] [--academic-year 2025-26] [--dry-run]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_app.models import Department
+from admin_app.results import RESULTS_BATCH_SIZE, all_cohorts, compute_results
+
+
+class Command(BaseCommand):
+    help = "Compute grades, GPA and SGPA for whole cohorts from exam marks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', help='Department code, e.g. FoT')
+        parser.add_argument('--semester', type=int, help='Only this semester')
+        parser.add_argument('--academic-year', help='Only this academic year, e.g. 2025-26')
+        parser.add_argument('--batch-size', type=int, default=RESULTS_BATCH_SIZE,
+                            help=f'Rows per INSERT (default: {RESULTS_BATCH_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Compute but do not write results')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        department_id = None
+        if options['department']:
+            department_id = (
+                Department.objects.filter(code__iexact=options['department']).values_list('id', flat=True).first()
+            )
+            if department_id is None:
+                raise CommandError(f"Unknown department code: {options['department']}")
+
+        cohorts = all_cohorts(department_id, options['semester'], options['academic_year'])
+        if not cohorts:
+            self.stdout.write(self.style.WARNING("No exams found for the given cohort."))
+            return
+
+        departments = dict(Department.objects.values_list('id', 'code'))
+        results = compute_results(cohorts, batch_size=max(1, options['batch_size']), dry_run=options['dry_run'])
+
+        total_students = total_subjects = 0
+        for cohort, (students, subject_results) in sorted(results.items()):
+            total_students += students
+            total_subjects += subject_results
+            self.stdout.write(
+                f"{departments.get(cohort.department_id, '-')} Sem {cohort.semester} {cohort.academic_year}: "
+                f"{students} students, {subject_results} subject results"
+            )
+
+        elapsed = time.monotonic() - started
+        verb = "would be computed" if options['dry_run'] else "computed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\n✓ {total_subjects} subject results for {total_students} students {verb} in {elapsed:.1f}s"
+            )
+        )
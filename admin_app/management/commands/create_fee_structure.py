@@ -1,63 +1,28 @@
-from django.core.management.base import BaseCommand
-from admin_app.models import Student, FeeStructure
+"""
+Create a sample fee structure for semesters 1-8 of every student. A
+semester that already has a fee structure in any academic year is skipped.
+Missing rows are found with one query and inserted in bulk.
+Usage:  python manage.py create_fee_structure [--amount 5] [--program-amount CE=60000] [--academic-year 2025-26] [--dry-run]
+"""
 from decimal import Decimal
-from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from admin_app.fees import FEE_BATCH_SIZE, amount_argument, run_generation_command
+
 
 class Command(BaseCommand):
     help = 'Create sample fee structure for all students'
 
     def add_arguments(self, parser):
-        parser.add_argument(
-            '--amount',
-            type=float,
-            default=5,
-            help='Fee amount per semester (default: 5)'
-        )
+        parser.add_argument('--amount', type=amount_argument, default=Decimal('5'),
+                            help='Fee amount per semester (default: 5)')
+        parser.add_argument('--program-amount', action='append', dest='program_amounts', default=[],
+                            help='Fee for one degree program as CODE=AMOUNT (repeatable)')
+        parser.add_argument('--academic-year', help='Academic year, e.g. 2025-26 (default: current)')
+        parser.add_argument('--batch-size', type=int, default=FEE_BATCH_SIZE,
+                            help=f'Rows per INSERT (default: {FEE_BATCH_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be created')
 
     def handle(self, *args, **options):
-        amount = Decimal(str(options['amount']))
-        today = date.today()
-        academic_year = f"{today.year}-{str(today.year + 1)[-2:]}"
-        
-        students = Student.objects.all()
-        
-        if not students.exists():
-            self.stdout.write(self.style.ERROR('No students found. Please add students first.'))
-            return
-        
-        created_count = 0
-        skipped_count = 0
-        
-        for student in students:
-            self.stdout.write(f'\nProcessing student: {student.user.username} - {student.name}')
-            
-            for semester in range(1, 9):
-                # Check if fee structure already exists
-                existing = FeeStructure.objects.filter(
-                    student=student,
-                    semester=semester
-                ).exists()
-                
-                if existing:
-                    self.stdout.write(f'  Semester {semester}: Already exists (skipped)')
-                    skipped_count += 1
-                    continue
-                
-                # Create fee structure
-                FeeStructure.objects.create(
-                    student=student,
-                    semester=semester,
-                    academic_year=academic_year,
-                    fees_to_be_collected=amount,
-                    refunded=0,
-                    previously_paid=0,
-                    paid=0,
-                    outstanding=amount
-                )
-                
-                self.stdout.write(self.style.SUCCESS(f'  Semester {semester}: Created (₹{amount})'))
-                created_count += 1
-        
-        self.stdout.write(self.style.SUCCESS(f'\n✓ Successfully created {created_count} fee structures'))
-        if skipped_count > 0:
-            self.stdout.write(self.style.WARNING(f'⚠ Skipped {skipped_count} existing records'))
+        run_generation_command(self, options, up_to_current=False, any_year=True)
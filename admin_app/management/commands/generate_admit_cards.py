@@ -0,0 +1,63 @@
+"""
+Issue admit cards for exam schedules and render them as ZIPs of PDFs, one per
+academic year, department, semester and division. Safe to re-run: existing
+cards keep their admit and seat numbers.
+Usage:  python manage.py generate_admit_cards [--academic-year 2025-26] [--exam ID ...] [--workers N] [--issue-only]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from admin_app.admit_cards import (
+    ADMIT_CARD_DIR, RENDER_CHUNK_SIZE, issue_admit_cards, render_admit_cards,
+)
+from admin_app.models import ExamSchedule
+
+
+class Command(BaseCommand):
+    help = "Allocate admit cards for every exam roster and render them to PDF archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help='Only exams of this academic year, e.g. 2025-26')
+        parser.add_argument('--exam', type=int, action='append', dest='exams',
+                            help='Only this ExamSchedule id (repeatable)')
+        parser.add_argument('--output', default=ADMIT_CARD_DIR, help=f'Archive directory (default: {ADMIT_CARD_DIR})')
+        parser.add_argument('--workers', type=int, help='Render processes (default: CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=RENDER_CHUNK_SIZE,
+                            help=f'Cards per render task (default: {RENDER_CHUNK_SIZE})')
+        parser.add_argument('--issue-only', action='store_true', help='Allocate admit numbers without rendering')
+
+    def handle(self, *args, **options):
+        exams = ExamSchedule.objects.exclude(status='cancelled')
+        if options['academic_year']:
+            exams = exams.filter(academic_year=options['academic_year'])
+        if options['exams']:
+            exams = exams.filter(id__in=options['exams'])
+        if not exams.exists():
+            self.stdout.write(self.style.WARNING("No exam schedules found."))
+            return
+
+        started = time.monotonic()
+        issued = issue_admit_cards(exams)
+        total_roster = sum(roster for roster, _ in issued.values())
+        total_created = sum(created for _, created in issued.values())
+        self.stdout.write(
+            f"{len(issued)} exams: {total_roster} candidates, {total_created} new admit cards "
+            f"({time.monotonic() - started:.1f}s)"
+        )
+        if options['issue_only']:
+            return
+
+        started = time.monotonic()
+        archives = render_admit_cards(
+            exams, output_dir=options['output'], workers=options['workers'],
+            chunk_size=max(1, options['chunk_size']),
+        )
+        for (academic_year, department, semester, division), (path, count) in sorted(archives.items()):
+            self.stdout.write(
+                f"{academic_year} {department} sem {semester} division {division}: {count} cards -> {path}"
+            )
+        rendered = sum(count for _, count in archives.values())
+        self.stdout.write(
+            self.style.SUCCESS(f"\n✓ Rendered {rendered} admit cards in {time.monotonic() - started:.1f}s")
+        )
@@ -0,0 +1,56 @@
+"""
+Create Lecture rows for every Timetable slot across the AcademicCalendar
+teaching range, skipping holidays. Safe to re-run: existing lectures are kept.
+Usage:  python manage.py materialize_lectures [--academic-year 2025-26] [--dry-run]
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_app.lectures import materialize_all_calendars, materialize_lectures
+
+
+class Command(BaseCommand):
+    help = "Expand timetable slots into dated Lecture rows for each academic calendar"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help='Only this academic year, e.g. 2025-26')
+        parser.add_argument('--from', dest='start', help='Override start date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', help='Override end date (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT (default: 2000)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the lectures that would be planned')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        kwargs = {'batch_size': options['batch_size'], 'dry_run': options['dry_run']}
+
+        if options['start'] or options['end']:
+            if not (options['start'] and options['end']):
+                raise CommandError("--from and --to must be given together")
+            try:
+                start, end = date.fromisoformat(options['start']), date.fromisoformat(options['end'])
+            except ValueError as exc:
+                raise CommandError(f"Invalid date: {exc}")
+            results = {
+                f"{start} → {end}": materialize_lectures(
+                    start, end, academic_year=options['academic_year'], **kwargs
+                )
+            }
+        else:
+            results = materialize_all_calendars(academic_year=options['academic_year'], **kwargs)
+            if not results:
+                self.stdout.write(self.style.WARNING("No academic calendar found."))
+                return
+
+        total_planned = total_created = 0
+        for label, (planned, created) in results.items():
+            total_planned += planned
+            total_created += created
+            self.stdout.write(f"{label}: {planned} planned, {created} created")
+
+        elapsed = time.monotonic() - started
+        verb = "would be planned" if options['dry_run'] else f"planned, {total_created} new"
+        self.stdout.write(
+            self.style.SUCCESS(f"\n✓ {total_planned} lectures {verb} in {elapsed:.1f}s")
+        )
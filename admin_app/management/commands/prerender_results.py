@@ -0,0 +1,41 @@
+"""
+Warm the PDF cache with every result sheet of a semester, typically right
+after publishing, so result-day downloads stream stored files instead of
+running reportlab. Safe to re-run: PDFs already cached are skipped.
+Usage:  python manage.py prerender_results --semester 5 [--academic-year 2025-26] [--include-unpublished] [--workers N]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from admin_app.documents import PDF_CACHE_DIR, PRERENDER_CHUNK_SIZE, prerender_semester
+
+
+class Command(BaseCommand):
+    help = "Pre-render semester result PDFs into the download cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', type=int, required=True, help='Semester number')
+        parser.add_argument('--academic-year', help='Only results of this academic year, e.g. 2025-26')
+        parser.add_argument('--include-unpublished', action='store_true',
+                            help='Also render results that are not published yet')
+        parser.add_argument('--workers', type=int, help='Render processes (default: CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=PRERENDER_CHUNK_SIZE,
+                            help=f'Results per render task (default: {PRERENDER_CHUNK_SIZE})')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rendered, cached = prerender_semester(
+            options['semester'],
+            academic_year=options['academic_year'],
+            published_only=not options['include_unpublished'],
+            workers=options['workers'],
+            chunk_size=max(1, options['chunk_size']),
+        )
+        if not rendered and not cached:
+            self.stdout.write(self.style.WARNING("No results with subject rows found."))
+            return
+        self.stdout.write(f"{cached} result PDF(s) already cached in {PDF_CACHE_DIR}")
+        self.stdout.write(
+            self.style.SUCCESS(f"\n✓ Rendered {rendered} result PDF(s) in {time.monotonic() - started:.1f}s")
+        )
@@ -0,0 +1,48 @@
+"""
+Rebuild the AttendanceSummary read model from Lecture and Attendance rows.
+Usage:  python manage.py rebuild_attendance_summary [--offering ID ...] [--batch-size N]
+"""
+from django.core.management.base import BaseCommand
+
+from admin_app.attendance import refresh_attendance_summaries
+from admin_app.models import SubjectOffering
+
+
+class Command(BaseCommand):
+    help = "Recompute attendance counters for every (or the given) subject offering"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--offering',
+            type=int,
+            action='append',
+            dest='offerings',
+            help='Only rebuild this SubjectOffering id (repeatable)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Offerings refreshed per batch (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        offering_ids = SubjectOffering.objects.order_by('id').values_list('id', flat=True)
+        if options['offerings']:
+            offering_ids = offering_ids.filter(id__in=options['offerings'])
+        offering_ids = list(offering_ids)
+
+        if not offering_ids:
+            self.stdout.write(self.style.WARNING("No subject offerings found."))
+            return
+
+        batch_size = max(1, options['batch_size'])
+        total_rows = 0
+        for start in range(0, len(offering_ids), batch_size):
+            total_rows += refresh_attendance_summaries(offering_ids[start:start + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Rebuilt {total_rows} attendance summary rows for {len(offering_ids)} offerings."
+            )
+        )
@@ -0,0 +1,62 @@
+"""
+Reconcile a bank or payment-gateway statement CSV against fee receipts.
+Matching lines (same transaction id and amount) mark their receipt
+reconciled; mismatches, duplicates and unknown transactions are reported
+and can be written to a CSV for follow-up.
+Usage:  python manage.py reconcile_statement STATEMENT.csv [--report problems.csv] [--batch-size N] [--dry-run]
+"""
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_app.reconciliation import PROBLEM_KINDS, RECONCILE_BATCH_SIZE, REPORT_LIMIT, reconcile_statement
+
+
+class Command(BaseCommand):
+    help = "Match statement lines to FeeReceipt.transaction_id and mark matched receipts reconciled"
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='Statement CSV with transaction_id and amount columns')
+        parser.add_argument('--report', help='Write problem lines to this CSV')
+        parser.add_argument('--batch-size', type=int, default=RECONCILE_BATCH_SIZE,
+                            help=f'Receipts marked per UPDATE (default: {RECONCILE_BATCH_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Match and report without marking receipts')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options['statement'], 'rb') as handle:
+                report = reconcile_statement(handle, batch_size=max(1, options['batch_size']),
+                                             dry_run=options['dry_run'])
+        except OSError as exc:
+            raise CommandError(f"Cannot read statement: {exc}")
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for kind in PROBLEM_KINDS:
+            count = report['counts'][kind]
+            if count:
+                self.stdout.write(self.style.WARNING(f"{kind.replace('_', ' ').capitalize()}: {count} lines"))
+        for item in report['problems'][:20]:
+            self.stdout.write(f"  line {item['line']}: {item['transaction_id'] or '-'} {item['amount']} — {item['detail']}")
+        if len(report['problems']) > 20:
+            self.stdout.write(f"  … {len(report['problems']) - 20} more")
+
+        if options['report'] and report['problems']:
+            with open(options['report'], 'w', newline='') as out:
+                writer = csv.writer(out)
+                writer.writerow(['Line', 'Transaction ID', 'Amount', 'Problem', 'Detail'])
+                for item in report['problems']:
+                    writer.writerow([item['line'], item['transaction_id'], item['amount'], item['kind'], item['detail']])
+            capped = any(count > REPORT_LIMIT for count in report['counts'].values())
+            note = f" (first {REPORT_LIMIT} per kind)" if capped else ""
+            self.stdout.write(f"Problem lines written to {options['report']}{note}")
+
+        verb = "would be reconciled" if options['dry_run'] else "reconciled"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\n✓ {report['matched']} of {report['lines']} lines {verb} (₹{report['matched_amount']:,.2f}); "
+                f"{report['unmatched_receipts']} receipts still open; {time.monotonic() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,57 @@
+"""
+Regrade existing SubjectResult rows under the current GradingPolicy setup
+(absolute bands, mean ± k·σ or fixed percentiles per Subject / ExamType),
+then recompute SGPA, pass/fail and standings of the affected semesters.
+Each subject is graded over all its results in an academic year.
+Usage:  python manage.py regrade_results [--academic-year 2025-26] [--semester N] [--department CODE] [--subject CODE ...] [--dry-run]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_app.grading import regrade_results
+from admin_app.models import Department, SubjectResult
+from admin_app.results import GRADE_BANDS, RESULTS_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Reassign grades and GPA in bulk under absolute or relative grading policies"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help='Only this academic year, e.g. 2025-26')
+        parser.add_argument('--semester', type=int, help='Only subjects of this semester')
+        parser.add_argument('--department', help='Department code, e.g. FoT')
+        parser.add_argument('--subject', action='append', dest='subjects', help='Subject code (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=RESULTS_BATCH_SIZE,
+                            help=f'Rows per UPDATE (default: {RESULTS_BATCH_SIZE})')
+        parser.add_argument('--dry-run', action='store_true', help='Show the grade distribution without writing')
+
+    def handle(self, *args, **options):
+        results = SubjectResult.objects.all()
+        if options['academic_year']:
+            results = results.filter(semester_result__academic_year=options['academic_year'])
+        if options['semester']:
+            results = results.filter(subject__semester=options['semester'])
+        if options['department']:
+            if not Department.objects.filter(code__iexact=options['department']).exists():
+                raise CommandError(f"Unknown department code: {options['department']}")
+            results = results.filter(subject__department__code__iexact=options['department'])
+        if options['subjects']:
+            results = results.filter(subject__code__in=options['subjects'])
+
+        started = time.monotonic()
+        distribution = regrade_results(
+            results, batch_size=max(1, options['batch_size']), dry_run=options['dry_run'],
+        )
+        if not distribution:
+            self.stdout.write(self.style.WARNING("No subject results found."))
+            return
+
+        total = sum(distribution.values())
+        for grade, _, _ in GRADE_BANDS:
+            count = distribution.get(grade, 0)
+            self.stdout.write(f"{grade:>2}: {count:>7} ({count * 100 / total:5.1f}%)")
+        verb = "would be regraded" if options['dry_run'] else "regraded"
+        self.stdout.write(
+            self.style.SUCCESS(f"\n✓ {total} subject results {verb} in {time.monotonic() - started:.1f}s")
+        )
@@ -0,0 +1,69 @@
+"""
+Auto-schedule one exam type for every enrolled subject of an academic year
+inside the AcademicCalendar exam window, so no student sits two papers in
+one slot. Existing exams of that type are moved to their new slot.
+Usage:  python manage.py schedule_exams --academic-year 2025-26 --exam-type External [--capacity 600] [--session 09:30-12:30 ...] [--dry-run]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_app.exam_scheduler import DEFAULT_SESSIONS, parse_sessions, schedule_exams
+from admin_app.models import AcademicCalendar, ExamType, Subject
+
+
+class Command(BaseCommand):
+    help = "Colour the subject conflict graph into exam slots and write ExamSchedule rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', required=True, help='Academic year, e.g. 2025-26')
+        parser.add_argument('--exam-type', required=True, help='ExamType name, e.g. External')
+        parser.add_argument('--session', action='append', dest='sessions',
+                            help='Daily session as HH:MM-HH:MM (repeatable, default: 09:30-12:30 and 14:00-17:00)')
+        parser.add_argument('--capacity', type=int, help='Seats available per slot across all rooms')
+        parser.add_argument('--semester', type=int, action='append', dest='semesters',
+                            help='Only subjects of this semester (repeatable)')
+        parser.add_argument('--max-marks', type=int, default=100, help='Max marks for newly created exams')
+        parser.add_argument('--passing-marks', type=int, default=40, help='Passing marks for newly created exams')
+        parser.add_argument('--dry-run', action='store_true', help='Print the plan without writing exams')
+
+    def handle(self, *args, **options):
+        calendar = AcademicCalendar.objects.filter(academic_year=options['academic_year']).first()
+        if calendar is None:
+            raise CommandError(f"No academic calendar for {options['academic_year']}")
+        exam_type = ExamType.objects.filter(name__iexact=options['exam_type']).first()
+        if exam_type is None:
+            raise CommandError(f"Unknown exam type: {options['exam_type']}")
+        try:
+            sessions = parse_sessions(options['sessions']) if options['sessions'] else DEFAULT_SESSIONS
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        subject_ids = None
+        if options['semesters']:
+            subject_ids = set(Subject.objects.filter(semester__in=options['semesters']).values_list('id', flat=True))
+
+        started = time.monotonic()
+        exams, unscheduled, slot_count = schedule_exams(
+            calendar, exam_type, sessions=sessions, capacity=options['capacity'], subject_ids=subject_ids,
+            max_marks=options['max_marks'], passing_marks=options['passing_marks'], dry_run=options['dry_run'],
+        )
+        if not slot_count:
+            raise CommandError(
+                f"No exam days between {calendar.exam_start_date} and {calendar.exam_end_date}"
+            )
+
+        used = {(exam.exam_date, exam.start_time) for exam in exams}
+        codes = dict(Subject.objects.filter(id__in=[exam.subject_id for exam in exams]).values_list('id', 'code'))
+        for exam in exams:
+            self.stdout.write(f"{exam.exam_date} {exam.start_time:%H:%M}-{exam.end_time:%H:%M}  {codes.get(exam.subject_id)}")
+        if unscheduled:
+            names = ', '.join(Subject.objects.filter(id__in=unscheduled).values_list('code', flat=True))
+            self.stdout.write(self.style.WARNING(
+                f"\n{len(unscheduled)} subject(s) did not fit the window or capacity: {names}"
+            ))
+
+        verb = "planned" if options['dry_run'] else "scheduled"
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✓ {len(exams)} {exam_type.name} exams {verb} in {len(used)} of {slot_count} slots "
+            f"({time.monotonic() - started:.1f}s)"
+        ))
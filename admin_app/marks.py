@@ -0,0 +1,206 @@
+"""
+Exam marks entry.
+
+Builds the roster for an ExamSchedule with existing marks LEFT JOINed in, so
+viewing an exam never writes rows, and saves marks as validated upserts in a
+single transaction. Invalid rows are collected into a per-row error report
+instead of aborting the whole save.
+
+Bulk imports stream a CSV or XLSX of ``roll_number, marks`` rows through the
+same validation and upsert in batches, so file size does not drive memory.
+"""
+import csv
+import io
+import zipfile
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import FilteredRelation, Q
+from django.utils import timezone
+
+from .marks_analytics import invalidate_exam_analytics
+from .models import ExamMarks, Student
+from .result_cache import invalidate_student_results
+
+# Optional import for .xlsx uploads
+try:
+    import openpyxl  # type: ignore
+    from openpyxl.utils.exceptions import InvalidFileException  # type: ignore
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+    openpyxl = None
+    InvalidFileException = None
+
+MARKS_BATCH_SIZE = 1000
+HEADER_ROLL_NAMES = {'roll_number', 'roll number', 'roll_no', 'roll no', 'roll'}
+
+
+def exam_roster(exam, division=None, degree_program=None):
+    """Students who sit ``exam``: enrolled in the subject, else the semester cohort."""
+    semester = exam.subject.semester
+    students = Student.objects.filter(
+        enrollments__subject_offering__subject=exam.subject, semester=semester,
+    )
+    if not students.exists():
+        # Fallback: active students in the same semester, preferring the
+        # subject's department when that yields anyone
+        students = Student.objects.filter(semester=semester, status='active')
+        subj_dept = exam.subject.department_id
+        if subj_dept and students.filter(degree_program__department_id=subj_dept).exists():
+            students = students.filter(degree_program__department_id=subj_dept)
+    if division:
+        students = students.filter(division=division)
+    if degree_program:
+        students = students.filter(degree_program_id=degree_program)
+    return students.distinct()
+
+
+def roster_with_marks(exam, division=None, degree_program=None):
+    """One row per roster student with the exam's marks (or None) joined in."""
+    return (
+        exam_roster(exam, division, degree_program)
+        .annotate(exam_mark=FilteredRelation('exam_marks', condition=Q(exam_marks__exam_schedule=exam)))
+        .order_by('roll_number')
+        .values(
+            'id', 'name', 'roll_number', 'user__username',
+            'exam_mark__marks_obtained', 'exam_mark__is_marked',
+        )
+    )
+
+
+def parse_marks(raw, max_marks):
+    """Parse one marks cell into a Decimal in [0, max_marks]; raises ValueError."""
+    try:
+        value = Decimal(str(raw).strip())
+    except InvalidOperation:
+        raise ValueError(f"'{raw}' is not a number")
+    if not value.is_finite():
+        raise ValueError(f"'{raw}' is not a number")
+    if value < 0 or value > max_marks:
+        raise ValueError(f"Marks must be between 0 and {max_marks}")
+    return value.quantize(Decimal('0.01'))
+
+
+def upsert_exam_marks(exam, marks_by_student, marked_by=None, batch_size=MARKS_BATCH_SIZE):
+    """Insert or update ``{student_id: Decimal}`` marks for ``exam`` atomically.
+
+    Uses ``bulk_create(update_conflicts=True)`` on (exam_schedule, student), so
+    existing rows are updated in place and missing ones created, one
+    statement per batch. Returns the number of rows written.
+    """
+    now = timezone.now()
+    rows = [
+        ExamMarks(
+            exam_schedule=exam,
+            student_id=student_id,
+            marks_obtained=marks,
+            is_marked=True,
+            marked_by=marked_by,
+            marked_date=now,
+        )
+        for student_id, marks in marks_by_student.items()
+    ]
+    with transaction.atomic():
+        for start in range(0, len(rows), batch_size):
+            ExamMarks.objects.bulk_create(
+                rows[start:start + batch_size],
+                update_conflicts=True,
+                unique_fields=['exam_schedule', 'student'],
+                update_fields=['marks_obtained', 'is_marked', 'marked_by', 'marked_date', 'updated_at'],
+            )
+        transaction.on_commit(lambda: invalidate_student_results(marks_by_student))
+        transaction.on_commit(lambda: invalidate_exam_analytics([exam.id]))
+    return len(rows)
+
+
+def save_marks_form(exam, submitted, marked_by=None):
+    """Validate ``{student_id: raw value}`` from the marks form and save it.
+
+    Blank cells are skipped. Students outside the exam's roster and values
+    outside [0, max_marks] are reported per row and not written. Returns
+    ``(saved_count, errors)``.
+    """
+    roster = dict(exam_roster(exam).values_list('id', 'roll_number'))
+    valid, errors = {}, []
+    for student_id, raw in submitted.items():
+        if not str(raw).strip():
+            continue
+        roll_number = roster.get(student_id)
+        if roll_number is None:
+            errors.append({'row': student_id, 'student_id': student_id, 'roll_number': '', 'value': raw,
+                           'error': 'Student is not on this exam\'s roster'})
+            continue
+        try:
+            valid[student_id] = parse_marks(raw, exam.max_marks)
+        except ValueError as exc:
+            errors.append({'row': student_id, 'student_id': student_id, 'roll_number': roll_number,
+                           'value': raw, 'error': str(exc)})
+    saved = upsert_exam_marks(exam, valid, marked_by=marked_by) if valid else 0
+    return saved, errors
+
+
+def iter_marks_file(uploaded_file):
+    """Yield ``(row_number, roll_number, raw_marks)`` from a CSV or XLSX upload.
+
+    Rows are read lazily; a leading ``roll_number, marks`` header is skipped.
+    Raises ValueError for unsupported files.
+    """
+    name = (uploaded_file.name or '').lower()
+    if name.endswith('.xlsx'):
+        if not OPENPYXL_AVAILABLE:
+            raise ValueError("XLSX upload needs openpyxl installed; upload a CSV instead")
+        try:
+            workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError):
+            raise ValueError("The .xlsx file is corrupt or not an Excel workbook")
+        rows = workbook.active.iter_rows(values_only=True)
+    elif name.endswith('.csv'):
+        rows = csv.reader(io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline=''))
+    else:
+        raise ValueError("Upload a .csv or .xlsx file with roll_number and marks columns")
+
+    for row_number, row in enumerate(rows, start=1):
+        cells = ['' if cell is None else str(cell).strip() for cell in (row or ())][:2]
+        if not any(cells):
+            continue
+        if row_number == 1 and cells[0].lower() in HEADER_ROLL_NAMES:
+            continue
+        cells += [''] * (2 - len(cells))
+        yield row_number, cells[0], cells[1]
+
+
+def import_exam_marks(exam, uploaded_file, marked_by=None, batch_size=MARKS_BATCH_SIZE):
+    """Stream a marks file into ``exam`` and return ``(saved_count, errors)``.
+
+    Roll numbers are resolved against the exam roster with a single
+    ``values_list`` query; valid rows are upserted every ``batch_size`` rows
+    inside one transaction. Unknown rolls, duplicates and out-of-range marks
+    are reported per file row and skipped.
+    """
+    roll_to_id = dict(exam_roster(exam).values_list('roll_number', 'id'))
+    seen, batch, errors = set(), {}, []
+    saved = 0
+
+    with transaction.atomic():
+        for row_number, roll_number, raw in iter_marks_file(uploaded_file):
+            error = None
+            student_id = roll_to_id.get(roll_number)
+            if student_id is None:
+                error = "Roll number is not on this exam's roster"
+            elif student_id in seen:
+                error = "Duplicate roll number in file"
+            else:
+                try:
+                    batch[student_id] = parse_marks(raw, exam.max_marks)
+                    seen.add(student_id)
+                except ValueError as exc:
+                    error = str(exc)
+            if error:
+                errors.append({'row': row_number, 'roll_number': roll_number, 'value': raw, 'error': error})
+            if len(batch) >= batch_size:
+                saved += upsert_exam_marks(exam, batch, marked_by=marked_by, batch_size=batch_size)
+                batch = {}
+        if batch:
+            saved += upsert_exam_marks(exam, batch, marked_by=marked_by, batch_size=batch_size)
+    return saved, errors
@@ -0,0 +1,243 @@
+"""
+Marks distribution analytics.
+
+For a batch of ExamSchedules the statistics are aggregated in the database,
+so memory does not grow with the marks table. One grouped query gives the
+count, mean, sum of squares (for the spread), min/max, pass count and
+percentage sums; one groups the marks into percentage bands of max_marks
+(Case/When) for the histogram; and one windowed query returns only the rows
+at the quartile/p90 ranks, which are interpolated like ``numpy.percentile``. Each exam's summary is cached
+under a version token that committed marks writes replace (see
+:func:`invalidate_exam_analytics`), so a page only recomputes the exams whose
+marks changed since it was last viewed. Tokens live in the shared default
+cache, so a save in one worker is seen by all of them; summaries also expire
+after a day as a backstop. Subject-level figures are pooled from the
+per-exam summaries.
+"""
+import math
+import uuid
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import (
+    Avg, Case, Count, ExpressionWrapper, F, FloatField, Max, Min, Q, Sum, Value, When, Window,
+)
+from django.db.models.functions import Cast, Ceil, Floor, RowNumber
+
+from .models import ExamMarks
+
+ANALYTICS_BATCH_SIZE = 200
+HISTOGRAM_BINS = 10
+VERSION_KEY = 'marks_analytics_version:{exam_id}'
+SUMMARY_KEY = 'marks_analytics:{exam_id}:{version}'
+SUMMARY_TIMEOUT = 24 * 60 * 60
+BIN_WIDTH = 100 / HISTOGRAM_BINS
+BIN_LABELS = [f"{int(i * BIN_WIDTH)}–{int((i + 1) * BIN_WIDTH)}%" for i in range(HISTOGRAM_BINS)]
+PERCENTILES = (('p25', 0.25), ('median', 0.5), ('p75', 0.75), ('p90', 0.9))
+
+MARKS = Cast('marks_obtained', FloatField())
+# Marks as a percentage of the exam's max_marks (0 when max_marks is 0)
+PERCENT = Case(
+    When(
+        exam_schedule__max_marks__gt=0,
+        then=ExpressionWrapper(MARKS * 100 / F('exam_schedule__max_marks'), output_field=FloatField()),
+    ),
+    default=Value(0.0),
+    output_field=FloatField(),
+)
+# Histogram band 0..HISTOGRAM_BINS-1; out-of-range marks fall into the end bands
+BAND = Case(
+    *[When(percent__lt=(i + 1) * BIN_WIDTH, then=Value(i)) for i in range(HISTOGRAM_BINS - 1)],
+    default=Value(HISTOGRAM_BINS - 1),
+)
+
+
+def _round(value):
+    return round(float(value), 2)
+
+
+def histogram_bars(histogram):
+    """Template-ready bars, each scaled against the tallest bin."""
+    tallest = max(histogram) or 1
+    return [
+        {'label': label, 'count': count, 'height': round(count * 100 / tallest)}
+        for label, count in zip(BIN_LABELS, histogram)
+    ]
+
+
+def _rank(q):
+    """1-based (fractional) row number of the ``q`` quantile among ``size`` rows."""
+    return ExpressionWrapper((F('size') - 1) * Value(q) + 1, output_field=FloatField())
+
+
+def _percentiles(exam_ids):
+    """``{exam_id: {'p25': .., 'median': .., ...}}`` from only the rows at those ranks."""
+    ranked = (
+        ExamMarks.objects.filter(exam_schedule_id__in=exam_ids, marks_obtained__isnull=False)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F('exam_schedule_id')],
+                # Ordering on the float cast sidesteps SQLite's CAST(... AS NUMERIC) wrapping
+                order_by=MARKS.asc(),
+            ),
+            size=Window(Count('id'), partition_by=[F('exam_schedule_id')]),
+        )
+        .filter(reduce(or_, [
+            Q(position=Floor(_rank(q))) | Q(position=Ceil(_rank(q))) for _, q in PERCENTILES
+        ]))
+        .values_list('exam_schedule_id', 'position', 'size', 'marks_obtained')
+    )
+    values, sizes = {}, {}
+    for exam_id, position, size, marks in ranked:
+        values[(exam_id, position)] = float(marks)
+        sizes[exam_id] = size
+
+    result = {}
+    for exam_id, size in sizes.items():
+        figures = {}
+        for name, q in PERCENTILES:
+            rank = (size - 1) * q + 1
+            low, high = values[(exam_id, math.floor(rank))], values[(exam_id, math.ceil(rank))]
+            figures[name] = low + (high - low) * (rank - math.floor(rank))
+        result[exam_id] = figures
+    return result
+
+
+def _compute(exams):
+    """Summaries for ``exams`` with three aggregate queries per batch."""
+    summaries = {}
+    exams = list(exams)
+    for start in range(0, len(exams), ANALYTICS_BATCH_SIZE):
+        batch = {exam.id: exam for exam in exams[start:start + ANALYTICS_BATCH_SIZE]}
+        marks = ExamMarks.objects.filter(exam_schedule_id__in=list(batch))
+        entered = marks.filter(marks_obtained__isnull=False)
+
+        stats = {
+            row['exam_schedule_id']: row
+            for row in marks.values('exam_schedule_id').annotate(
+                rows=Count('id'),
+                entered=Count('marks_obtained'),
+                mean=Avg(MARKS),
+                marks_sq_sum=Sum(MARKS * MARKS),
+                low=Min('marks_obtained'),
+                high=Max('marks_obtained'),
+                passed=Count('id', filter=Q(marks_obtained__gte=F('exam_schedule__passing_marks'))),
+                mean_percent=Avg(PERCENT),
+                percent_sum=Sum(PERCENT),
+                percent_sq_sum=Sum(PERCENT * PERCENT),
+            ).order_by()
+        }
+        histograms = {exam_id: [0] * HISTOGRAM_BINS for exam_id in batch}
+        bands = (
+            entered.annotate(percent=PERCENT, band=BAND)
+            .values('exam_schedule_id', 'band')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        for row in bands:
+            histograms[row['exam_schedule_id']][row['band']] = row['count']
+        percentiles = _percentiles(list(batch))
+
+        for exam_id, exam in batch.items():
+            row = stats.get(exam_id)
+            count = row['entered'] if row else 0
+            summary = {
+                'entered': count,
+                'pending': row['rows'] - count if row else 0,
+                'max_marks': exam.max_marks,
+                'histogram': histograms[exam_id],
+                'bars': histogram_bars(histograms[exam_id]),
+            }
+            if count:
+                variance = row['marks_sq_sum'] / count - row['mean'] ** 2
+                summary.update({
+                    'mean': _round(row['mean']),
+                    'std': _round(math.sqrt(max(variance, 0.0))),
+                    'min': _round(row['low']),
+                    'max': _round(row['high']),
+                    'mean_percent': _round(row['mean_percent']),
+                    'passed': row['passed'],
+                    'pass_rate': _round(row['passed'] * 100 / count),
+                    # Pooling terms for subject-level figures
+                    'percent_sum': float(row['percent_sum']),
+                    'percent_sq_sum': float(row['percent_sq_sum']),
+                    **{name: _round(value) for name, value in percentiles[exam_id].items()},
+                })
+            summaries[exam_id] = summary
+    return summaries
+
+
+def _versions(exam_ids):
+    keys = {exam_id: VERSION_KEY.format(exam_id=exam_id) for exam_id in exam_ids}
+    found = cache.get_many(keys.values())
+    versions, missing = {}, {}
+    for exam_id, key in keys.items():
+        versions[exam_id] = found.get(key) or missing.setdefault(key, uuid.uuid4().hex[:12])
+    if missing:
+        cache.set_many(missing, timeout=None)
+    return versions
+
+
+def exam_analytics(exams):
+    """``{exam_id: summary}`` for ExamSchedule instances, served from cache where fresh."""
+    exams = list(exams)
+    versions = _versions([exam.id for exam in exams])
+    keys = {exam.id: SUMMARY_KEY.format(exam_id=exam.id, version=versions[exam.id]) for exam in exams}
+    cached = cache.get_many(keys.values())
+    summaries = {exam_id: cached[key] for exam_id, key in keys.items() if key in cached}
+    stale = [exam for exam in exams if exam.id not in summaries]
+    if stale:
+        computed = _compute(stale)
+        cache.set_many({keys[exam_id]: summary for exam_id, summary in computed.items()}, timeout=SUMMARY_TIMEOUT)
+        summaries.update(computed)
+    return summaries
+
+
+def subject_analytics(exams, summaries=None):
+    """Per-subject figures pooled over each subject's exams, in percent of max marks.
+
+    Returns ``{subject_id: {'exams', 'entered', 'mean_percent', 'std_percent',
+    'pass_rate', 'histogram', 'bars'}}``.
+    """
+    exams = list(exams)
+    summaries = summaries if summaries is not None else exam_analytics(exams)
+    pooled = {}
+    for exam in exams:
+        summary = summaries.get(exam.id)
+        if summary is None:
+            continue
+        subject = pooled.setdefault(exam.subject_id, {
+            'exams': 0, 'entered': 0, 'passed': 0, 'percent_sum': 0.0, 'percent_sq_sum': 0.0,
+            'histogram': [0] * HISTOGRAM_BINS,
+        })
+        subject['exams'] += 1
+        subject['entered'] += summary['entered']
+        subject['passed'] += summary.get('passed', 0)
+        subject['percent_sum'] += summary.get('percent_sum', 0.0)
+        subject['percent_sq_sum'] += summary.get('percent_sq_sum', 0.0)
+        subject['histogram'] = [a + b for a, b in zip(subject['histogram'], summary['histogram'])]
+
+    result = {}
+    for subject_id, subject in pooled.items():
+        count = subject['entered']
+        mean = subject['percent_sum'] / count if count else 0.0
+        variance = subject['percent_sq_sum'] / count - mean ** 2 if count else 0.0
+        result[subject_id] = {
+            'exams': subject['exams'],
+            'entered': count,
+            'mean_percent': _round(mean),
+            'std_percent': _round(max(variance, 0.0) ** 0.5),
+            'pass_rate': _round(subject['passed'] * 100 / count) if count else 0.0,
+            'histogram': subject['histogram'],
+            'bars': histogram_bars(subject['histogram']),
+        }
+    return result
+
+
+def invalidate_exam_analytics(exam_ids):
+    """Give each exam a new version so its summary is recomputed on next view."""
+    cache.set_many(
+        {VERSION_KEY.format(exam_id=exam_id): uuid.uuid4().hex[:12] for exam_id in set(exam_ids)}, timeout=None,
+    )
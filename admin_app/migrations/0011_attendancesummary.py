@@ -0,0 +1,129 @@
+# Generated by Django 4.2.28 on 2026-10-16 20:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q
+
+
+def backfill_attendance_summaries(apps, schema_editor):
+    """Build the counters from the existing Lecture/Attendance rows."""
+    Lecture = apps.get_model("admin_app", "Lecture")
+    Attendance = apps.get_model("admin_app", "Attendance")
+    StudentEnrollment = apps.get_model("admin_app", "StudentEnrollment")
+    AttendanceSummary = apps.get_model("admin_app", "AttendanceSummary")
+
+    conducted = {}
+    for row in (
+        Lecture.objects.filter(is_conducted=True)
+        .values("subject_offering_id", "lecture_type")
+        .annotate(total=Count("id"))
+        .order_by()
+    ):
+        conducted.setdefault(row["subject_offering_id"], {})[row["lecture_type"]] = row["total"]
+
+    counters = {}
+    for student_id, offering_id in StudentEnrollment.objects.filter(
+        status="active"
+    ).values_list("student_id", "subject_offering_id"):
+        for lecture_type, total in conducted.get(offering_id, {}).items():
+            counters[(student_id, offering_id, lecture_type)] = [total, 0, 0, 0]
+
+    for row in (
+        Attendance.objects.filter(lecture__is_conducted=True)
+        .values("student_id", "lecture__subject_offering_id", "lecture__lecture_type")
+        .annotate(
+            present=Count("id", filter=Q(status="present")),
+            absent=Count("id", filter=Q(status="absent")),
+            late=Count("id", filter=Q(status="late")),
+        )
+        .order_by()
+    ):
+        offering_id = row["lecture__subject_offering_id"]
+        lecture_type = row["lecture__lecture_type"]
+        entry = counters.setdefault(
+            (row["student_id"], offering_id, lecture_type),
+            [conducted.get(offering_id, {}).get(lecture_type, 0), 0, 0, 0],
+        )
+        entry[1:] = [row["present"], row["absent"], row["late"]]
+
+    AttendanceSummary.objects.bulk_create(
+        [
+            AttendanceSummary(
+                student_id=student_id,
+                subject_offering_id=offering_id,
+                lecture_type=lecture_type,
+                conducted=total,
+                present=present,
+                absent=absent,
+                late=late,
+            )
+            for (student_id, offering_id, lecture_type), (total, present, absent, late) in counters.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_app", "0010_assignment_subject_instead_of_offering"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "lecture_type",
+                    models.CharField(
+                        choices=[
+                            ("theory", "Theory"),
+                            ("practical", "Practical"),
+                            ("tutorial", "Tutorial"),
+                        ],
+                        default="theory",
+                        max_length=20,
+                    ),
+                ),
+                ("conducted", models.PositiveIntegerField(default=0)),
+                ("present", models.PositiveIntegerField(default=0)),
+                ("absent", models.PositiveIntegerField(default=0)),
+                ("late", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attendance_summaries",
+                        to="admin_app.student",
+                    ),
+                ),
+                (
+                    "subject_offering",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attendance_summaries",
+                        to="admin_app.subjectoffering",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "attendance summaries",
+                "ordering": ["student", "subject_offering", "lecture_type"],
+                "unique_together": {("student", "subject_offering", "lecture_type")},
+            },
+        ),
+        migrations.RunPython(
+            backfill_attendance_summaries,
+            migrations.RunPython.noop,
+        ),
+    ]
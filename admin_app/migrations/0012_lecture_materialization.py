@@ -0,0 +1,134 @@
+# Generated by Django 4.2.28 on 2026-10-16 20:56
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+
+
+def rebuild_summaries(apps, offering_ids):
+    """Recompute AttendanceSummary rows for the given offerings from Lecture/Attendance."""
+    Lecture = apps.get_model("admin_app", "Lecture")
+    Attendance = apps.get_model("admin_app", "Attendance")
+    StudentEnrollment = apps.get_model("admin_app", "StudentEnrollment")
+    AttendanceSummary = apps.get_model("admin_app", "AttendanceSummary")
+
+    conducted = {}
+    for row in (
+        Lecture.objects.filter(subject_offering_id__in=offering_ids, is_conducted=True)
+        .values("subject_offering_id", "lecture_type")
+        .annotate(total=Count("id"))
+        .order_by()
+    ):
+        conducted.setdefault(row["subject_offering_id"], {})[row["lecture_type"]] = row["total"]
+
+    counters = {}
+    for student_id, offering_id in StudentEnrollment.objects.filter(
+        subject_offering_id__in=offering_ids, status="active"
+    ).values_list("student_id", "subject_offering_id"):
+        for lecture_type, total in conducted.get(offering_id, {}).items():
+            counters[(student_id, offering_id, lecture_type)] = [total, 0, 0, 0]
+
+    for row in (
+        Attendance.objects.filter(lecture__subject_offering_id__in=offering_ids, lecture__is_conducted=True)
+        .values("student_id", "lecture__subject_offering_id", "lecture__lecture_type")
+        .annotate(
+            present=Count("id", filter=Q(status="present")),
+            absent=Count("id", filter=Q(status="absent")),
+            late=Count("id", filter=Q(status="late")),
+        )
+        .order_by()
+    ):
+        offering_id = row["lecture__subject_offering_id"]
+        lecture_type = row["lecture__lecture_type"]
+        entry = counters.setdefault(
+            (row["student_id"], offering_id, lecture_type),
+            [conducted.get(offering_id, {}).get(lecture_type, 0), 0, 0, 0],
+        )
+        entry[1:] = [row["present"], row["absent"], row["late"]]
+
+    AttendanceSummary.objects.filter(subject_offering_id__in=offering_ids).delete()
+    AttendanceSummary.objects.bulk_create(
+        [
+            AttendanceSummary(
+                student_id=student_id,
+                subject_offering_id=offering_id,
+                lecture_type=lecture_type,
+                conducted=total,
+                present=present,
+                absent=absent,
+                late=late,
+            )
+            for (student_id, offering_id, lecture_type), (total, present, absent, late) in counters.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def merge_duplicate_lectures(apps, schema_editor):
+    """Collapse lectures sharing (offering, date, start_time, type) into the oldest row."""
+    Lecture = apps.get_model("admin_app", "Lecture")
+    Attendance = apps.get_model("admin_app", "Attendance")
+
+    duplicates = (
+        Lecture.objects.values("subject_offering_id", "date", "start_time", "lecture_type")
+        .annotate(total=Count("id"), keep_id=Min("id"))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    offering_ids = set()
+    for group in duplicates:
+        keep_id = group.pop("keep_id")
+        group.pop("total")
+        extra_ids = list(
+            Lecture.objects.filter(**group).exclude(id=keep_id).values_list("id", flat=True)
+        )
+        taken = set(
+            Attendance.objects.filter(lecture_id=keep_id).values_list("student_id", flat=True)
+        )
+        for attendance in Attendance.objects.filter(lecture_id__in=extra_ids).order_by("-marked_date"):
+            if attendance.student_id not in taken:
+                attendance.lecture_id = keep_id
+                attendance.save(update_fields=["lecture"])
+                taken.add(attendance.student_id)
+        if Lecture.objects.filter(id__in=extra_ids, is_conducted=True).exists():
+            Lecture.objects.filter(id=keep_id).update(is_conducted=True)
+        Lecture.objects.filter(id__in=extra_ids).delete()
+        offering_ids.add(group["subject_offering_id"])
+
+    # Merged lectures no longer count twice, and attendance moved off (or
+    # deleted with) a duplicate changes the students' present/absent counts
+    if offering_ids:
+        rebuild_summaries(apps, offering_ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_app", "0011_attendancesummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Holiday",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("name", models.CharField(max_length=200)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["date"],
+            },
+        ),
+        migrations.RunPython(
+            merge_duplicate_lectures,
+            migrations.RunPython.noop,
+        ),
+    ]
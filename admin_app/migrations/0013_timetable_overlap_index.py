@@ -0,0 +1,20 @@
+# Generated by Django 4.2.28 on 2026-10-16 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_app", "0012_lecture_materialization"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="timetable",
+            index=models.Index(
+                fields=["day", "room_number", "start_time", "end_time"],
+                name="admin_app_t_day_f14bad_idx",
+            ),
+        ),
+    ]
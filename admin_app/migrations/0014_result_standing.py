@@ -0,0 +1,32 @@
+# Generated by Django 4.2.28 on 2026-10-16 22:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0013_timetable_overlap_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cgpa', models.DecimalField(decimal_places=2, default=0, max_digits=4)),
+                ('credits_counted', models.PositiveIntegerField(default=0)),
+                ('division_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('division_size', models.PositiveIntegerField(default=0)),
+                ('department_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('department_size', models.PositiveIntegerField(default=0)),
+                ('percentile', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('semester_result', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='standing', to='admin_app.semesterresult')),
+            ],
+            options={
+                'ordering': ['semester_result'],
+            },
+        ),
+    ]
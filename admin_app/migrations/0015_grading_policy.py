@@ -0,0 +1,34 @@
+# Generated by Django 4.2.28 on 2026-10-16 22:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0014_result_standing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('method', models.CharField(choices=[('absolute', 'Absolute bands'), ('mean_sd', 'Relative: mean + k·σ'), ('percentile', 'Relative: fixed percentiles')], default='absolute', max_length=20)),
+                ('cutoffs', models.JSONField(blank=True, default=list, help_text="Five values for A+, A, B+, B, C; blank uses the method's defaults")),
+                ('pass_floor', models.DecimalField(decimal_places=2, default=40, help_text='Totals below this percentage always fail', max_digits=5)),
+                ('min_cohort_size', models.PositiveIntegerField(default=30, help_text='Smaller cohorts fall back to absolute bands')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam_type', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='grading_policy', to='admin_app.examtype')),
+                ('subject', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='grading_policy', to='admin_app.subject')),
+            ],
+            options={
+                'verbose_name_plural': 'grading policies',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.28 on 2026-10-16 22:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0016_fee_payment_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeCollectionSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semester', models.IntegerField()),
+                ('academic_year', models.CharField(max_length=10)),
+                ('students', models.PositiveIntegerField(default=0)),
+                ('fees_to_be_collected', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('previously_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refunded', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding_0_30', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding_31_60', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding_61_90', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding_over_90', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('receipts', models.PositiveIntegerField(default=0)),
+                ('collected', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('degree_program', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fee_snapshots', to='admin_app.degreeprogram')),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fee_snapshots', to='admin_app.department')),
+            ],
+            options={
+                'ordering': ['-academic_year', 'department', 'degree_program', 'semester'],
+                'unique_together': {('degree_program', 'semester', 'academic_year')},
+            },
+        ),
+    ]
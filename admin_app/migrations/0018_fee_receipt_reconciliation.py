@@ -0,0 +1,23 @@
+# Generated by Django 4.2.28 on 2026-10-16 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0017_fee_collection_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feereceipt',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='feereceipt',
+            name='transaction_id',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
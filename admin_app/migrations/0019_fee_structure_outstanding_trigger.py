@@ -0,0 +1,118 @@
+# Generated by Django 4.2.28 on 2026-10-16 23:10
+
+from django.db import NotSupportedError, migrations
+from django.db.models import F
+
+# Django 4.2 has no GeneratedField, so the database keeps
+# outstanding = fees_to_be_collected - paid - refunded with a trigger. Every
+# write path (save, QuerySet.update, bulk_update, F() expressions, raw SQL)
+# then leaves a consistent row.
+TABLE = "admin_app_feestructure"
+FORMULA = "{row}.fees_to_be_collected - {row}.paid - {row}.refunded"
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE TRIGGER feestructure_outstanding_insert
+    AFTER INSERT ON {TABLE} FOR EACH ROW
+    WHEN NEW.outstanding IS NOT ROUND({FORMULA.format(row='NEW')}, 2)
+    BEGIN
+        UPDATE {TABLE} SET outstanding = ROUND({FORMULA.format(row='NEW')}, 2) WHERE id = NEW.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER feestructure_outstanding_update
+    AFTER UPDATE OF fees_to_be_collected, paid, refunded, outstanding ON {TABLE} FOR EACH ROW
+    WHEN NEW.outstanding IS NOT ROUND({FORMULA.format(row='NEW')}, 2)
+    BEGIN
+        UPDATE {TABLE} SET outstanding = ROUND({FORMULA.format(row='NEW')}, 2) WHERE id = NEW.id;
+    END
+    """,
+]
+SQLITE_REMOVE = [
+    "DROP TRIGGER IF EXISTS feestructure_outstanding_insert",
+    "DROP TRIGGER IF EXISTS feestructure_outstanding_update",
+]
+
+POSTGRES_INSTALL = [
+    f"""
+    CREATE OR REPLACE FUNCTION feestructure_outstanding() RETURNS trigger AS $$
+    BEGIN
+        NEW.outstanding := {FORMULA.format(row='NEW')};
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE TRIGGER feestructure_outstanding
+    BEFORE INSERT OR UPDATE ON {TABLE}
+    FOR EACH ROW EXECUTE FUNCTION feestructure_outstanding()
+    """,
+]
+POSTGRES_REMOVE = [
+    f"DROP TRIGGER IF EXISTS feestructure_outstanding ON {TABLE}",
+    "DROP FUNCTION IF EXISTS feestructure_outstanding()",
+]
+
+MYSQL_INSTALL = [
+    f"""
+    CREATE TRIGGER feestructure_outstanding_insert BEFORE INSERT ON {TABLE}
+    FOR EACH ROW SET NEW.outstanding = {FORMULA.format(row='NEW')}
+    """,
+    f"""
+    CREATE TRIGGER feestructure_outstanding_update BEFORE UPDATE ON {TABLE}
+    FOR EACH ROW SET NEW.outstanding = {FORMULA.format(row='NEW')}
+    """,
+]
+MYSQL_REMOVE = [
+    "DROP TRIGGER IF EXISTS feestructure_outstanding_insert",
+    "DROP TRIGGER IF EXISTS feestructure_outstanding_update",
+]
+
+STATEMENTS = {
+    "sqlite": (SQLITE_INSTALL, SQLITE_REMOVE),
+    "postgresql": (POSTGRES_INSTALL, POSTGRES_REMOVE),
+    "mysql": (MYSQL_INSTALL, MYSQL_REMOVE),
+}
+
+
+def vendor_statements(schema_editor):
+    """``(install, remove)`` for the connection's backend.
+
+    Payments no longer write outstanding and guard on it, so running without
+    the trigger would allow overpayment; an unknown backend is an error.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor not in STATEMENTS:
+        raise NotSupportedError(
+            f"The '{vendor}' database backend is not supported: FeeStructure.outstanding is kept "
+            f"by a trigger available only for {', '.join(sorted(STATEMENTS))}."
+        )
+    return STATEMENTS[vendor]
+
+
+def install_outstanding_trigger(apps, schema_editor):
+    """Backfill stale rows with one UPDATE, then let the database keep them current."""
+    install, _ = vendor_statements(schema_editor)
+    FeeStructure = apps.get_model("admin_app", "FeeStructure")
+    FeeStructure.objects.exclude(
+        outstanding=F("fees_to_be_collected") - F("paid") - F("refunded")
+    ).update(outstanding=F("fees_to_be_collected") - F("paid") - F("refunded"))
+    for statement in install:
+        schema_editor.execute(statement)
+
+
+def remove_outstanding_trigger(apps, schema_editor):
+    _, remove = vendor_statements(schema_editor)
+    for statement in remove:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_app", "0018_fee_receipt_reconciliation"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_outstanding_trigger, remove_outstanding_trigger),
+    ]
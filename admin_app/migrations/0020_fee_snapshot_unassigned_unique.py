@@ -0,0 +1,35 @@
+# Generated by Django 4.2.28 on 2026-10-16 23:18
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_unassigned_rows(apps, schema_editor):
+    """Keep one "Unassigned" snapshot row per (semester, academic_year) so the constraint can be added."""
+    FeeCollectionSnapshot = apps.get_model("admin_app", "FeeCollectionSnapshot")
+    duplicates = (
+        FeeCollectionSnapshot.objects.filter(degree_program__isnull=True)
+        .values("semester", "academic_year")
+        .annotate(total=Count("id"), keep_id=Min("id"))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for group in duplicates:
+        FeeCollectionSnapshot.objects.filter(
+            degree_program__isnull=True, semester=group["semester"], academic_year=group["academic_year"],
+        ).exclude(id=group["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_app', '0019_fee_structure_outstanding_trigger'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_unassigned_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='feecollectionsnapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('degree_program__isnull', True)), fields=('semester', 'academic_year'), name='unique_unassigned_fee_snapshot'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.28 on 2026-10-17 09:12
+
+from django.db import migrations
+
+
+# The lecture slot key is added apart from 0012's duplicate merge so the
+# ALTER TABLE does not share a transaction with the rewritten Attendance rows,
+# which PostgreSQL refuses while deferred foreign-key checks are pending.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_app", "0020_fee_snapshot_unassigned_unique"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="lecture",
+            unique_together={
+                ("subject_offering", "date", "start_time", "lecture_type")
+            },
+        ),
+    ]
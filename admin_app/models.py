@@ -154,22 +154,21 @@ class Student(models.Model):
         return self.enrollments.filter(status='active')
     
     def get_attendance_percentage(self, subject_offering=None):
-        """Calculate attendance percentage"""
+        """Calculate attendance percentage from the AttendanceSummary counters"""
+        summaries = AttendanceSummary.objects.filter(student=self)
         if subject_offering:
-            lectures = Lecture.objects.filter(subject_offering=subject_offering)
-            attendance = Attendance.objects.filter(
-                student=self,
-                lecture__in=lectures,
-                status='present'
-            ).count()
-            total = lectures.count()
+            totals = summaries.filter(subject_offering=subject_offering).aggregate(
+                attended=models.Sum('present'),
+                total=models.Sum('conducted'),
+            )
         else:
-            attendance = Attendance.objects.filter(
-                student=self,
-                status='present'
-            ).count()
-            total = Attendance.objects.filter(student=self).count()
-        
+            totals = summaries.aggregate(
+                attended=models.Sum('present'),
+                total=models.Sum(models.F('present') + models.F('absent') + models.F('late')),
+            )
+        attendance = totals['attended'] or 0
+        total = totals['total'] or 0
+
         return (attendance / total * 100) if total > 0 else 0
 
 
@@ -432,6 +431,7 @@ class Lecture(models.Model):
     
     class Meta:
         ordering = ['date', 'start_time']
+        unique_together = ['subject_offering', 'date', 'start_time', 'lecture_type']
     
     def __str__(self):
         return f"{self.subject_offering.subject.code} - {self.date} - {self.lecture_type}"
@@ -467,6 +467,33 @@ class Attendance(models.Model):
         return f"{self.student.roll_number} - {self.lecture} - {self.status}"
 
 
+class AttendanceSummary(models.Model):
+    """Denormalized attendance counters per student, offering and lecture type.
+
+    Maintained by ``admin_app.attendance.refresh_attendance_summaries`` on every
+    Lecture / Attendance write so attendance pages never count raw rows.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_summaries')
+    subject_offering = models.ForeignKey(SubjectOffering, on_delete=models.CASCADE, related_name='attendance_summaries')
+    lecture_type = models.CharField(max_length=20, choices=Lecture.TYPE_CHOICES, default='theory')
+    conducted = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['student', 'subject_offering', 'lecture_type']
+        unique_together = ['student', 'subject_offering', 'lecture_type']
+        verbose_name_plural = 'attendance summaries'
+
+    def __str__(self):
+        return f"{self.student.roll_number} - {self.subject_offering} - {self.lecture_type}: {self.present}/{self.conducted}"
+
+    def get_percentage(self):
+        return (self.present / self.conducted * 100) if self.conducted > 0 else 0
+
+
 # ============================================================================
 # TIMETABLE ENTITY
 # ============================================================================
@@ -498,6 +525,10 @@ class Timetable(models.Model):
     
     class Meta:
         ordering = ['subject_offering', 'day', 'start_time']
+        indexes = [
+            # Overlap checks: day + room equality, then the time range
+            models.Index(fields=['day', 'room_number', 'start_time', 'end_time']),
+        ]
     
     def __str__(self):
         return f"{self.subject_offering.subject.code} - {self.day} - {self.start_time}-{self.end_time}"
@@ -568,6 +599,78 @@ class SubjectResult(models.Model):
         return f"{self.semester_result.student.roll_number} - {self.subject.code} - {self.grade}"
 
 
+class ResultStanding(models.Model):
+    """Precomputed CGPA and class standing for a published semester result.
+
+    Refreshed by ``admin_app.standings.refresh_standings`` when results are
+    published so the results page reads one row instead of ranking the cohort.
+    """
+    semester_result = models.OneToOneField(SemesterResult, on_delete=models.CASCADE, related_name='standing')
+    cgpa = models.DecimalField(max_digits=4, decimal_places=2, default=0)
+    credits_counted = models.PositiveIntegerField(default=0)
+    division_rank = models.PositiveIntegerField(null=True, blank=True)
+    division_size = models.PositiveIntegerField(default=0)
+    department_rank = models.PositiveIntegerField(null=True, blank=True)
+    department_size = models.PositiveIntegerField(default=0)
+    percentile = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['semester_result']
+
+    def __str__(self):
+        return f"{self.semester_result} - CGPA {self.cgpa} - Rank {self.department_rank}"
+
+
+class GradingPolicy(models.Model):
+    """How a subject's result totals map to grades.
+
+    Attached to a Subject, or to an ExamType so it covers every subject
+    examined with that type; a Subject policy wins over an ExamType one and
+    subjects with neither use the absolute bands. ``cutoffs`` holds five
+    values for A+, A, B+, B and C, highest first: band floors in percent
+    for ``absolute``, k in mean + k·σ for ``mean_sd``, and cohort
+    percentiles for ``percentile``. Applied by ``admin_app.grading``.
+    """
+    METHOD_CHOICES = [
+        ('absolute', 'Absolute bands'),
+        ('mean_sd', 'Relative: mean + k·σ'),
+        ('percentile', 'Relative: fixed percentiles'),
+    ]
+
+    name = models.CharField(max_length=100)
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES, default='absolute')
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name='grading_policy')
+    exam_type = models.OneToOneField(ExamType, on_delete=models.CASCADE, null=True, blank=True,
+                                     related_name='grading_policy')
+    cutoffs = models.JSONField(default=list, blank=True,
+                               help_text="Five values for A+, A, B+, B, C; blank uses the method's defaults")
+    pass_floor = models.DecimalField(max_digits=5, decimal_places=2, default=40,
+                                     help_text="Totals below this percentage always fail")
+    min_cohort_size = models.PositiveIntegerField(default=30,
+                                                  help_text="Smaller cohorts fall back to absolute bands")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'grading policies'
+
+    def __str__(self):
+        return f"{self.name} ({self.get_method_display()})"
+
+    def clean(self):
+        if bool(self.subject_id) == bool(self.exam_type_id):
+            raise ValidationError("Attach the policy to exactly one of subject or exam type.")
+        if self.cutoffs:
+            if len(self.cutoffs) != 5 or not all(isinstance(value, (int, float)) for value in self.cutoffs):
+                raise ValidationError({'cutoffs': "Give five numbers for A+, A, B+, B and C."})
+            if list(self.cutoffs) != sorted(self.cutoffs, reverse=True):
+                raise ValidationError({'cutoffs': "Cut-offs must run from A+ down to C."})
+
+
 # ============================================================================
 # FINANCE ENTITIES
 # ============================================================================
@@ -593,6 +696,8 @@ class FeeStructure(models.Model):
         return f"{self.student.roll_number} - Sem {self.semester} - {self.academic_year}"
     
     def save(self, *args, **kwargs):
+        # The database trigger (migration 0019) keeps the stored column right for
+        # every write, bulk ones included; this only keeps the instance in step
         self.outstanding = self.fees_to_be_collected - self.paid - self.refunded
         super().save(*args, **kwargs)
 
@@ -612,8 +717,12 @@ class FeeReceipt(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_date = models.DateField()
     payment_mode = models.CharField(max_length=20, choices=MODE_CHOICES)
-    transaction_id = models.CharField(max_length=100, blank=True, null=True)
+    transaction_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     bank_name = models.CharField(max_length=100, blank=True, null=True)
+    # Issued with the payment form; a resubmitted form finds its receipt instead of paying twice
+    idempotency_key = models.CharField(max_length=64, unique=True, blank=True, null=True)
+    # Set when a bank/gateway statement line confirms the money arrived
+    reconciled_at = models.DateTimeField(blank=True, null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -623,6 +732,60 @@ class FeeReceipt(models.Model):
         return f"{self.receipt_number} - {self.student.roll_number}"
 
 
+class ReceiptSequence(models.Model):
+    """Gap-free receipt counter, one row per receipt prefix (e.g. per day)"""
+    prefix = models.CharField(max_length=20, unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.prefix} @ {self.last_value}"
+
+
+class FeeCollectionSnapshot(models.Model):
+    """Fee totals per (program, semester, academic year) for the collections dashboard.
+
+    Rebuilt by ``admin_app.fee_snapshot.refresh_fee_snapshot`` (nightly and on
+    demand) and adjusted in place by every payment, so the dashboard never
+    aggregates FeeStructure or FeeReceipt rows itself. Outstanding is also
+    split into ageing buckets by how long ago the fee was raised.
+    """
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name='fee_snapshots')
+    degree_program = models.ForeignKey(DegreeProgram, on_delete=models.CASCADE, null=True, blank=True,
+                                       related_name='fee_snapshots')
+    semester = models.IntegerField()
+    academic_year = models.CharField(max_length=10)
+    students = models.PositiveIntegerField(default=0)
+    fees_to_be_collected = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    previously_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refunded = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding_0_30 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding_31_60 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding_61_90 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding_over_90 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    receipts = models.PositiveIntegerField(default=0)
+    collected = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-academic_year', 'department', 'degree_program', 'semester']
+        unique_together = ['degree_program', 'semester', 'academic_year']
+        constraints = [
+            # NULLs never collide in unique_together, so the "Unassigned" rows need their own key
+            models.UniqueConstraint(
+                fields=['semester', 'academic_year'], condition=models.Q(degree_program__isnull=True),
+                name='unique_unassigned_fee_snapshot',
+            ),
+        ]
+
+    def __str__(self):
+        program = self.degree_program.code if self.degree_program_id else '-'
+        return f"{program} - Sem {self.semester} - {self.academic_year}: {self.outstanding} outstanding"
+
+
 # ============================================================================
 # LEAVE MANAGEMENT ENTITY
 # ============================================================================
@@ -712,6 +875,25 @@ class AcademicCalendar(models.Model):
     def is_current_semester(self):
         return self.start_date <= date.today() <= self.end_date
 
+    def get_teaching_end_date(self):
+        """Last teaching day: the day before exams start if they fall inside the semester"""
+        if self.start_date < self.exam_start_date <= self.end_date:
+            return self.exam_start_date - timedelta(days=1)
+        return self.end_date
+
+
+class Holiday(models.Model):
+    """Institution holidays, skipped when lectures are materialized"""
+    date = models.DateField(unique=True)
+    name = models.CharField(max_length=200)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} - {self.name}"
+
 
 # ============================================================================
 # ASSIGNMENT & PLAGIARISM ENTITIES
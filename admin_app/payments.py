@@ -0,0 +1,105 @@
+"""
+Fee payment ledger.
+
+A payment is one transaction: the FeeStructure balance moves with a
+conditional ``F()`` update that also locks the row for the rest of it, the
+receipt number is drawn from a per-day ReceiptSequence row inside the same
+transaction (a rolled-back payment rolls its number back too, so numbers
+stay gap-free), and the FeeReceipt insert carries the idempotency key the
+payment form was issued with. The collections snapshot moves with the
+payment in the same transaction. A resubmitted or double-clicked form hits
+the unique key and gets the original receipt back instead of paying twice.
+"""
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .fee_snapshot import apply_payment
+from .models import FeeReceipt, FeeStructure, ReceiptSequence
+
+RECEIPT_PREFIX = 'RCP'
+# Wider than the old random four-digit suffix so sequence numbers never meet legacy ones
+RECEIPT_DIGITS = 5
+PAYMENT_MODES = {'card': 'online', 'upi': 'online', 'netbanking': 'online'}
+GATEWAY_BANK_NAME = 'College Payment Gateway'
+
+
+def new_idempotency_key():
+    return uuid.uuid4().hex
+
+
+def next_receipt_number(day=None):
+    """Take the next number of ``day``'s sequence; call inside the payment transaction."""
+    day = day or timezone.localdate()
+    prefix = f"{RECEIPT_PREFIX}{day:%Y%m%d}"
+    sequence = ReceiptSequence.objects.filter(prefix=prefix)
+    # The UPDATE holds the row lock until commit, so concurrent payments queue here
+    if not sequence.update(last_value=F('last_value') + 1, updated_at=timezone.now()):
+        ReceiptSequence.objects.get_or_create(prefix=prefix)
+        sequence.update(last_value=F('last_value') + 1, updated_at=timezone.now())
+    value = sequence.values_list('last_value', flat=True).get()
+    return f"{prefix}{value:0{RECEIPT_DIGITS}d}"
+
+
+def record_payment(fee_structure_id, amount, payment_method='online', idempotency_key=None, transaction_id=None,
+                   bank_name=GATEWAY_BANK_NAME):
+    """Apply a payment to a FeeStructure and issue its receipt.
+
+    Returns ``(receipt, created)``; ``created`` is False when ``idempotency_key``
+    was already used for this fee structure, in which case nothing is charged
+    again. Raises ValueError for a non-positive amount, one above the
+    outstanding balance or a key already used for another fee structure, and
+    FeeStructure.DoesNotExist for an unknown ``fee_structure_id``.
+    """
+    if amount <= 0:
+        raise ValueError("Invalid payment amount.")
+    idempotency_key = idempotency_key or new_idempotency_key()
+    existing = _existing_receipt(fee_structure_id, idempotency_key)
+    if existing is not None:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            # Write first: the UPDATE takes the row (or SQLite's database) write lock
+            # before anything is read, and the balance check is part of it; the
+            # database trigger recomputes outstanding from paid
+            updated = FeeStructure.objects.filter(pk=fee_structure_id, outstanding__gte=amount).update(
+                paid=F('paid') + amount,
+                updated_at=timezone.now(),
+            )
+            fee_structure = FeeStructure.objects.select_for_update().get(pk=fee_structure_id)
+            if not updated:
+                raise ValueError("Payment amount exceeds outstanding balance.")
+            receipt = FeeReceipt.objects.create(
+                student_id=fee_structure.student_id,
+                fee_structure=fee_structure,
+                receipt_number=next_receipt_number(),
+                amount=amount,
+                payment_date=timezone.localdate(),
+                payment_mode=PAYMENT_MODES.get(payment_method, 'online'),
+                transaction_id=transaction_id or f"TXN{uuid.uuid4().hex[:12].upper()}",
+                bank_name=bank_name,
+                idempotency_key=idempotency_key,
+            )
+            apply_payment(fee_structure, amount)
+    except IntegrityError:
+        # A concurrent submit with the same key won; its receipt is the answer
+        existing = _existing_receipt(fee_structure_id, idempotency_key)
+        if existing is None:
+            raise
+        return existing, False
+    return receipt, True
+
+
+def _existing_receipt(fee_structure_id, idempotency_key):
+    """The receipt ``idempotency_key`` already produced for this fee structure, if any.
+
+    Raises ValueError when the key belongs to a payment on another structure,
+    so a reused key never hands back someone else's receipt.
+    """
+    receipt = FeeReceipt.objects.filter(idempotency_key=idempotency_key).first()
+    if receipt is not None and receipt.fee_structure_id != int(fee_structure_id):
+        raise ValueError("This payment form was already used for another fee; reload the page and try again.")
+    return receipt
@@ -0,0 +1,159 @@
+"""
+Bank / gateway statement reconciliation.
+
+Every unreconciled FeeReceipt with a transaction id is loaded once into a
+dict keyed by ``transaction_id``, then the statement CSV is streamed line by
+line and each line is an O(1) lookup. Matches (same id and amount) are
+marked ``reconciled_at`` with one UPDATE per batch. Lines whose amount
+differs, that repeat an already-matched transaction, that point at a
+receipt reconciled earlier or that no receipt knows are reported instead.
+Memory follows the number of unreconciled receipts, not the statement
+length; per-line details are capped at ``REPORT_LIMIT`` per kind.
+"""
+import csv
+import io
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FeeReceipt
+
+RECONCILE_BATCH_SIZE = 1000
+REPORT_LIMIT = 1000
+TRANSACTION_COLUMNS = {'transaction_id', 'transaction id', 'txn_id', 'txn id', 'reference', 'utr', 'ref no'}
+AMOUNT_COLUMNS = {'amount', 'credit', 'credit amount', 'amount (inr)'}
+PROBLEM_KINDS = ('mismatch', 'duplicate', 'already_reconciled', 'unknown', 'invalid')
+AMOUNT_NOISE = re.compile(r'[₹,\s]|INR|Rs\.?', re.IGNORECASE)
+
+
+def parse_amount(raw):
+    """``"₹1,234.50"`` -> ``Decimal("1234.50")``; raises ValueError."""
+    try:
+        amount = Decimal(AMOUNT_NOISE.sub('', raw or ''))
+    except InvalidOperation:
+        raise ValueError(f"'{raw}' is not an amount")
+    if not amount.is_finite():
+        raise ValueError(f"'{raw}' is not an amount")
+    return amount
+
+
+def iter_statement(handle):
+    """Yield ``(line_number, transaction_id, raw_amount)`` from a statement CSV.
+
+    ``handle`` is a binary file (an upload or ``open(path, 'rb')``). The
+    header row names the columns; common bank spellings are accepted.
+    """
+    reader = csv.reader(io.TextIOWrapper(handle, encoding='utf-8-sig', newline=''))
+    header = [cell.strip().lower() for cell in next(reader, [])]
+    txn_column = next((i for i, name in enumerate(header) if name in TRANSACTION_COLUMNS), None)
+    amount_column = next((i for i, name in enumerate(header) if name in AMOUNT_COLUMNS), None)
+    if txn_column is None or amount_column is None:
+        raise ValueError("Statement needs a header with transaction_id and amount columns")
+    width = max(txn_column, amount_column) + 1
+    for line_number, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        row += [''] * (width - len(row))
+        yield line_number, row[txn_column].strip(), row[amount_column].strip()
+
+
+def unreconciled_index():
+    """``{transaction_id: [(receipt_id, amount), ...]}`` for receipts awaiting a statement."""
+    index = defaultdict(list)
+    rows = (
+        FeeReceipt.objects.filter(reconciled_at__isnull=True, transaction_id__isnull=False)
+        .exclude(transaction_id='')
+        .values_list('transaction_id', 'id', 'amount')
+    )
+    for txn_id, receipt_id, amount in rows.iterator(chunk_size=5000):
+        index[txn_id].append((receipt_id, amount))
+    return index
+
+
+def reconcile_statement(handle, batch_size=RECONCILE_BATCH_SIZE, dry_run=False):
+    """Match a statement against unreconciled receipts and mark the matches.
+
+    Returns a report dict: ``lines``, ``matched``, ``matched_amount``,
+    ``counts`` per problem kind, ``problems`` (up to REPORT_LIMIT dicts per
+    kind with ``line``, ``transaction_id``, ``amount``, ``kind`` and
+    ``detail``) and ``unmatched_receipts``, the receipts still open after
+    this statement.
+    """
+    index = unreconciled_index()
+    matched_txns = set()
+    counts = dict.fromkeys(PROBLEM_KINDS, 0)
+    problems = []
+    report = {'lines': 0, 'matched': 0, 'matched_amount': Decimal('0'), 'counts': counts, 'problems': problems}
+    pending, unknown = [], {}
+    reconciled_at = timezone.now()
+
+    def problem(kind, line, txn_id, raw, detail):
+        counts[kind] += 1
+        if counts[kind] <= REPORT_LIMIT:
+            problems.append({'line': line, 'transaction_id': txn_id, 'amount': raw, 'kind': kind, 'detail': detail})
+
+    def flush_matches():
+        if pending and not dry_run:
+            FeeReceipt.objects.filter(id__in=pending, reconciled_at__isnull=True).update(reconciled_at=reconciled_at)
+        pending.clear()
+
+    def flush_unknown():
+        # Ids no open receipt knows may belong to a receipt reconciled by an earlier statement
+        seen_before = set(
+            FeeReceipt.objects.filter(transaction_id__in=list(unknown), reconciled_at__isnull=False)
+            .values_list('transaction_id', flat=True)
+        )
+        for txn_id, lines in unknown.items():
+            for line, raw in lines:
+                if txn_id in seen_before:
+                    problem('already_reconciled', line, txn_id, raw, "Receipt was reconciled by an earlier statement")
+                else:
+                    problem('unknown', line, txn_id, raw, "No receipt has this transaction id")
+        unknown.clear()
+
+    with transaction.atomic():
+        for line, txn_id, raw in iter_statement(handle):
+            report['lines'] += 1
+            try:
+                amount = parse_amount(raw)
+            except ValueError as exc:
+                problem('invalid', line, txn_id, raw, str(exc))
+                continue
+            if not txn_id:
+                problem('invalid', line, txn_id, raw, "Missing transaction id")
+                continue
+
+            candidates = index.get(txn_id)
+            if candidates is None:
+                if txn_id in matched_txns:
+                    problem('duplicate', line, txn_id, raw, "Transaction already matched earlier in this statement")
+                else:
+                    unknown.setdefault(txn_id, []).append((line, raw))
+                    if len(unknown) >= batch_size:
+                        flush_unknown()
+                continue
+
+            position = next((i for i, (_, expected) in enumerate(candidates) if expected == amount), None)
+            if position is None:
+                expected = ', '.join(f"{expected}" for _, expected in candidates)
+                problem('mismatch', line, txn_id, raw, f"Receipt amount {expected}, statement {amount}")
+                continue
+            receipt_id, _ = candidates.pop(position)
+            if not candidates:
+                del index[txn_id]
+                matched_txns.add(txn_id)
+            pending.append(receipt_id)
+            report['matched'] += 1
+            report['matched_amount'] += amount
+            if len(pending) >= batch_size:
+                flush_matches()
+        flush_matches()
+        if unknown:
+            flush_unknown()
+
+    report['unmatched_receipts'] = sum(len(candidates) for candidates in index.values())
+    problems.sort(key=lambda item: item['line'])
+    return report
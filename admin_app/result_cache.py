@@ -0,0 +1,186 @@
+"""
+Per-student result cache for the student results and marks pages.
+
+Each student's published semester results, standings and exam marks are
+flattened into one picklable payload stored in the shared default cache (Redis or
+the database cache, never a per-process one; see admin_app.checks) under
+``student_results:<user_id>:<version>``. The version token lives under its
+own key and is replaced whenever that student's published results or marks
+change, so readers simply stop finding the stale payload; nothing has to
+be deleted. On a miss only one request per key rebuilds the payload (it
+holds a short ``cache.add`` lock) while the others poll briefly for the
+result, so a publish-time spike costs one build per student, not one per
+request. Results computed but not yet published never reach the payload;
+``publish_results`` warms the payloads of the whole cohort up front.
+"""
+import time
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .models import ExamMarks, ResultStanding, SemesterResult, Student
+
+VERSION_KEY = 'student_results_version:{user_id}'
+PAYLOAD_KEY = 'student_results:{user_id}:{version}'
+PAYLOAD_TIMEOUT = 24 * 60 * 60
+# How long a rebuild may hold the lock, and how long other requests wait on it
+BUILD_LOCK_TIMEOUT = 30
+BUILD_WAIT_SECONDS = 5
+BUILD_POLL_SECONDS = 0.05
+STANDING_FIELDS = (
+    'cgpa', 'credits_counted', 'division_rank', 'division_size', 'department_rank', 'department_size', 'percentile',
+)
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def _versions(user_ids):
+    """Current version token per user id, creating tokens that are missing."""
+    keys = {user_id: VERSION_KEY.format(user_id=user_id) for user_id in user_ids}
+    found = cache.get_many(keys.values())
+    versions, missing = {}, {}
+    for user_id, key in keys.items():
+        if key in found:
+            versions[user_id] = found[key]
+        else:
+            versions[user_id] = missing[key] = _new_version()
+    if missing:
+        cache.set_many(missing, timeout=None)
+    return versions
+
+
+def build_payloads(students):
+    """``{user_id: payload}`` for a Student queryset in a fixed number of queries.
+
+    ``results_by_semester`` and ``marks_by_semester`` mirror the context the
+    results and marks templates have always used, with plain dicts in place
+    of model instances.
+    """
+    student_rows = {
+        row['id']: row for row in students.values('id', 'user_id', 'name', 'roll_number', 'semester')
+    }
+    payloads = {
+        row['user_id']: {
+            'student': row,
+            'results_by_semester': {},
+            'marks_by_semester': defaultdict(list),
+        }
+        for row in student_rows.values()
+    }
+
+    semester_results = (
+        SemesterResult.objects.filter(student_id__in=list(student_rows), published=True)
+        .select_related('standing')
+        .prefetch_related('subject_results__subject')
+        .order_by('student_id', '-semester')
+    )
+    for sem_result in semester_results.iterator(chunk_size=2000):
+        subjects = [
+            {
+                'subject': {'id': result.subject_id, 'name': result.subject.name},
+                'internal_marks': result.internal_marks,
+                'external_marks': result.external_marks,
+                'practical_marks': result.practical_marks,
+                'total_marks': result.total_marks,
+                'grade': result.grade,
+                'gpa': result.gpa,
+            }
+            for result in sem_result.subject_results.all()
+        ]
+        try:
+            standing = {field: getattr(sem_result.standing, field) for field in STANDING_FIELDS}
+        except ResultStanding.DoesNotExist:
+            standing = None
+        user_id = student_rows[sem_result.student_id]['user_id']
+        payloads[user_id]['results_by_semester'][sem_result.semester] = {
+            'subjects': subjects,
+            'semester_gpa': sem_result.sgpa,
+            'total_subjects': len(subjects),
+            'standing': standing,
+        }
+
+    marks = (
+        ExamMarks.objects.filter(student_id__in=list(student_rows))
+        .order_by('-exam_schedule__subject__semester', 'exam_schedule__subject__name',
+                  'exam_schedule__exam_type__name')
+        .values_list('student_id', 'marks_obtained', 'exam_schedule__max_marks', 'exam_schedule__subject_id',
+                     'exam_schedule__subject__name', 'exam_schedule__subject__semester',
+                     'exam_schedule__exam_type__name')
+    )
+    for student_id, obtained, max_marks, subject_id, subject_name, semester, exam_type in marks.iterator(
+        chunk_size=5000,
+    ):
+        payloads[student_rows[student_id]['user_id']]['marks_by_semester'][semester].append({
+            'marks_obtained': obtained,
+            'exam_schedule': {
+                'max_marks': max_marks,
+                'subject': {'id': subject_id, 'name': subject_name},
+                'exam_type': {'name': exam_type},
+            },
+        })
+
+    for payload in payloads.values():
+        payload['marks_by_semester'] = dict(payload['marks_by_semester'])
+        payload['semesters'] = sorted(payload['results_by_semester'], reverse=True)
+        payload['marks_semesters'] = sorted(payload['marks_by_semester'], reverse=True)
+    return payloads
+
+
+def student_results(user_id):
+    """Cached payload for ``user_id``, or None when the user has no Student profile."""
+    version = _versions([user_id])[user_id]
+    key = PAYLOAD_KEY.format(user_id=user_id, version=version)
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    lock_key = f"{key}:lock"
+    locked = cache.add(lock_key, 1, timeout=BUILD_LOCK_TIMEOUT)
+    if not locked:
+        deadline = time.monotonic() + BUILD_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(BUILD_POLL_SECONDS)
+            payload = cache.get(key)
+            if payload is not None:
+                return payload
+        # The builder is stuck or gone; fall through and build without the lock
+    try:
+        payload = build_payloads(Student.objects.filter(user_id=user_id)).get(user_id)
+        if payload is not None:
+            cache.set(key, payload, timeout=PAYLOAD_TIMEOUT)
+        return payload
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def invalidate_student_results(student_ids):
+    """Give each student a new version so their next page view rebuilds."""
+    user_ids = Student.objects.filter(id__in=set(student_ids)).values_list('user_id', flat=True)
+    cache.set_many({VERSION_KEY.format(user_id=user_id): _new_version() for user_id in user_ids}, timeout=None)
+
+
+def warm_student_results(student_ids, batch_size=500):
+    """Build and store payloads for ``student_ids`` under their current versions.
+
+    Returns the number of payloads written.
+    """
+    student_ids = sorted(set(student_ids))
+    written = 0
+    for start in range(0, len(student_ids), batch_size):
+        students = Student.objects.filter(id__in=student_ids[start:start + batch_size])
+        # Versions are read before building so a concurrent edit wins over this warm-up
+        versions = _versions(students.values_list('user_id', flat=True))
+        payloads = build_payloads(students)
+        cache.set_many(
+            {
+                PAYLOAD_KEY.format(user_id=user_id, version=versions[user_id]): payload
+                for user_id, payload in payloads.items()
+            },
+            timeout=PAYLOAD_TIMEOUT,
+        )
+        written += len(payloads)
+    return written
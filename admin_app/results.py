@@ -0,0 +1,285 @@
+"""
+Result computation.
+
+Computes SubjectResult and SemesterResult rows for a whole cohort
+(department × semester × academic_year) at once. Marks are pulled in a few
+bulk ``values_list`` queries, laid out as NumPy arrays indexed by
+(student, subject, component), and totals, grades and credit-weighted SGPA
+are computed vectorially. Results are written back as upserts, so re-running
+after a marks correction updates rows in place and keeps ``published`` as is.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .models import ExamMarks, ExamSchedule, InternalAssessment, SemesterResult, Subject, SubjectResult
+from .result_cache import invalidate_student_results
+
+RESULTS_BATCH_SIZE = 1000
+
+# Component axis of the marks arrays; also the SubjectResult *_marks fields.
+INTERNAL, EXTERNAL, PRACTICAL = 0, 1, 2
+COMPONENT_FIELDS = ('internal_marks', 'external_marks', 'practical_marks')
+
+# Each InternalAssessment session is averaged across sessions and counted
+# towards the internal component out of this many marks (theory + practical).
+INTERNAL_ASSESSMENT_MAX_MARKS = 50
+
+# Lower bound of each band on the 0-100 total, highest first (SubjectResult.GRADE_CHOICES)
+GRADE_BANDS = [
+    ('A+', 90, Decimal('4.00')),
+    ('A', 80, Decimal('3.70')),
+    ('B+', 70, Decimal('3.30')),
+    ('B', 60, Decimal('3.00')),
+    ('C', 50, Decimal('2.00')),
+    ('F', 0, Decimal('0.00')),
+]
+
+Cohort = namedtuple('Cohort', ['department_id', 'semester', 'academic_year'])
+
+
+def exam_component(exam_type_name):
+    """Map an ExamType name to INTERNAL, EXTERNAL or PRACTICAL."""
+    name = (exam_type_name or '').lower()
+    if 'practical' in name or 'lab' in name:
+        return PRACTICAL
+    if any(word in name for word in ('external', 'end-term', 'end term', 'final', 'university', 'remedial')):
+        return EXTERNAL
+    return INTERNAL
+
+
+def is_remedial(exam_type_name):
+    return 'remedial' in (exam_type_name or '').lower()
+
+
+def grade_totals(totals, cuts=None):
+    """Vectorised grading of a 0-100 ``totals`` array -> (grade codes, gpa values).
+
+    ``cuts`` are the ascending C..A+ floors: the absolute GRADE_BANDS by
+    default, or any array broadcasting against ``totals[..., 5]`` (one row
+    of cut-offs per subject column, say) for relative grading.
+    """
+    ascending = GRADE_BANDS[::-1]
+    if cuts is None:
+        cuts = np.array([floor for _, floor, _ in ascending[1:]], dtype=float)
+    # Number of floors reached: 0 is F, 5 is A+
+    index = (np.asarray(totals)[..., np.newaxis] >= cuts).sum(axis=-1)
+    codes = np.array([grade for grade, _, _ in ascending], dtype=object)
+    points = np.array([float(gpa) for _, _, gpa in ascending])
+    return codes[index], points[index]
+
+
+def _decimal(value):
+    return Decimal(f"{value:.2f}")
+
+
+def cohorts_for_exams(exams):
+    """Distinct cohorts covered by an ExamSchedule queryset."""
+    return [
+        Cohort(*row)
+        for row in exams.values_list('subject__department_id', 'subject__semester', 'academic_year')
+        .order_by().distinct()
+    ]
+
+
+def compute_cohort_results(department_id, semester, academic_year, batch_size=RESULTS_BATCH_SIZE, dry_run=False):
+    """Compute and upsert results for one cohort; returns ``(students, subject_results)``.
+
+    Component marks are summed per (student, subject), except that a remedial
+    attempt replaces the regular external marks when its percentage is higher. The
+    subject total is the percentage of marks obtained over the maximum of the
+    exams the student has marks for. A semester is ``incomplete`` while any of
+    its exams lacks marks for a student who sat the subject.
+    """
+    subjects = list(
+        Subject.objects.filter(department_id=department_id, semester=semester)
+        .order_by('id').values_list('id', 'credits')
+    )
+    exams = list(
+        ExamSchedule.objects.filter(
+            subject__department_id=department_id, subject__semester=semester, academic_year=academic_year,
+        ).exclude(status='cancelled').values_list('id', 'subject_id', 'exam_type__name', 'max_marks')
+    )
+    if not subjects or not exams:
+        return 0, 0
+
+    subject_index = {subject_id: j for j, (subject_id, _) in enumerate(subjects)}
+    credits = np.array([credit for _, credit in subjects], dtype=float)
+    exam_info = {
+        exam_id: (subject_index[subject_id], exam_component(type_name), is_remedial(type_name), max_marks)
+        for exam_id, subject_id, type_name, max_marks in exams
+    }
+
+    marks = list(
+        ExamMarks.objects.filter(
+            exam_schedule_id__in=exam_info, is_marked=True, marks_obtained__isnull=False,
+        ).values_list('student_id', 'exam_schedule_id', 'marks_obtained')
+    )
+    assessments = list(
+        InternalAssessment.objects.filter(
+            subject_offering__subject_id__in=subject_index, academic_year=academic_year,
+        ).values_list('student_id', 'subject_offering__subject_id', 'theory_marks', 'practical_marks')
+    )
+    student_ids = sorted({row[0] for row in marks} | {row[0] for row in assessments})
+    if not student_ids:
+        return 0, 0
+    student_index = {student_id: i for i, student_id in enumerate(student_ids)}
+    shape = (len(student_ids), len(subjects), 3)
+
+    obtained = np.zeros(shape)
+    maximum = np.zeros(shape)
+    # Best remedial attempt as a fraction of its own max_marks; -1 means none
+    remedial_fraction = np.full(shape[:2], -1.0)
+    remedial_max = np.zeros(shape[:2])
+    sat = np.zeros(shape[:2], dtype=bool)
+    marked_exams = np.zeros(shape[:2], dtype=int)
+
+    if marks:
+        rows = np.array([student_index[s] for s, _, _ in marks])
+        info = [exam_info[e] for _, e, _ in marks]
+        cols = np.array([j for j, _, _, _ in info])
+        comps = np.array([c for _, c, _, _ in info])
+        remedial = np.array([r for _, _, r, _ in info])
+        values = np.array([float(m) for _, _, m in marks])
+        max_values = np.array([float(mx) for _, _, _, mx in info])
+
+        regular = ~remedial
+        np.add.at(obtained, (rows[regular], cols[regular], comps[regular]), values[regular])
+        np.add.at(maximum, (rows[regular], cols[regular], comps[regular]), max_values[regular])
+        fractions = np.divide(values, max_values, out=np.zeros(len(values)), where=max_values > 0)
+        np.maximum.at(remedial_fraction, (rows[remedial], cols[remedial]), fractions[remedial])
+        remedial_max[rows[remedial], cols[remedial]] = max_values[remedial]
+        np.add.at(marked_exams, (rows[regular], cols[regular]), 1)
+        sat[rows, cols] = True
+
+        # A remedial attempt supersedes the regular external papers when its
+        # percentage is higher; it is rescaled to the regular external maximum
+        # (or counts out of its own max_marks when there was no regular paper)
+        external_max = maximum[:, :, EXTERNAL]
+        external_fraction = np.divide(obtained[:, :, EXTERNAL], external_max,
+                                      out=np.zeros(shape[:2]), where=external_max > 0)
+        better = (remedial_fraction >= 0) & ((external_max == 0) | (remedial_fraction > external_fraction))
+        scale = np.where(external_max > 0, external_max, remedial_max)
+        obtained[:, :, EXTERNAL] = np.where(better, remedial_fraction * scale, obtained[:, :, EXTERNAL])
+        maximum[:, :, EXTERNAL] = np.where(better, scale, external_max)
+
+    if assessments:
+        rows = np.array([student_index[s] for s, _, _, _ in assessments])
+        cols = np.array([subject_index[j] for _, j, _, _ in assessments])
+        # Same as InternalAssessment.get_total_marks(): missing parts count as 0
+        totals = np.array([float(t or 0) + float(p or 0) for _, _, t, p in assessments])
+        session_sum = np.zeros(shape[:2])
+        session_count = np.zeros(shape[:2])
+        np.add.at(session_sum, (rows, cols), totals)
+        np.add.at(session_count, (rows, cols), 1)
+        has_sessions = session_count > 0
+        obtained[:, :, INTERNAL] += np.divide(session_sum, session_count, out=np.zeros(shape[:2]),
+                                              where=has_sessions)
+        maximum[:, :, INTERNAL] += np.where(has_sessions, INTERNAL_ASSESSMENT_MAX_MARKS, 0)
+        sat |= has_sessions
+
+    # A subject the student sat but with a regular exam still unmarked
+    exams_per_subject = np.bincount(
+        [j for j, _, remedial, _ in exam_info.values() if not remedial], minlength=len(subjects)
+    )
+    missing = sat & (marked_exams < exams_per_subject[np.newaxis, :])
+
+    total_obtained = obtained.sum(axis=2)
+    total_max = maximum.sum(axis=2)
+    percent = np.divide(total_obtained * 100, total_max, out=np.zeros(shape[:2]), where=total_max > 0)
+    percent = np.clip(percent, 0, 100)
+    # Absolute bands unless a GradingPolicy covers the subject
+    from .grading import grade_matrix
+    grades, gpa = grade_matrix(percent, sat, [subject_id for subject_id, _ in subjects], academic_year)
+    passed = grades != 'F'
+
+    weights = credits[np.newaxis, :] * sat
+    credit_sum = weights.sum(axis=1)
+    sgpa = np.divide((gpa * weights).sum(axis=1), credit_sum, out=np.zeros(len(student_ids)), where=credit_sum > 0)
+    failed = (sat & ~passed).any(axis=1)
+    incomplete = missing.any(axis=1)
+
+    if dry_run:
+        return len(student_ids), int(sat.sum())
+
+    semester_rows = [
+        SemesterResult(
+            student_id=student_id,
+            semester=semester,
+            academic_year=academic_year,
+            sgpa=_decimal(sgpa[i]),
+            status='incomplete' if incomplete[i] else ('fail' if failed[i] else 'pass'),
+        )
+        for i, student_id in enumerate(student_ids)
+    ]
+    with transaction.atomic():
+        SemesterResult.objects.bulk_create(
+            semester_rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['student', 'semester', 'academic_year'],
+            update_fields=['sgpa', 'status', 'updated_at'],
+        )
+        result_ids = dict(
+            SemesterResult.objects.filter(
+                student_id__in=student_ids, semester=semester, academic_year=academic_year,
+            ).values_list('student_id', 'id')
+        )
+
+        subject_rows = []
+        for i, j in zip(*np.nonzero(sat)):
+            component_marks = {
+                field: _decimal(obtained[i, j, c]) if maximum[i, j, c] > 0 else None
+                for c, field in enumerate(COMPONENT_FIELDS)
+            }
+            subject_rows.append(SubjectResult(
+                semester_result_id=result_ids[student_ids[i]],
+                subject_id=subjects[j][0],
+                total_marks=_decimal(percent[i, j]),
+                grade=grades[i, j],
+                gpa=_decimal(gpa[i, j]),
+                status='pass' if passed[i, j] else 'fail',
+                **component_marks,
+            ))
+        SubjectResult.objects.bulk_create(
+            subject_rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['semester_result', 'subject'],
+            update_fields=list(COMPONENT_FIELDS) + ['total_marks', 'grade', 'gpa', 'status'],
+        )
+        # Corrections to already published results move CGPA and ranks too;
+        # unpublished ones stay out of the cached pages until publish_results
+        from .standings import refresh_standings
+        refresh_standings(department_id, semester, academic_year, batch_size=batch_size)
+        published_ids = [
+            student_id for student_id in
+            SemesterResult.objects.filter(id__in=result_ids.values(), published=True)
+            .values_list('student_id', flat=True)
+        ]
+        if published_ids:
+            transaction.on_commit(lambda: invalidate_student_results(published_ids))
+    return len(student_ids), len(subject_rows)
+
+
+def compute_results(cohorts, batch_size=RESULTS_BATCH_SIZE, dry_run=False):
+    """Run ``compute_cohort_results`` for each cohort; returns ``{cohort: (students, subject_results)}``."""
+    return {
+        cohort: compute_cohort_results(*cohort, batch_size=batch_size, dry_run=dry_run)
+        for cohort in cohorts
+    }
+
+
+def all_cohorts(department_id=None, semester=None, academic_year=None):
+    """Cohorts with at least one exam, optionally narrowed by any of the keys."""
+    filters = Q()
+    if department_id:
+        filters &= Q(subject__department_id=department_id)
+    if semester:
+        filters &= Q(subject__semester=semester)
+    if academic_year:
+        filters &= Q(academic_year=academic_year)
+    return cohorts_for_exams(ExamSchedule.objects.filter(filters).exclude(status='cancelled'))
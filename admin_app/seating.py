@@ -0,0 +1,135 @@
+"""
+Exam seating planner.
+
+Seats every admit-card holder of a session (ExamSchedules on the same date
+whose times overlap) across a list of rooms. Candidates are bucketed per
+exam and dealt out greedily from a max-heap of remaining bucket sizes, never
+taking the same paper twice in a row, so adjacent seats sit different
+papers whenever the mix allows it. Seat numbers are written back to
+AdmitCard with ``bulk_update`` and room-wise charts are returned for export.
+"""
+import heapq
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+
+from .models import AdmitCard
+
+SEATING_BATCH_SIZE = 1000
+# Seat numbers are "<room>-<NNN>" and AdmitCard.seat_number holds 20 characters
+MAX_ROOM_LENGTH = 15
+
+Seat = namedtuple('Seat', ['room', 'seat_number', 'card_id', 'roll_number', 'name', 'subject_code', 'exam_id'])
+
+
+def exam_sessions(exams):
+    """Group ExamSchedules into sessions of overlapping (date, time) slots.
+
+    A sweep over exams sorted by (date, start) closes a session whenever the
+    next exam starts at or after the latest end seen so far.
+    """
+    sessions, current, current_end = [], [], None
+    for exam in exams.order_by('exam_date', 'start_time', 'end_time'):
+        if current and (exam.exam_date != current[0].exam_date or exam.start_time >= current_end):
+            sessions.append(current)
+            current, current_end = [], None
+        current.append(exam)
+        current_end = max(current_end, exam.end_time) if current_end else exam.end_time
+    if current:
+        sessions.append(current)
+    return sessions
+
+
+def interleave(buckets):
+    """Deal ``{key: [items]}`` into one list avoiding equal keys side by side.
+
+    Always takes from the largest remaining bucket that is not the one just
+    used; O(n log k) for n items in k buckets. Adjacent repeats only happen
+    once a single bucket is all that is left.
+    """
+    heap = [(-len(items), key) for key, items in buckets.items() if items]
+    heapq.heapify(heap)
+    positions = {key: 0 for key in buckets}
+    order, held = [], None
+    while heap:
+        remaining, key = heapq.heappop(heap)
+        order.append(buckets[key][positions[key]])
+        positions[key] += 1
+        if held:
+            heapq.heappush(heap, held)
+            held = None
+        if remaining + 1 < 0:
+            # Sit this bucket out for one seat
+            held = (remaining + 1, key)
+        if not heap and held:
+            heapq.heappush(heap, held)
+            held = None
+    return order
+
+
+def plan_session(exams, rooms):
+    """Seat every valid admit card of ``exams`` into ``rooms``.
+
+    ``rooms`` is an ordered list of ``(room_number, capacity)``. Returns the
+    list of Seat rows in seating order; raises ValueError when the rooms
+    cannot hold everyone.
+    """
+    buckets = defaultdict(list)
+    cards = (
+        AdmitCard.objects.filter(exam_schedule__in=exams, is_valid=True)
+        .order_by('exam_schedule_id', 'student__roll_number')
+        .values_list('id', 'student__roll_number', 'student__name',
+                     'exam_schedule__subject__code', 'exam_schedule_id')
+    )
+    for card_id, roll_number, name, subject_code, exam_id in cards:
+        buckets[exam_id].append((card_id, roll_number, name, subject_code, exam_id))
+
+    candidates = sum(len(items) for items in buckets.values())
+    capacity = sum(seats for _, seats in rooms)
+    if candidates > capacity:
+        raise ValueError(f"{candidates} candidates but only {capacity} seats; add {candidates - capacity} more")
+
+    seats, order = [], iter(interleave(buckets))
+    for room, room_capacity in rooms:
+        for seat in range(1, room_capacity + 1):
+            card = next(order, None)
+            if card is None:
+                return seats
+            seats.append(Seat(room, f"{room}-{seat:03d}", *card))
+    return seats
+
+
+def assign_seats(seats, batch_size=SEATING_BATCH_SIZE):
+    """Write planned seat numbers to AdmitCard in one transaction."""
+    with transaction.atomic():
+        AdmitCard.objects.bulk_update(
+            [AdmitCard(id=seat.card_id, seat_number=seat.seat_number) for seat in seats],
+            ['seat_number'],
+            batch_size=batch_size,
+        )
+    return len(seats)
+
+
+def room_charts(seats):
+    """``{room: [Seat, ...]}`` in seat order, for printing per room."""
+    charts = defaultdict(list)
+    for seat in seats:
+        charts[seat.room].append(seat)
+    return dict(charts)
+
+
+def parse_rooms(specs):
+    """Parse ``["R101:60", "R102:40"]`` into ``[("R101", 60), ("R102", 40)]``."""
+    rooms = []
+    for spec in specs:
+        room, _, capacity = spec.rpartition(':')
+        try:
+            capacity = int(capacity)
+        except ValueError:
+            raise ValueError(f"Invalid room '{spec}', expected ROOM:CAPACITY")
+        if not room or capacity <= 0:
+            raise ValueError(f"Invalid room '{spec}', expected ROOM:CAPACITY")
+        if len(room) > MAX_ROOM_LENGTH:
+            raise ValueError(f"Room '{room}' is longer than {MAX_ROOM_LENGTH} characters")
+        rooms.append((room, capacity))
+    return rooms
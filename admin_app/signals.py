@@ -2,8 +2,21 @@
 Auto-enrollment signal: whenever a Student is saved, ensure they are
 enrolled in all SubjectOfferings that match their current semester,
 division, and department.
+
+Attendance summary signals: keep AttendanceSummary counters in step with
+every Lecture, Attendance and StudentEnrollment write.
+
+Timetable index signals: rebuild the affected weekday of the in-memory
+timetable interval index whenever a slot is written.
+
+Result cache signals: move a student's cached results/marks payload to a
+new version whenever one of their marks rows or published result rows
+changes. Unpublished results are not shown, so writing them costs nothing.
+
+Marks analytics signals: recompute an exam's cached distribution after its
+marks or its max/passing marks change.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 
@@ -17,3 +30,129 @@ def auto_enroll_student(sender, instance, created, **kwargs):
     except Exception:
         # Don't break student save if enrollment fails
         pass
+
+
+def _is_cascade(sender, origin):
+    """True when a delete was cascaded from a parent row (lecture, student...)."""
+    if origin is None:
+        return False
+    origin_model = origin.model if hasattr(origin, 'model') else type(origin)
+    return origin_model is not sender
+
+
+@receiver(post_save, sender='admin_app.Lecture')
+@receiver(post_delete, sender='admin_app.Lecture')
+def refresh_summary_for_lecture(sender, instance, origin=None, **kwargs):
+    """A lecture changes the conducted count for the whole offering."""
+    from admin_app.attendance import refresh_for_lecture
+    if _is_cascade(sender, origin):
+        return
+    refresh_for_lecture(instance)
+
+
+@receiver(post_save, sender='admin_app.Attendance')
+@receiver(post_delete, sender='admin_app.Attendance')
+def refresh_summary_for_attendance(sender, instance, origin=None, **kwargs):
+    """Recount the (student, offering) pair touched by an attendance write."""
+    from admin_app.attendance import refresh_for_student
+    from admin_app.models import Lecture
+
+    # Lecture deletes recount the offering; student deletes drop the counters
+    if _is_cascade(sender, origin):
+        return
+    offering_id = (
+        Lecture.objects.filter(id=instance.lecture_id)
+        .values_list('subject_offering_id', flat=True)
+        .first()
+    )
+    refresh_for_student(instance.student_id, offering_id)
+
+
+@receiver(post_save, sender='admin_app.StudentEnrollment')
+@receiver(post_delete, sender='admin_app.StudentEnrollment')
+def refresh_summary_for_enrollment(sender, instance, origin=None, **kwargs):
+    """New or reactivated enrollments pick up the offering's conducted count."""
+    from admin_app.attendance import refresh_for_student
+    if _is_cascade(sender, origin):
+        return
+    refresh_for_student(instance.student_id, instance.subject_offering_id)
+
+
+@receiver(pre_save, sender='admin_app.Timetable')
+def remember_timetable_day(sender, instance, **kwargs):
+    """Note the slot's stored weekday so a moved slot also clears its old day."""
+    if instance.pk:
+        instance._previous_day = (
+            sender.objects.filter(pk=instance.pk).values_list('day', flat=True).first()
+        )
+
+
+@receiver(post_save, sender='admin_app.Timetable')
+@receiver(post_delete, sender='admin_app.Timetable')
+def invalidate_timetable_day(sender, instance, **kwargs):
+    from admin_app.timetable import invalidate_timetable_index
+    days = {instance.day, getattr(instance, '_previous_day', None)} - {None}
+    invalidate_timetable_index(*days)
+
+
+@receiver(post_save, sender='admin_app.SubjectOffering')
+@receiver(post_save, sender='admin_app.Subject')
+def invalidate_timetable_offerings(sender, instance, created, **kwargs):
+    """Faculty, division or cohort changes re-key every slot of the offering."""
+    from admin_app.timetable import invalidate_timetable_index
+    if not created:
+        invalidate_timetable_index()
+
+
+@receiver(post_save, sender='admin_app.SemesterResult')
+@receiver(post_delete, sender='admin_app.SemesterResult')
+def invalidate_results_for_semester(sender, instance, **kwargs):
+    """A published result changed, or one that still has a standing was just unpublished."""
+    from django.db import transaction
+    from admin_app.models import ResultStanding
+    from admin_app.result_cache import invalidate_student_results
+    if instance.published or ResultStanding.objects.filter(semester_result_id=instance.pk).exists():
+        transaction.on_commit(lambda: invalidate_student_results([instance.student_id]))
+
+
+@receiver(post_save, sender='admin_app.ExamMarks')
+@receiver(post_delete, sender='admin_app.ExamMarks')
+def invalidate_results_for_student(sender, instance, **kwargs):
+    from django.db import transaction
+    from admin_app.result_cache import invalidate_student_results
+    transaction.on_commit(lambda: invalidate_student_results([instance.student_id]))
+
+
+@receiver(post_save, sender='admin_app.SubjectResult')
+@receiver(post_delete, sender='admin_app.SubjectResult')
+@receiver(post_save, sender='admin_app.ResultStanding')
+@receiver(post_delete, sender='admin_app.ResultStanding')
+def invalidate_results_for_semester_result(sender, instance, origin=None, **kwargs):
+    """Rows hanging off a SemesterResult; cascades are covered by the parent's delete."""
+    from django.db import transaction
+    from admin_app.models import SemesterResult
+    from admin_app.result_cache import invalidate_student_results
+    if _is_cascade(sender, origin):
+        return
+    student_ids = list(
+        SemesterResult.objects.filter(pk=instance.semester_result_id, published=True)
+        .values_list('student_id', flat=True)
+    )
+    if student_ids:
+        transaction.on_commit(lambda: invalidate_student_results(student_ids))
+
+
+@receiver(post_save, sender='admin_app.ExamMarks')
+@receiver(post_delete, sender='admin_app.ExamMarks')
+def invalidate_analytics_for_marks(sender, instance, **kwargs):
+    from django.db import transaction
+    from admin_app.marks_analytics import invalidate_exam_analytics
+    transaction.on_commit(lambda: invalidate_exam_analytics([instance.exam_schedule_id]))
+
+
+@receiver(post_save, sender='admin_app.ExamSchedule')
+def invalidate_analytics_for_exam(sender, instance, created, **kwargs):
+    from django.db import transaction
+    from admin_app.marks_analytics import invalidate_exam_analytics
+    if not created:
+        transaction.on_commit(lambda: invalidate_exam_analytics([instance.id]))
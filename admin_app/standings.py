@@ -0,0 +1,157 @@
+"""
+CGPA and class standing.
+
+Keeps one ResultStanding row per published SemesterResult. CGPA is a
+credit-weighted grouped aggregate over the published SubjectResults up to
+that semester, counting only the latest attempt of a repeated semester.
+Division and department ranks and the percentile come from database window
+functions over the cohort, so nothing is ranked in Python and the student
+results page reads a single precomputed row. Standings are refreshed once per
+cohort by ``publish_results`` and the compute/regrade paths, never per saved
+result.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum, Window
+from django.db.models.functions import Cast, PercentRank, Rank
+from django.utils import timezone
+
+from .models import ResultStanding, SemesterResult, SubjectResult
+from .result_cache import invalidate_student_results, warm_student_results
+from .results import Cohort
+
+STANDINGS_BATCH_SIZE = 1000
+
+
+def cohort_results(department_id, semester, academic_year):
+    """Published semester results of one department cohort."""
+    return SemesterResult.objects.filter(
+        student__degree_program__department_id=department_id,
+        semester=semester,
+        academic_year=academic_year,
+        published=True,
+    )
+
+
+def cohorts_for_results(semester_results):
+    """Distinct standing cohorts covered by a SemesterResult queryset."""
+    return [
+        Cohort(*row)
+        for row in semester_results.values_list(
+            'student__degree_program__department_id', 'semester', 'academic_year'
+        ).order_by().distinct()
+        if row[0] is not None
+    ]
+
+
+def refresh_standings(department_id, semester, academic_year, batch_size=STANDINGS_BATCH_SIZE):
+    """Recompute CGPA, ranks and percentile for one cohort; returns rows written.
+
+    Three queries regardless of cohort size: the cohort's result ids, one
+    grouped aggregate for CGPA, and one windowed select for the ranks.
+    Unpublished results get no standing (any stale row is removed).
+    """
+    results = dict(cohort_results(department_id, semester, academic_year).values_list('student_id', 'id'))
+    with transaction.atomic():
+        stale = ResultStanding.objects.filter(
+            semester_result__student__degree_program__department_id=department_id,
+            semester_result__semester=semester,
+            semester_result__academic_year=academic_year,
+        ).exclude(semester_result_id__in=results.values())
+        affected = set(results) | set(stale.values_list('semester_result__student_id', flat=True))
+        stale.delete()
+        # Every rank in the cohort may move, so every cached results page is stale
+        transaction.on_commit(lambda: invalidate_student_results(affected))
+        if not results:
+            return 0
+
+        # A repeated semester counts once: its newest published attempt up to this year
+        latest_attempt = (
+            SemesterResult.objects.filter(
+                student_id=OuterRef('semester_result__student_id'),
+                semester=OuterRef('semester_result__semester'),
+                academic_year__lte=academic_year,
+                published=True,
+            )
+            .order_by('-academic_year')
+            .values('academic_year')[:1]
+        )
+        weighted_points = ExpressionWrapper(
+            F('gpa') * F('subject__credits'), output_field=DecimalField(max_digits=8, decimal_places=2),
+        )
+        totals = (
+            SubjectResult.objects.filter(
+                semester_result__student_id__in=results,
+                semester_result__semester__lte=semester,
+                semester_result__published=True,
+                semester_result__academic_year=Subquery(latest_attempt),
+            )
+            .values('semester_result__student_id')
+            .annotate(points=Sum(weighted_points), credits=Sum('subject__credits'))
+            .order_by()
+        )
+        standings = []
+        for row in totals:
+            credits = row['credits'] or 0
+            cgpa = (Decimal(row['points']) / credits) if credits else Decimal('0')
+            standings.append(ResultStanding(
+                semester_result_id=results[row['semester_result__student_id']],
+                cgpa=cgpa.quantize(Decimal('0.01')),
+                credits_counted=credits,
+            ))
+        ResultStanding.objects.bulk_create(
+            standings,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['semester_result'],
+            update_fields=['cgpa', 'credits_counted', 'updated_at'],
+        )
+
+        division = F('semester_result__student__division')
+        # Ordering on the float cast sidesteps SQLite's CAST(... AS NUMERIC)
+        # wrapping of decimal window orderings; ties rank the same either way.
+        by_cgpa = Cast('cgpa', FloatField())
+        ranked = (
+            ResultStanding.objects.filter(semester_result_id__in=results.values())
+            .annotate(
+                rank_in_division=Window(Rank(), partition_by=[division], order_by=by_cgpa.desc()),
+                size_of_division=Window(Count('id'), partition_by=[division]),
+                rank_in_department=Window(Rank(), order_by=by_cgpa.desc()),
+                size_of_department=Window(Count('id')),
+                percent_rank=Window(PercentRank(), order_by=by_cgpa.asc()),
+            )
+            .values_list('id', 'rank_in_division', 'size_of_division', 'rank_in_department',
+                         'size_of_department', 'percent_rank')
+        )
+        updates = [
+            ResultStanding(
+                id=standing_id,
+                division_rank=division_rank,
+                division_size=division_size,
+                department_rank=department_rank,
+                department_size=department_size,
+                percentile=Decimal(f"{(percent_rank or 0) * 100:.2f}"),
+            )
+            for standing_id, division_rank, division_size, department_rank, department_size, percent_rank in ranked
+        ]
+        ResultStanding.objects.bulk_update(
+            updates,
+            ['division_rank', 'division_size', 'department_rank', 'department_size', 'percentile'],
+            batch_size=batch_size,
+        )
+    return len(updates)
+
+
+def publish_results(semester_results, result_date=None):
+    """Publish a SemesterResult queryset, refresh the affected standings and
+    warm the students' cached results pages ahead of the result-day rush.
+
+    Returns ``(published_count, standings_written)``.
+    """
+    cohorts = cohorts_for_results(semester_results)
+    student_ids = list(semester_results.values_list('student_id', flat=True))
+    published = semester_results.update(published=True, result_date=result_date or timezone.localdate())
+    written = sum(refresh_standings(*cohort) for cohort in cohorts)
+    transaction.on_commit(lambda: warm_student_results(student_ids))
+    return published, written
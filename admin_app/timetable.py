@@ -0,0 +1,414 @@
+"""
+Timetable conflict engine.
+
+Slots are loaded with a single ``values()`` query, sorted once by
+(weekday, start_time) and swept left to right. For every resource a slot
+occupies (its division, room and faculty) a min-heap of still-running slots
+is kept; finished slots are popped as the sweep advances, so whatever is left
+in the heap overlaps the incoming slot. That is O(n log n + k) for n slots
+and k reported conflicts instead of comparing every pair.
+
+For point queries ("who is busy on Monday at 10:15?") each weekday is also
+kept as a precomputed :class:`DayIndex`. It is built lazily per process and
+rebuilt one day at a time after a write to a Timetable row on that day
+commits; see :func:`invalidate_timetable_index`.
+"""
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Timetable
+
+WEEKDAY_INDEX = {day: index for index, (day, _) in enumerate(Timetable.DAY_CHOICES)}
+LECTURE_TYPE_LABELS = dict(Timetable.TYPE_CHOICES)
+# Seconds a worker keeps a DayIndex before rebuilding it regardless of its version
+INDEX_MAX_AGE = 300
+
+SLOT_FIELDS = (
+    'id', 'day', 'start_time', 'end_time', 'room_number', 'lecture_type',
+    'subject_offering_id', 'subject_offering__division', 'subject_offering__academic_year',
+    'subject_offering__faculty_id', 'subject_offering__faculty__name',
+    'subject_offering__subject__name', 'subject_offering__subject__code',
+    'subject_offering__subject__semester', 'subject_offering__subject__department_id',
+    'subject_offering__subject__department__name',
+)
+
+# Each dimension maps a slot row to the resource it occupies (None = not checked).
+CONFLICT_DIMENSIONS = {
+    # A division only clashes with itself inside the same cohort, "A" in CE
+    # semester 5 is a different group of students from "A" in IT semester 3.
+    'division': lambda row: (
+        row['subject_offering__academic_year'],
+        row['subject_offering__subject__department_id'],
+        row['subject_offering__subject__semester'],
+        row['subject_offering__division'],
+    ),
+    'room': lambda row: row['room_number'] or None,
+    'faculty': lambda row: row['subject_offering__faculty_id'],
+}
+
+DIMENSION_LABELS = {
+    'division': lambda row: (
+        f"{row['subject_offering__subject__department__name'] or 'N/A'} · "
+        f"Sem {row['subject_offering__subject__semester']} · "
+        f"Div {row['subject_offering__division']} ({row['subject_offering__academic_year']})"
+    ),
+    'room': lambda row: row['room_number'],
+    'faculty': lambda row: row['subject_offering__faculty__name'] or 'N/A',
+}
+
+
+def load_slots(queryset=None):
+    """Fetch timetable slots as plain dicts in sweep order (one query)."""
+    if queryset is None:
+        queryset = Timetable.objects.all()
+    rows = list(queryset.order_by().values(*SLOT_FIELDS))
+    rows.sort(key=lambda row: (WEEKDAY_INDEX.get(row['day'], len(WEEKDAY_INDEX)), row['start_time']))
+    return rows
+
+
+def slot_payload(row):
+    """Display/JSON representation of a slot row."""
+    return {
+        'id': row['id'],
+        'subject': row['subject_offering__subject__name'],
+        'code': row['subject_offering__subject__code'],
+        'department': row['subject_offering__subject__department__name'] or 'N/A',
+        'division': row['subject_offering__division'],
+        'time': f"{row['start_time'].strftime('%H:%M')} – {row['end_time'].strftime('%H:%M')}",
+        'type': LECTURE_TYPE_LABELS.get(row['lecture_type'], row['lecture_type']),
+        'room': row['room_number'] or 'N/A',
+        'faculty': row['subject_offering__faculty__name'] or 'N/A',
+    }
+
+
+def _conflict(kind, row_a, row_b, payloads):
+    for row in (row_a, row_b):
+        if row['id'] not in payloads:
+            payloads[row['id']] = slot_payload(row)
+    conflict = {
+        'kind': kind,
+        'day': row_a['day'].capitalize(),
+        'slot_a': payloads[row_a['id']],
+        'slot_b': payloads[row_b['id']],
+    }
+    if kind == 'division':
+        conflict['division'] = row_a['subject_offering__division']
+    elif kind == 'room':
+        conflict['room'] = row_a['room_number']
+    elif kind == 'faculty':
+        conflict['faculty'] = row_a['subject_offering__faculty__name'] or 'N/A'
+    return conflict
+
+
+def find_conflicts(rows, dimensions=CONFLICT_DIMENSIONS):
+    """Sweep sorted slot rows and report overlaps per dimension.
+
+    ``rows`` must already be in (weekday, start_time) order, as returned by
+    :func:`load_slots`. Returns ``{dimension: [conflict, ...]}``; touching
+    slots (one ends exactly when the next starts) are not conflicts.
+    """
+    conflicts = {kind: [] for kind in dimensions}
+    active = defaultdict(list)  # (kind, day, key) -> heap of (end_time, seq, row)
+    payloads = {}
+
+    for seq, row in enumerate(rows):
+        for kind, key_func in dimensions.items():
+            key = key_func(row)
+            if key is None:
+                continue
+            heap = active[(kind, row['day'], key)]
+            while heap and heap[0][0] <= row['start_time']:
+                heapq.heappop(heap)
+            for _, _, other in sorted(heap, key=lambda item: item[1]):
+                conflicts[kind].append(_conflict(kind, other, row, payloads))
+            heapq.heappush(heap, (row['end_time'], seq, row))
+    return conflicts
+
+
+def slot_clashes(offering, day, start_time, end_time, room_number=None, exclude_id=None):
+    """Existing slots a new (or edited) slot would collide with, by dimension.
+
+    One range query on (day, start_time, end_time) restricted to slots that
+    share the room, the faculty or the cohort division; ``offering`` may be
+    unsaved. Returns ``{dimension: [slot payload, ...]}`` with empty
+    dimensions omitted.
+    """
+    shared = (
+        Q(subject_offering__faculty_id=offering.faculty_id)
+        | Q(
+            subject_offering__academic_year=offering.academic_year,
+            subject_offering__subject__department_id=offering.subject.department_id,
+            subject_offering__subject__semester=offering.subject.semester,
+            subject_offering__division=offering.division,
+        )
+    )
+    if room_number:
+        shared |= Q(room_number=room_number)
+    overlapping = Timetable.objects.filter(
+        day=day, start_time__lt=end_time, end_time__gt=start_time,
+    ).filter(shared)
+    if exclude_id:
+        overlapping = overlapping.exclude(id=exclude_id)
+
+    candidate = {
+        'room_number': room_number,
+        'subject_offering__faculty_id': offering.faculty_id,
+        'subject_offering__academic_year': offering.academic_year,
+        'subject_offering__subject__department_id': offering.subject.department_id,
+        'subject_offering__subject__semester': offering.subject.semester,
+        'subject_offering__division': offering.division,
+    }
+    clashes = defaultdict(list)
+    for row in load_slots(overlapping):
+        for kind, key_func in CONFLICT_DIMENSIONS.items():
+            key = key_func(candidate)
+            if key is not None and key == key_func(row):
+                clashes[kind].append(slot_payload(row))
+    return dict(clashes)
+
+
+def group_by_day(rows):
+    """Split sweep-ordered rows into an ordered {day: [row, ...]} mapping."""
+    by_day = {day: [] for day, _ in Timetable.DAY_CHOICES}
+    for row in rows:
+        by_day.setdefault(row['day'], []).append(row)
+    return by_day
+
+
+def gap_analysis(rows):
+    """Idle time between consecutive slots, per day (rows in sweep order)."""
+    analysis = {}
+    for day, slots in group_by_day(rows).items():
+        gaps = []
+        total_gap_minutes = 0
+        for prev, curr in zip(slots, slots[1:]):
+            end_dt = datetime.combine(date(2000, 1, 1), prev['end_time'])
+            start_dt = datetime.combine(date(2000, 1, 1), curr['start_time'])
+            gap_min = int((start_dt - end_dt).total_seconds() / 60)
+            if gap_min > 0:
+                gaps.append({
+                    'after': prev['subject_offering__subject__name'],
+                    'before': curr['subject_offering__subject__name'],
+                    'minutes': gap_min,
+                })
+                total_gap_minutes += gap_min
+        if slots:
+            analysis[day.capitalize()] = {
+                'num_classes': len(slots),
+                'gaps': gaps,
+                'total_gap_minutes': total_gap_minutes,
+            }
+    return analysis
+
+
+def filter_slots(queryset, department=None, semester=None):
+    """Apply the optimizer's department/semester filters. Raises ValueError on bad input."""
+    if department:
+        queryset = queryset.filter(subject_offering__subject__department_id=int(department))
+    if semester:
+        queryset = queryset.filter(subject_offering__subject__semester=int(semester))
+    return queryset
+
+
+# ============================================================================
+# PER-DAY INTERVAL INDEX
+# ============================================================================
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+class DayIndex:
+    """Elementary-interval index over one weekday's slots.
+
+    The day is cut at every slot start and end; each resulting segment records
+    which slots run through it, per dimension and resource. A point query is a
+    single bisect over the cut points, O(log n), plus the size of the answer.
+    """
+
+    def __init__(self, day, rows, dimensions=CONFLICT_DIMENSIONS):
+        self.day = day
+        self.dimensions = tuple(dimensions)
+        self.rows = {row['id']: row for row in rows}
+        self.boundaries = sorted({t for row in rows for t in (row['start_time'], row['end_time'])})
+        self.segments = [{kind: {} for kind in dimensions} for _ in self.boundaries[1:]]
+        for row in rows:
+            first = bisect_left(self.boundaries, row['start_time'])
+            last = bisect_left(self.boundaries, row['end_time'])
+            for kind, key_func in dimensions.items():
+                key = key_func(row)
+                if key is None:
+                    continue
+                for segment in self.segments[first:last]:
+                    segment[kind].setdefault(key, []).append(row['id'])
+
+    def _segment_at(self, at):
+        position = bisect_right(self.boundaries, at) - 1
+        if 0 <= position < len(self.segments):
+            return self.segments[position]
+        return None
+
+    def busy_at(self, at):
+        """``{dimension: {resource: [row, ...]}}`` for everything running at ``at``."""
+        segment = self._segment_at(at)
+        if segment is None:
+            return {kind: {} for kind in self.dimensions}
+        return {
+            kind: {key: [self.rows[slot_id] for slot_id in ids] for key, ids in resources.items()}
+            for kind, resources in segment.items()
+        }
+
+    def is_busy(self, kind, key, at):
+        segment = self._segment_at(at)
+        return bool(segment) and key in segment[kind]
+
+    def windows(self):
+        """Yield ``(start, end, segment)`` for each elementary segment, in order."""
+        return zip(self.boundaries, self.boundaries[1:], self.segments)
+
+
+class TimetableIndex:
+    """Per-process cache of :class:`DayIndex` objects, one per weekday.
+
+    Each day carries a version number kept in the shared default cache, so a
+    committed write in one worker makes every worker rebuild just that day on
+    its next read. A day is also rebuilt once it is ``max_age`` seconds old,
+    which bounds staleness should a version key ever be evicted.
+    """
+
+    VERSION_KEY = 'timetable_index:{day}'
+
+    def __init__(self, max_age=INDEX_MAX_AGE):
+        self.max_age = max_age
+        self._days = {}  # day -> (version, built_at, DayIndex)
+
+    def day(self, day):
+        version = cache.get(self.VERSION_KEY.format(day=day), 0)
+        cached = self._days.get(day)
+        if cached is None or cached[0] != version or time.monotonic() - cached[1] > self.max_age:
+            rows = load_slots(Timetable.objects.filter(day=day))
+            cached = self._days[day] = (version, time.monotonic(), DayIndex(day, rows))
+        return cached[2]
+
+    def all_days(self):
+        return {day: self.day(day) for day, _ in Timetable.DAY_CHOICES}
+
+    def busy_at(self, day, at):
+        return self.day(day).busy_at(at)
+
+    def invalidate(self, *days):
+        for day in set(days):
+            key = self.VERSION_KEY.format(day=day)
+            if not cache.add(key, 1, timeout=None):
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    cache.set(key, 1, timeout=None)
+            self._days.pop(day, None)
+
+
+timetable_index = TimetableIndex()
+
+
+def invalidate_timetable_index(*days):
+    """Mark weekdays stale (all of them when none are given) once the current transaction commits.
+
+    Bumping before commit would let a concurrent reader rebuild from the old
+    rows and keep them under the new version.
+    """
+    days = days or [day for day, _ in Timetable.DAY_CHOICES]
+    transaction.on_commit(lambda: timetable_index.invalidate(*days))
+
+
+def busy_report(day, at):
+    """JSON-ready view of :meth:`DayIndex.busy_at`, labelled per resource."""
+    busy = timetable_index.busy_at(day, at)
+    return {
+        kind: [
+            {'label': DIMENSION_LABELS[kind](rows[0]), 'slots': [slot_payload(row) for row in rows]}
+            for rows in resources.values()
+        ]
+        for kind, resources in busy.items()
+    }
+
+
+def faculty_clash_windows(indexes=None):
+    """Time windows in which a faculty member is booked into more than one slot.
+
+    Adjacent segments with the same faculty and the same set of slots are
+    merged, so each clash is reported once with its full extent.
+    """
+    if indexes is None:
+        indexes = timetable_index.all_days()
+    windows = []
+    for day, index in indexes.items():
+        open_windows = {}  # faculty_id -> window still being extended
+        for start, end, segment in index.windows():
+            clashing = {key: ids for key, ids in segment['faculty'].items() if len(ids) > 1}
+            for key in list(open_windows):
+                window = open_windows[key]
+                if window['end'] != start or tuple(clashing.get(key, ())) != window['slot_ids']:
+                    windows.append(open_windows.pop(key))
+            for key, ids in clashing.items():
+                if key in open_windows:
+                    open_windows[key]['end'] = end
+                else:
+                    rows = [index.rows[slot_id] for slot_id in ids]
+                    open_windows[key] = {
+                        'day': day.capitalize(),
+                        'faculty': DIMENSION_LABELS['faculty'](rows[0]),
+                        'start': start,
+                        'end': end,
+                        'slot_ids': tuple(ids),
+                        'slots': [slot_payload(row) for row in rows],
+                    }
+        windows.extend(open_windows.values())
+    for window in windows:
+        window['time'] = f"{window['start'].strftime('%H:%M')} – {window['end'].strftime('%H:%M')}"
+    return windows
+
+
+def room_occupancy(indexes=None, first_hour=8, last_hour=18):
+    """Hour-by-hour room usage for a heatmap.
+
+    Returns ``(hours, rows)`` where each row is
+    ``{'room', 'utilization', 'days': [{'day', 'cells': [percent, ...]}, ...]}``
+    and each cell is the share of that clock hour the room is occupied.
+    """
+    if indexes is None:
+        indexes = timetable_index.all_days()
+    hours = list(range(first_hour, last_hour))
+    busy_minutes = defaultdict(lambda: defaultdict(lambda: [0] * len(hours)))
+
+    for day, index in indexes.items():
+        for start, end, segment in index.windows():
+            if not segment['room']:
+                continue
+            seg_start, seg_end = _minutes(start), _minutes(end)
+            for position, hour in enumerate(hours):
+                overlap = min(seg_end, (hour + 1) * 60) - max(seg_start, hour * 60)
+                if overlap <= 0:
+                    continue
+                for room in segment['room']:
+                    busy_minutes[room][day][position] += overlap
+
+    days = list(indexes)
+    rows = []
+    for room in sorted(busy_minutes):
+        total = sum(sum(busy_minutes[room][day]) for day in days)
+        rows.append({
+            'room': room,
+            'utilization': round(100 * total / (60 * len(hours) * len(days))) if days else 0,
+            'days': [
+                {'day': day.capitalize(), 'cells': [round(m * 100 / 60) for m in busy_minutes[room][day]]}
+                for day in days
+            ],
+        })
+    return hours, rows
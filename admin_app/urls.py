@@ -38,6 +38,7 @@ urlpatterns = [
     path("admin_dashboard/manage_exams/", exam_views.manage_exams, name="manage_exams"),
     path("admin_dashboard/manage_exams/add/", exam_views.add_exam, name="add_exam"),
     path("admin_dashboard/manage_exams/<int:exam_id>/delete/", exam_views.delete_exam, name="delete_exam"),
+    path("admin_dashboard/manage_exams/analytics/", exam_views.exams_analytics, name="exams_analytics"),
 
     # Database Chat Assistant
     path("database-chat/", chat_views.database_chat, name="database_chat"),
@@ -46,4 +47,10 @@ urlpatterns = [
 
     # Timetable Conflict Optimizer
     path("admin_dashboard/timetable_conflicts/", views.timetable_conflicts, name="timetable_conflicts"),
+    path("admin_dashboard/timetable_conflicts/api/", views.timetable_conflicts_api, name="timetable_conflicts_api"),
+    path("admin_dashboard/timetable_utilization/", views.timetable_utilization, name="timetable_utilization"),
+    path("admin_dashboard/timetable_busy/api/", views.timetable_busy_api, name="timetable_busy_api"),
+
+    # Fee Collections
+    path("admin_dashboard/fee_collections/", views.fee_collections, name="fee_collections"),
 ]
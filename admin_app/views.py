@@ -4,13 +4,18 @@ from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import authenticate, login, logout
 from django.db.models import Q
-from datetime import date, datetime
+from datetime import date, time
 
 
 from registration.models import CustomUser
 
+from .fee_snapshot import collections_overview
 from .forms import FacultyForm, StudentForm, NotificationForm
 from .models import Attendance, Faculty, Student, Notification, LeaveRequest, AttendanceFaculty, Timetable, Department, DegreeProgram, Subject, SubjectOffering
+from .timetable import (
+    WEEKDAY_INDEX, busy_report, faculty_clash_windows, filter_slots, find_conflicts,
+    gap_analysis, load_slots, room_occupancy, slot_clashes, timetable_index,
+)
 
 @staff_member_required
 def admin_dashboard(request):
@@ -423,7 +428,7 @@ def add_timetable(request):
 
             subject_offering = None
             if subject_offering_id:
-                subject_offering = SubjectOffering.objects.get(id=subject_offering_id)
+                subject_offering = SubjectOffering.objects.select_related('subject').get(id=subject_offering_id)
             else:
                 if not all([subject_id, faculty_id, academic_year, division]):
                     messages.error(request, "Please select subject, faculty, academic year, and division.")
@@ -431,18 +436,40 @@ def add_timetable(request):
 
                 subject = Subject.objects.get(id=subject_id)
                 faculty = Faculty.objects.get(id=faculty_id)
-                subject_offering, _ = SubjectOffering.objects.get_or_create(
-                    subject=subject,
-                    academic_year=academic_year,
-                    division=division,
-                    defaults={'faculty': faculty}
+                # Not saved yet: a rejected slot must not leave a new offering behind
+                subject_offering = SubjectOffering.objects.filter(
+                    subject=subject, academic_year=academic_year, division=division,
+                ).first() or SubjectOffering(
+                    subject=subject, academic_year=academic_year, division=division, faculty=faculty,
                 )
-            
+
+            try:
+                start, end = time.fromisoformat(start_time), time.fromisoformat(end_time)
+            except (TypeError, ValueError):
+                messages.error(request, "Please enter valid start and end times.")
+                return redirect('admin_app:manage_timetable')
+            if start >= end:
+                messages.error(request, "End time must be after start time.")
+                return redirect('admin_app:manage_timetable')
+
+            clashes = slot_clashes(subject_offering, day, start, end, room_number)
+            if clashes:
+                details = "; ".join(
+                    f"{kind} clash with {slot['code']} ({slot['time']}, Div {slot['division']}, Room {slot['room']})"
+                    for kind, slots in clashes.items() for slot in slots
+                )
+                if not request.POST.get('allow_conflicts'):
+                    messages.error(request, f"Timetable entry not added: {details}")
+                    return redirect('admin_app:manage_timetable')
+                messages.warning(request, f"Added despite conflicts: {details}")
+
+            if subject_offering.pk is None:
+                subject_offering.save()
             timetable = Timetable.objects.create(
                 subject_offering=subject_offering,
                 day=day,
-                start_time=start_time,
-                end_time=end_time,
+                start_time=start,
+                end_time=end,
                 lecture_type=lecture_type,
                 room_number=room_number
             )
@@ -540,132 +567,82 @@ def timetable_conflicts(request):
     dept_id = request.GET.get('department')
     semester = request.GET.get('semester')
 
-    timetable_qs = Timetable.objects.select_related(
-        'subject_offering__subject',
-        'subject_offering__subject__department',
-        'subject_offering__faculty',
-    ).order_by('day', 'start_time')
-
-    if dept_id:
-        timetable_qs = timetable_qs.filter(
-            subject_offering__subject__department_id=dept_id
-        )
-    if semester:
-        timetable_qs = timetable_qs.filter(
-            subject_offering__subject__semester=int(semester)
-        )
-
-    days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
-    conflicts = []
-    day_schedules = {}
+    try:
+        timetable_qs = filter_slots(Timetable.objects.all(), dept_id, semester)
+    except ValueError:
+        messages.error(request, "Invalid department or semester filter.")
+        return redirect('admin_app:timetable_conflicts')
 
-    for day in days:
-        slots = list(timetable_qs.filter(day=day))
-        day_schedules[day] = slots
-
-        # Group by division to catch real in-division clashes
-        from collections import defaultdict
-        by_div = defaultdict(list)
-        for s in slots:
-            by_div[s.subject_offering.division].append(s)
-
-        for div, div_slots in by_div.items():
-            for i in range(len(div_slots)):
-                for j in range(i + 1, len(div_slots)):
-                    a = div_slots[i]
-                    b = div_slots[j]
-                    if a.start_time < b.end_time and b.start_time < a.end_time:
-                        conflicts.append({
-                            'day': day.capitalize(),
-                            'division': div,
-                            'slot_a': {
-                                'subject': a.subject_offering.subject.name,
-                                'code': a.subject_offering.subject.code,
-                                'department': a.subject_offering.subject.department.name if a.subject_offering.subject.department else 'N/A',
-                                'time': f"{a.start_time.strftime('%H:%M')} – {a.end_time.strftime('%H:%M')}",
-                                'type': a.get_lecture_type_display(),
-                                'room': a.room_number or 'N/A',
-                                'faculty': a.subject_offering.faculty.name if a.subject_offering.faculty else 'N/A',
-                            },
-                            'slot_b': {
-                                'subject': b.subject_offering.subject.name,
-                                'code': b.subject_offering.subject.code,
-                                'department': b.subject_offering.subject.department.name if b.subject_offering.subject.department else 'N/A',
-                                'time': f"{b.start_time.strftime('%H:%M')} – {b.end_time.strftime('%H:%M')}",
-                                'type': b.get_lecture_type_display(),
-                                'room': b.room_number or 'N/A',
-                                'faculty': b.subject_offering.faculty.name if b.subject_offering.faculty else 'N/A',
-                            },
-                        })
-
-    # Room collision detection: same room, overlapping time
-    room_conflicts = []
-    for day in days:
-        slots = day_schedules[day]
-        room_slots = [s for s in slots if s.room_number]
-        for i in range(len(room_slots)):
-            for j in range(i + 1, len(room_slots)):
-                a = room_slots[i]
-                b = room_slots[j]
-                if a.room_number == b.room_number and a.start_time < b.end_time and b.start_time < a.end_time:
-                    room_conflicts.append({
-                        'day': day.capitalize(),
-                        'room': a.room_number,
-                        'slot_a': {
-                            'subject': a.subject_offering.subject.name,
-                            'code': a.subject_offering.subject.code,
-                            'division': a.subject_offering.division,
-                            'time': f"{a.start_time.strftime('%H:%M')} – {a.end_time.strftime('%H:%M')}",
-                            'type': a.get_lecture_type_display(),
-                        },
-                        'slot_b': {
-                            'subject': b.subject_offering.subject.name,
-                            'code': b.subject_offering.subject.code,
-                            'division': b.subject_offering.division,
-                            'time': f"{b.start_time.strftime('%H:%M')} – {b.end_time.strftime('%H:%M')}",
-                            'type': b.get_lecture_type_display(),
-                        },
-                    })
-
-    # Gap analysis per day
-    gap_analysis = {}
-    for day in days:
-        slots = sorted(day_schedules[day], key=lambda s: s.start_time)
-        gaps = []
-        total_gap_minutes = 0
-        for k in range(1, len(slots)):
-            prev_end = slots[k - 1].end_time
-            curr_start = slots[k].start_time
-            end_dt = datetime.combine(date(2000, 1, 1), prev_end)
-            start_dt = datetime.combine(date(2000, 1, 1), curr_start)
-            gap_min = int((start_dt - end_dt).total_seconds() / 60)
-            if gap_min > 0:
-                gaps.append({
-                    'after': slots[k - 1].subject_offering.subject.name,
-                    'before': slots[k].subject_offering.subject.name,
-                    'minutes': gap_min,
-                })
-                total_gap_minutes += gap_min
-        if slots:
-            gap_analysis[day.capitalize()] = {
-                'num_classes': len(slots),
-                'gaps': gaps,
-                'total_gap_minutes': total_gap_minutes,
-            }
-
-    departments = Department.objects.all()
-    total_slots = timetable_qs.count()
+    slots = load_slots(timetable_qs)
+    found = find_conflicts(slots)
 
     context = {
-        'conflicts': conflicts,
-        'conflict_count': len(conflicts),
-        'room_conflicts': room_conflicts,
-        'room_conflict_count': len(room_conflicts),
-        'gap_analysis': gap_analysis,
-        'days': days,
-        'departments': departments,
-        'total_slots': total_slots,
+        'conflicts': found['division'],
+        'conflict_count': len(found['division']),
+        'room_conflicts': found['room'],
+        'room_conflict_count': len(found['room']),
+        'faculty_conflicts': found['faculty'],
+        'faculty_conflict_count': len(found['faculty']),
+        'gap_analysis': gap_analysis(slots),
+        'days': [day for day, _ in Timetable.DAY_CHOICES],
+        'departments': Department.objects.all(),
+        'total_slots': len(slots),
         'selected_department': dept_id,
         'selected_semester': semester,
     }
-    return render(request, 'admin_app/timetable_conflicts.html', context)
\ No newline at end of file
+    return render(request, 'admin_app/timetable_conflicts.html', context)
+
+
+@staff_member_required
+def timetable_conflicts_api(request):
+    """JSON version of the conflict optimizer (same department/semester filters)."""
+    try:
+        timetable_qs = filter_slots(
+            Timetable.objects.all(), request.GET.get('department'), request.GET.get('semester')
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid department or semester filter'}, status=400)
+
+    slots = load_slots(timetable_qs)
+    found = find_conflicts(slots)
+    return JsonResponse({
+        'total_slots': len(slots),
+        'counts': {kind: len(items) for kind, items in found.items()},
+        'conflicts': found,
+    })
+
+
+@staff_member_required
+def timetable_utilization(request):
+    """Faculty clash windows and a room-occupancy heatmap from the interval index."""
+    indexes = timetable_index.all_days()
+    hours, occupancy = room_occupancy(indexes)
+    clashes = faculty_clash_windows(indexes)
+    context = {
+        'hours': hours,
+        'occupancy': occupancy,
+        'faculty_clashes': clashes,
+        'faculty_clash_count': len(clashes),
+        'days': [day for day, _ in Timetable.DAY_CHOICES],
+    }
+    return render(request, 'admin_app/timetable_utilization.html', context)
+
+
+@staff_member_required
+def timetable_busy_api(request):
+    """Who/what is busy at ?day=monday&time=10:15 (faculty, rooms, divisions)."""
+    day = (request.GET.get('day') or '').lower()
+    if day not in WEEKDAY_INDEX:
+        return JsonResponse({'error': 'day must be one of ' + ', '.join(WEEKDAY_INDEX)}, status=400)
+    try:
+        at = time.fromisoformat(request.GET.get('time') or '')
+    except ValueError:
+        return JsonResponse({'error': 'time must be HH:MM'}, status=400)
+    return JsonResponse({'day': day, 'time': at.strftime('%H:%M'), 'busy': busy_report(day, at)})
+
+
+@staff_member_required
+def fee_collections(request):
+    """Fee totals, outstanding and ageing by department, program, semester and year."""
+    context = collections_overview(request.GET.get('academic_year') or None)
+    return render(request, 'admin_app/fee_collections.html', context)
@@ -5,7 +5,8 @@
 # ───────────────────────────────────────────────────────────
 set -e
 
-echo "🗃️  Running database migrations..."
+echo "🗃️  Creating cache table & running database migrations..."
+python manage.py createcachetable
 python manage.py migrate --noinput
 
 echo "🏫 Seeding departments & programs..."
@@ -18,7 +18,9 @@ urlpatterns = [
     path("edit_student_attendance/<int:attendance_id>", views.edit_student_attendance, name="edit_student_attendance"),
     path("mark_student_attendance/", views.mark_student_attendance, name="mark_student_attendance"),
     path("mark_student_attendance2/<int:lecture_id>/", views.mark_student_attendance2, name="mark_student_attendance2"),
+    path("lectures/<int:lecture_id>/attendance/bulk/", views.mark_lecture_attendance_bulk, name="mark_lecture_attendance_bulk"),
     path("enter_marks/", views.enter_marks, name="enter_marks"),
+    path("enter_marks/<int:exam_id>/import/", views.import_marks, name="import_marks"),
     
     # Assignment & Plagiarism Checker
     path("assignments/", views.manage_assignments, name="manage_assignments"),
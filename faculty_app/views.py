@@ -1,17 +1,22 @@
-import csv
+import json
 from collections import defaultdict
 from datetime import datetime, date as date_type
 from functools import wraps
 from time import localtime
-from django.http import HttpResponse
+from django.http import JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 from django.db.models import Q
 from django.utils import timezone
-from admin_app.models import Attendance, AttendanceFaculty, Faculty, Leave, Lecture, Notification, Student, Subject, Timetable, SubjectOffering, StudentEnrollment, ExamSchedule, ExamMarks, Assignment, AssignmentSubmission
+from admin_app.models import Attendance, AttendanceFaculty, Faculty, Leave, Lecture, Notification, Student, Subject, Timetable, SubjectOffering, StudentEnrollment, ExamSchedule, Assignment, AssignmentSubmission
 from admin_app.forms import AttendanceEditForm, LeaveForm, LectureForm, AttendanceFilterForm
+from admin_app.attendance import filter_attendance_export, mark_lecture_attendance, wants_gzip
+from admin_app.exports import EXPORT_CHUNK_SIZE, stream_csv_response
+from admin_app.lectures import non_teaching_reason
+from admin_app.marks import import_exam_marks, roster_with_marks, save_marks_form
+from admin_app.marks_analytics import exam_analytics, subject_analytics
 from django.contrib import messages
 
 from registration.models import CustomUser
@@ -123,7 +128,7 @@ def view_attendance(request):
 
     # Get lectures conducted by this faculty, annotated with attendance stats
     lectures = (
-        Lecture.objects.filter(faculty=faculty)
+        Lecture.objects.filter(faculty=faculty, is_conducted=True)
         .select_related('subject_offering__subject')
         .annotate(
             total_students=Count('attendances'),
@@ -210,54 +215,31 @@ def mark_student_attendance(request):
             selected_date = form.cleaned_data.get("date")
             
             if selected_subject:
-                # Find all timetable entries for this subject and faculty
-                timetable_query = Timetable.objects.filter(
+                # Lectures are created ahead of time by materialize_lectures; only read them here
+                date_to_use = selected_date or date_type.today()
+                lectures = Lecture.objects.filter(
                     subject_offering__faculty=faculty,
-                    subject_offering__subject=selected_subject
-                )
-                
+                    subject_offering__subject=selected_subject,
+                    date=date_to_use,
+                ).select_related('subject_offering__subject').order_by('start_time')
+
                 # Filter by session type if specified
                 if selected_type:
-                    timetable_query = timetable_query.filter(lecture_type=selected_type)
-                
-                # Group by day
-                from collections import defaultdict
-                by_day = defaultdict(list)
-                
-                for slot in timetable_query:
-                    by_day[slot.day].append(slot)
-                
-                # Now create/get Lecture objects for these timetable slots
-                lectures_by_day = {}
-                for day, slots in by_day.items():
-                    lectures = []
-                    
-                    # Get date range if selected_date is provided
-                    if selected_date:
-                        # Create lectures for that specific date if it matches the day
-                        target_weekday = selected_date.strftime("%A").lower()
-                        if target_weekday == day:
-                            date_to_use = selected_date
-                        else:
-                            continue  # Skip this day if it doesn't match selected date
+                    lectures = lectures.filter(lecture_type=selected_type)
+
+                lectures = list(lectures)
+                if lectures:
+                    lectures_by_day = {date_to_use.strftime("%A").lower(): lectures}
+                else:
+                    reason = non_teaching_reason(date_to_use)
+                    if reason:
+                        messages.error(request, reason)
                     else:
-                        # Use today's date or nearest upcoming date for this day
-                        date_to_use = date_type.today()
-                    
-                    for slot in slots:
-                        lecture, _ = Lecture.objects.get_or_create(
-                            subject_offering=slot.subject_offering,
-                            faculty=faculty,
-                            date=date_to_use,
-                            start_time=slot.start_time,
-                            end_time=slot.end_time,
-                            lecture_type=slot.lecture_type,
-                            room_number=slot.room_number,
+                        messages.error(
+                            request,
+                            f"No lectures found for {selected_subject.name} on {date_to_use:%d %b %Y}. "
+                            "Ask the admin office to run materialize_lectures for this term.",
                         )
-                        lectures.append(lecture)
-                    
-                    if lectures:
-                        lectures_by_day[day] = lectures
     else:
         form = AttendanceFilterForm(faculty=faculty)
     
@@ -308,6 +290,9 @@ def mark_student_attendance2(request, lecture_id):
                     subject_offering=lecture.subject_offering,
                     status='active'
                 ).exists():
+                    if not lecture.is_conducted:
+                        lecture.is_conducted = True
+                        lecture.save(update_fields=["is_conducted"])
                     attendance, created = Attendance.objects.get_or_create(
                         lecture=lecture,
                         student=student,
@@ -344,6 +329,69 @@ def mark_student_attendance2(request, lecture_id):
     return render(request, "faculty_app/mark_student_attendance2.html", context)
 
 
+@faculty_required
+def mark_lecture_attendance_bulk(request, lecture_id):
+    """
+    JSON API to mark a whole lecture at once.
+
+    GET returns the enrolled roster with any existing status. POST takes
+    {"present": [student_id, ...], "absent": [...], "late": [...]} and
+    returns the per-student outcome of a single-transaction upsert.
+    """
+    faculty = get_object_or_404(Faculty, user=request.user)
+    try:
+        lecture = Lecture.objects.select_related('subject_offering__subject').get(
+            Q(faculty=faculty) | Q(subject_offering__faculty=faculty),
+            id=lecture_id,
+        )
+    except Lecture.DoesNotExist:
+        return JsonResponse({"error": "Lecture not found"}, status=404)
+
+    if request.method == "GET":
+        statuses = dict(
+            Attendance.objects.filter(lecture=lecture).values_list('student_id', 'status')
+        )
+        roster = [
+            {
+                "student": student_id,
+                "roll_number": roll_number,
+                "name": name,
+                "status": statuses.get(student_id),
+            }
+            for student_id, roll_number, name in StudentEnrollment.objects.filter(
+                subject_offering_id=lecture.subject_offering_id, status='active'
+            ).order_by('student__roll_number').values_list('student_id', 'student__roll_number', 'student__name')
+        ]
+        return JsonResponse({"lecture": lecture.id, "roster": roster})
+
+    if request.method != "POST":
+        return JsonResponse({"error": "GET or POST required"}, status=405)
+
+    try:
+        body = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    if not isinstance(body, dict):
+        return JsonResponse({"error": "Expected a JSON object"}, status=400)
+
+    roster = {status: body.get(status) or [] for status in ('present', 'absent', 'late')}
+    if not any(roster.values()):
+        return JsonResponse({"error": "Empty roster"}, status=400)
+    if not all(isinstance(ids, list) for ids in roster.values()):
+        return JsonResponse({"error": "Each status must map to a list of student ids"}, status=400)
+
+    results = mark_lecture_attendance(lecture, roster, marked_by=faculty)
+    summary = defaultdict(int)
+    for result in results:
+        summary[result['outcome']] += 1
+
+    return JsonResponse({
+        "lecture": lecture.id,
+        "summary": dict(summary),
+        "results": results,
+    })
+
+
 @faculty_required
 def show_student_attendance(request):
     faculty = Faculty.objects.get(user=request.user)
@@ -353,7 +401,7 @@ def show_student_attendance(request):
     selected_lecture_id = request.GET.get('lecture_id')
     
     # Get all lectures for this faculty
-    lectures = Lecture.objects.filter(faculty=faculty).select_related('subject_offering', 'subject_offering__subject').order_by('-date')
+    lectures = Lecture.objects.filter(faculty=faculty, is_conducted=True).select_related('subject_offering', 'subject_offering__subject').order_by('-date')
     
     # Apply slot type filter
     if filter_type != 'all' and filter_type in ['theory', 'practical', 'tutorial']:
@@ -417,31 +465,49 @@ def edit_student_attendance(request, attendance_id):
 
 @faculty_required
 def generate_report(request):
+    """Stream attendance marked by this faculty as CSV (optional start/end/offering/gzip)."""
     faculty = Faculty.objects.get(user=request.user)
-    
-    # Prepare the HTTP response with CSV content
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f'attachment; filename="{faculty.name}_attendance_report.csv"'
-
-    # Create CSV writer
-    writer = csv.writer(response)
-    writer.writerow(["Student", "Roll Number", "Subject", "Date", "Lecture Time", "Status", "Marked On"])  # CSV Headers
-
-    # Fetch attendance records marked by this faculty
-    attendance_records = Attendance.objects.filter(marked_by=faculty).order_by("-marked_date")
-
-    for record in attendance_records:
-        writer.writerow([
-            record.student.name,
-            record.student.roll_number,
-            record.lecture.subject_offering.subject.name,
-            record.lecture.date.strftime("%Y-%m-%d"),
-            f"{record.lecture.start_time.strftime('%H:%M')}-{record.lecture.end_time.strftime('%H:%M')}",
-            record.status.capitalize(),
-            record.marked_date.strftime("%Y-%m-%d %H:%M"),
-        ])
-
-    return response
+
+    try:
+        attendance_records = filter_attendance_export(
+            Attendance.objects.filter(marked_by=faculty), request.GET
+        )
+    except ValueError:
+        messages.error(request, "Invalid report filters.")
+        return redirect("faculty_app:faculty_dashboard")
+
+    rows = (
+        (
+            student_name,
+            roll_number,
+            subject_name,
+            lecture_date.strftime("%Y-%m-%d"),
+            f"{start_time.strftime('%H:%M')}-{end_time.strftime('%H:%M')}",
+            status.capitalize(),
+            marked_date.strftime("%Y-%m-%d %H:%M"),
+        )
+        for student_name, roll_number, subject_name, lecture_date, start_time, end_time, status, marked_date
+        in attendance_records
+        .order_by("-marked_date")
+        .values_list(
+            "student__name",
+            "student__roll_number",
+            "lecture__subject_offering__subject__name",
+            "lecture__date",
+            "lecture__start_time",
+            "lecture__end_time",
+            "status",
+            "marked_date",
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    return stream_csv_response(
+        ["Student", "Roll Number", "Subject", "Date", "Lecture Time", "Status", "Marked On"],
+        rows,
+        f"{faculty.name}_attendance_report.csv",
+        compress=wants_gzip(request.GET),
+    )
 
 @faculty_required
 def show_notification(request):
@@ -471,7 +537,6 @@ def view_leave(request):
 @faculty_required
 def view_timetable(request):
     """Display timetable for the logged-in faculty member"""
-    from admin_app.models import Timetable
     
     try:
         faculty = Faculty.objects.get(user=request.user)
@@ -524,93 +589,64 @@ def enter_marks(request):
         if exam_id:
             try:
                 exam = ExamSchedule.objects.get(id=exam_id, subject__in=subjects)
-
-                # Get students enrolled in this subject in the same semester
-                semester = exam.subject.semester
-                student_enrollments = StudentEnrollment.objects.filter(
-                    subject_offering__subject=exam.subject,
-                    student__semester=semester
-                ).select_related('student')
-
-                # If explicit enrollments exist, use them. Otherwise fall back to all students in that semester
-                if student_enrollments.exists():
-                    # apply optional filters to enrollments
-                    if selected_division:
-                        student_enrollments = student_enrollments.filter(student__division=selected_division)
-                    if selected_degree:
-                        student_enrollments = student_enrollments.filter(student__degree_program_id=selected_degree)
-                    enrollment_students = [enrollment.student for enrollment in student_enrollments]
-                else:
-                    # fallback: students in the same semester
-                    fallback_qs = Student.objects.filter(semester=semester, status='active')
-                    # If subject has a department, prefer students from that department only
-                    subj_dept = getattr(exam.subject, 'department', None)
-                    if subj_dept:
-                        filtered_by_dept = fallback_qs.filter(degree_program__department=subj_dept)
-                        # only apply department restriction if it yields results
-                        if filtered_by_dept.exists():
-                            fallback_qs = filtered_by_dept
-                    if selected_division:
-                        fallback_qs = fallback_qs.filter(division=selected_division)
-                    if selected_degree:
-                        fallback_qs = fallback_qs.filter(degree_program_id=selected_degree)
-                    enrollment_students = list(fallback_qs)
-
-                # Deduplicate students by id to avoid showing the same student twice
-                seen_ids = set()
-                unique_students = []
-                for student in enrollment_students:
-                    if student.id not in seen_ids:
-                        seen_ids.add(student.id)
-                        unique_students.append(student)
-
-                # Get or create marks for these students
-                for student in unique_students:
-                    exam_mark, _ = ExamMarks.objects.get_or_create(
-                        student=student,
-                        exam_schedule=exam,
-                        defaults={}
-                    )
-                    students.append({
-                        'id': student.id,
-                        'user': student.user,
-                        'name': student.name,
-                        'roll_number': student.roll_number,
-                        'marks': exam_mark
-                    })
-
             except ExamSchedule.DoesNotExist:
                 messages.error(request, "Exam not found.")
 
         # Handle form submission for marks
-        if request.method == 'POST' and exam:
-            updated_count = 0
+        marks_errors = []
+        if request.method == 'POST' and exam and request.FILES.get('marks_file'):
+            try:
+                updated_count, marks_errors = import_exam_marks(
+                    exam, request.FILES['marks_file'], marked_by=faculty
+                )
+            except ValueError as exc:
+                updated_count = 0
+                messages.error(request, str(exc))
+            else:
+                if updated_count > 0:
+                    messages.success(request, f"✓ Imported marks for {updated_count} student(s)")
+                if not marks_errors:
+                    return redirect(f"{request.path}?{request.GET.urlencode()}")
+                messages.warning(request, f"{len(marks_errors)} row(s) were not imported, see the report below")
+        elif request.method == 'POST' and exam:
+            submitted = {}
             for key, value in request.POST.items():
                 if key.startswith('marks_'):
-                    student_id = key.split('_', 1)[1]
-                    marks = value.strip()
-                    if marks:
-                        try:
-                            marks_val = float(marks)
-                            if 0 <= marks_val <= exam.max_marks:
-                                exam_mark = ExamMarks.objects.get(
-                                    student_id=student_id,
-                                    exam_schedule_id=exam.id
-                                )
-                                exam_mark.marks_obtained = marks_val
-                                exam_mark.marked_by = faculty
-                                exam_mark.marked_date = timezone.now()
-                                exam_mark.is_marked = True
-                                exam_mark.save()
-                                updated_count += 1
-                            else:
-                                messages.warning(request, f"Marks for student must be between 0 and {exam.max_marks}")
-                        except ValueError:
-                            messages.warning(request, "Invalid marks value provided")
+                    try:
+                        submitted[int(key.split('_', 1)[1])] = value
+                    except ValueError:
+                        continue
+            updated_count, marks_errors = save_marks_form(exam, submitted, marked_by=faculty)
 
             if updated_count > 0:
                 messages.success(request, f"✓ Successfully updated marks for {updated_count} student(s)")
-                return redirect(f"{request.path}?exam_id={exam.id}")
+            if not marks_errors:
+                return redirect(f"{request.path}?{request.GET.urlencode()}")
+            messages.warning(request, f"{len(marks_errors)} row(s) were not saved, see the report below")
+
+        exam_stats = subject_stats = None
+        if exam:
+            # Distribution of this exam and of all the subject's exams this year
+            subject_exams = list(ExamSchedule.objects.filter(
+                subject_id=exam.subject_id, academic_year=exam.academic_year,
+            ).exclude(status='cancelled'))
+            summaries = exam_analytics(subject_exams)
+            exam_stats = summaries.get(exam.id) or exam_analytics([exam])[exam.id]
+            subject_stats = subject_analytics(subject_exams, summaries).get(exam.subject_id)
+
+            # Read-only: existing marks are LEFT JOINed, nothing is created on view.
+            # Rejected rows keep what the faculty typed so it can be fixed.
+            rejected = {error['student_id']: error['value'] for error in marks_errors if 'student_id' in error}
+            for row in roster_with_marks(exam, selected_division, selected_degree):
+                students.append({
+                    'id': row['id'],
+                    'username': row['user__username'],
+                    'name': row['name'],
+                    'roll_number': row['roll_number'],
+                    'marks_obtained': row['exam_mark__marks_obtained'],
+                    'is_marked': bool(row['exam_mark__is_marked']),
+                    'rejected_value': rejected.get(row['id']),
+                })
 
         # prepare filter options: divisions and degree programs
         if exam:
@@ -654,6 +690,9 @@ def enter_marks(request):
             'selected_subject_id': selected_subject_id,
             'exam_types_for_selected': list(exam_types_for_selected),
             'selected_exam_type_id': selected_exam_type_id,
+            'marks_errors': marks_errors,
+            'exam_stats': exam_stats,
+            'subject_stats': subject_stats,
         }
 
         return render(request, 'faculty_app/enter_marks.html', context)
@@ -663,6 +702,34 @@ def enter_marks(request):
         return redirect("faculty_app:faculty_dashboard")
 
 
+@faculty_required
+def import_marks(request, exam_id):
+    """
+    JSON API to import a whole exam's marks from a file.
+
+    POST a multipart ``file`` (CSV or XLSX with roll_number, marks columns);
+    rows are streamed, validated against the roster and max_marks, and
+    upserted in batches. Returns the saved count and a per-row error report.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    faculty = get_object_or_404(Faculty, user=request.user)
+    exam = ExamSchedule.objects.select_related('subject').filter(
+        id=exam_id, subject__offerings__faculty=faculty,
+    ).first()
+    if exam is None:
+        return JsonResponse({"error": "Exam not found"}, status=404)
+
+    uploaded = request.FILES.get('file')
+    if uploaded is None:
+        return JsonResponse({"error": "No file uploaded"}, status=400)
+    try:
+        saved, errors = import_exam_marks(exam, uploaded, marked_by=faculty)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse({"exam": exam.id, "saved": saved, "errors": errors})
+
+
 # ============================================================================
 # ASSIGNMENT MANAGEMENT & PLAGIARISM CHECKER
 # ============================================================================
@@ -150,6 +150,30 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Rendered result / receipt PDFs; kept outside MEDIA_ROOT so they are never publicly served
+PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR', os.path.join(BASE_DIR, 'pdf_cache'))
+
+# Result, marks-analytics and timetable caches keep version tokens in the
+# cache that every gunicorn worker and management command must see, so the
+# backend has to be shared: Redis when REDIS_URL is set, otherwise a table in
+# the main database (created by ``manage.py createcachetable``). admin_app's
+# system checks refuse a per-process backend outside DEBUG.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'edunexus_cache',
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        }
+    }
+
 LOGIN_URL = "/accounts/login/"
 
 LOGIN_REDIRECT_URL = ''
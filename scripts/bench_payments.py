@@ -0,0 +1,148 @@
+"""
+Concurrent fee payment benchmark.
+
+Creates throwaway FeeStructures for a sample of students, then fires
+payments at them from a thread pool through the same ledger path the
+payment view uses. A share of payments is submitted twice with the same
+idempotency key to mimic double-clicks, and several threads pay the same
+fee structure at once. Afterwards it checks that every structure's paid
+and outstanding match its receipts, that no key produced two receipts and
+that today's receipt numbers run without gaps, then deletes what it
+created. It exits non-zero when the ledger is inconsistent or throughput
+is below ``--target`` payments/s. Run against a copy of the database, never
+production: receipt numbers it draws are not given back.
+
+Usage:  python scripts/bench_payments.py [--structures 50] [--payments 2000] [--threads 16] [--duplicates 0.2] [--target 200]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import django
+
+# Ensure project root is on sys.path so Django settings can be imported
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project1.settings')
+django.setup()
+
+from django.db.models import Count, Sum  # noqa: E402
+
+from admin_app.models import FeeReceipt, FeeStructure, ReceiptSequence, Student  # noqa: E402
+from admin_app.payments import new_idempotency_key, record_payment  # noqa: E402
+
+BENCH_YEAR = 'BENCH'
+BENCH_SEMESTER = 99
+PAYMENT_AMOUNT = Decimal('10.00')
+TARGET_THROUGHPUT = 200
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--structures', type=int, default=50, help='Fee structures to pay into (contention)')
+    parser.add_argument('--payments', type=int, default=2000, help='Distinct payments to make')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent payer threads')
+    parser.add_argument('--duplicates', type=float, default=0.2,
+                        help='Share of payments submitted twice with the same key')
+    parser.add_argument('--target', type=float, default=TARGET_THROUGHPUT,
+                        help=f'Minimum payments/s to pass (default: {TARGET_THROUGHPUT})')
+    args = parser.parse_args()
+
+    students = list(Student.objects.order_by('id')[:args.structures])
+    if not students:
+        sys.exit("No students found.")
+    FeeStructure.objects.filter(academic_year=BENCH_YEAR).delete()
+    fee = PAYMENT_AMOUNT * args.payments
+    structures = [
+        FeeStructure.objects.create(student=student, semester=BENCH_SEMESTER, academic_year=BENCH_YEAR,
+                                    fees_to_be_collected=fee)
+        for student in students
+    ]
+
+    submissions = []
+    for number in range(args.payments):
+        submission = (structures[number % len(structures)].id, new_idempotency_key())
+        submissions.append(submission)
+        if random.random() < args.duplicates:
+            submissions.append(submission)
+    random.shuffle(submissions)
+
+    lock = threading.Lock()
+    latencies, created, replayed, failures = [], [0], [0], []
+
+    def pay(submission):
+        fee_structure_id, key = submission
+        started = time.perf_counter()
+        try:
+            _, is_new = record_payment(fee_structure_id, PAYMENT_AMOUNT, 'upi', idempotency_key=key)
+        except Exception as exc:  # noqa: BLE001 - every failure is a finding here
+            with lock:
+                failures.append(repr(exc))
+            return
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            (created if is_new else replayed)[0] += 1
+
+    before = dict(ReceiptSequence.objects.values_list('prefix', 'last_value'))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(pay, submissions))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{len(submissions)} submissions ({args.payments} payments) on {args.threads} threads "
+          f"into {len(structures)} fee structures in {elapsed:.1f}s")
+    throughput = created[0] / elapsed
+    print(f"Throughput: {throughput:.0f} payments/s; {replayed[0]} duplicate submits answered "
+          f"with the original receipt")
+    if total:
+        print(f"Latency p50 {latencies[total // 2] * 1000:.1f} ms, "
+              f"p95 {latencies[int(total * 0.95)] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+
+    # Correctness: balances match receipts, one receipt per key, numbers gap-free
+    problems = list(failures[:5])
+    receipts = FeeReceipt.objects.filter(fee_structure__academic_year=BENCH_YEAR)
+    paid_by_structure = dict(receipts.values('fee_structure_id').annotate(total=Sum('amount'))
+                             .values_list('fee_structure_id', 'total'))
+    for structure in FeeStructure.objects.filter(academic_year=BENCH_YEAR):
+        receipted = paid_by_structure.get(structure.id, Decimal('0'))
+        if structure.paid != receipted or structure.outstanding != structure.fees_to_be_collected - receipted:
+            problems.append(f"{structure}: paid {structure.paid}, receipts {receipted}, "
+                            f"outstanding {structure.outstanding}")
+    if receipts.count() != args.payments:
+        problems.append(f"{receipts.count()} receipts for {args.payments} payments")
+    if receipts.values('idempotency_key').annotate(n=Count('id')).filter(n__gt=1).exists():
+        problems.append("an idempotency key produced more than one receipt")
+    for prefix, last_value in ReceiptSequence.objects.values_list('prefix', 'last_value'):
+        first = before.get(prefix, 0) + 1
+        if first > last_value:
+            continue
+        numbers = sorted(int(number[len(prefix):]) for number in receipts.filter(
+            receipt_number__startswith=prefix,
+        ).values_list('receipt_number', flat=True))
+        if numbers != list(range(first, last_value + 1)):
+            problems.append(f"{prefix}: receipt numbers are not {first}..{last_value} without gaps")
+
+    FeeStructure.objects.filter(academic_year=BENCH_YEAR).delete()
+    if problems:
+        print(f"{len(failures)} failed payments; problems:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("Ledger consistent: balances match receipts, no double charges, receipt numbers gap-free")
+    if throughput < args.target:
+        print(f"FAIL: {throughput:.0f} payments/s is below the {args.target:.0f} payments/s target")
+        sys.exit(1)
+    print(f"PASS: {throughput:.0f} payments/s meets the {args.target:.0f} payments/s target")
+
+
+if __name__ == '__main__':
+    main()
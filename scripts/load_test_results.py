@@ -0,0 +1,118 @@
+"""
+Local load test for the student results and marks pages.
+
+Logs in a sample of students with Django's test client and fires requests at
+view_results / view_marks from a thread pool, then reports throughput,
+latency percentiles and how many SQL queries each request cost, split into
+queries on the app's tables and the session/auth bookkeeping every
+authenticated request pays (SESSION_SAVE_EVERY_REQUEST writes the session).
+Run against a copy of the database, never production: logging in writes
+session rows.
+
+Usage:  python scripts/load_test_results.py [--students 200] [--requests 5000] [--threads 16] [--cold | --warm]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+# Ensure project root is on sys.path so Django settings can be imported
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project1.settings')
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from admin_app.models import Student  # noqa: E402
+from admin_app.result_cache import warm_student_results  # noqa: E402
+
+PATHS = ['/student_app/view_results/', '/student_app/view_marks/']
+APP_TABLE_PREFIX = '"admin_app_'
+
+
+class QueryCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.app = 0
+        self.session = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            if APP_TABLE_PREFIX in sql:
+                self.app += 1
+            else:
+                self.session += 1
+        return execute(sql, params, many, context)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--students', type=int, default=200, help='Distinct students to log in')
+    parser.add_argument('--requests', type=int, default=5000, help='Total requests to send')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--cold', action='store_true', help='Clear the cache first (no publish-time warm-up)')
+    parser.add_argument('--warm', action='store_true', help='Warm the payloads first, as publishing does')
+    args = parser.parse_args()
+
+    students = list(Student.objects.filter(semester_results__isnull=False).distinct()
+                    .select_related('user')[:args.students])
+    if not students:
+        sys.exit("No students with semester results found.")
+    if args.cold:
+        cache.clear()
+    if args.warm:
+        started = time.perf_counter()
+        warm_student_results([student.id for student in students])
+        print(f"Warmed {len(students)} payloads in {time.perf_counter() - started:.2f}s")
+
+    # One client per thread-owned student slice; Client instances are not thread safe
+    clients = []
+    for student in students:
+        client = Client()
+        client.force_login(student.user)
+        clients.append(client)
+    slices = [clients[index::args.threads] for index in range(args.threads)]
+    per_thread = [args.requests // args.threads + (index < args.requests % args.threads)
+                  for index in range(args.threads)]
+    counter = QueryCounter()
+    latencies, failures = [], []
+
+    def worker(index):
+        own = slices[index] or clients[:1]
+        with connection.execute_wrapper(counter):
+            for number in range(per_thread[index]):
+                started = time.perf_counter()
+                response = own[number % len(own)].get(PATHS[number % len(PATHS)])
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+        connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(worker, range(args.threads)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{total} requests from {len(students)} students on {args.threads} threads in {elapsed:.1f}s")
+    print(f"Throughput: {total / elapsed:.0f} req/s ({total / elapsed * 60:.0f} req/min)")
+    print(f"Latency p50 {latencies[total // 2] * 1000:.1f} ms, "
+          f"p95 {latencies[int(total * 0.95)] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    print(f"Queries per request: {counter.app / total:.3f} on app tables, "
+          f"{counter.session / total:.2f} session/auth")
+    if failures:
+        print(f"{len(failures)} non-200 responses, e.g. {failures[:5]}")
+
+
+if __name__ == '__main__':
+    main()
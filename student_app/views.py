@@ -1,6 +1,6 @@
-import csv  
 import math
-from datetime import date, datetime, timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
 from functools import wraps
 from django.contrib import messages
 from django.shortcuts import redirect, render, get_object_or_404
@@ -8,11 +8,15 @@ from django.contrib.auth import authenticate, login, logout
 from admin_app.models import (
     Leave, Student, Attendance, Lecture, Faculty, Subject, Notification,
     Timetable, SubjectOffering, StudentEnrollment, Assignment, AssignmentSubmission,
+    AttendanceSummary,
 )
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse
 from django.utils.timezone import localtime
 from django.utils import timezone
 from admin_app.forms import LeaveForm
+from admin_app.attendance import filter_attendance_export, wants_gzip
+from admin_app.exports import EXPORT_CHUNK_SIZE, stream_csv_response
+from admin_app.timetable import find_conflicts, gap_analysis, group_by_day, load_slots
 from .forms import StudentProfileForm
 from django.db.models import Sum, Count, Q
 # Create your views here.
@@ -51,8 +55,6 @@ def student_dashboard(request):
         new_notifications = Notification.objects.filter(recipient_role='student', created_at__gt=last_view_time).count()
     else:
         # If never viewed, count recent ones (last 7 days)
-        from datetime import timedelta
-        from django.utils import timezone
         week_ago = timezone.now() - timedelta(days=7)
         new_notifications = Notification.objects.filter(recipient_role='student', created_at__gte=week_ago).count()
     
@@ -122,17 +124,19 @@ def subject_wise_attendance(request):
             subjects.append(subject)
             seen_subject_ids.add(subject.id)
 
-    for subject in subjects:
-        lectures = Lecture.objects.filter(subject_offering__subject=subject)  # Get all lectures for the subject
-        total_lectures = lectures.count()
-        # print(total_lectures)
-        attended_lectures = Attendance.objects.filter(
-            student=student,
-            lecture__subject_offering__subject=subject,
-            status="present"
-        ).count()
+    # Precomputed counters, one grouped query for every subject
+    counters = {
+        row['subject_offering__subject_id']: row
+        for row in AttendanceSummary.objects.filter(student=student)
+        .values('subject_offering__subject_id')
+        .annotate(attended=Sum('present'), total=Sum('conducted'))
+        .order_by()
+    }
 
-        # print(attended_lectures)
+    for subject in subjects:
+        row = counters.get(subject.id, {})
+        total_lectures = row.get('total') or 0
+        attended_lectures = row.get('attended') or 0
 
         attendance_percentage = round((attended_lectures / total_lectures) * 100, 2) if total_lectures > 0 else 0
 
@@ -146,33 +150,36 @@ def subject_wise_attendance(request):
 
 @student_required
 def generate_report(request):
+    """Stream the student's attendance as CSV (optional start/end/offering/gzip)."""
     student = Student.objects.get(user=request.user)
-    
-    # Prepare the HTTP response with CSV content
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f'attachment; filename="{student.name}_attendance_report.csv"'
 
-    # Create CSV writer
-    writer = csv.writer(response)
-    writer.writerow(["Date", "Subject", "Status"])  # CSV Headers
-
-    # Fetch attendance records for the student
-    attendance_records = Attendance.objects.filter(student=student).order_by("lecture__date")
+    try:
+        attendance_records = filter_attendance_export(
+            Attendance.objects.filter(student=student), request.GET
+        )
+    except ValueError:
+        messages.error(request, "Invalid report filters.")
+        return redirect("student_app:student_dashboard")
 
-    for record in attendance_records:
-        writer.writerow([
-            record.lecture.date.strftime("%Y-%m-%d"),  # Format date
-            record.lecture.subject_offering.subject.name,
-            record.status.capitalize(),
-        ])
+    rows = (
+        (lecture_date.strftime("%Y-%m-%d"), subject_name, status.capitalize())
+        for lecture_date, subject_name, status in attendance_records
+        .order_by("lecture__date")
+        .values_list("lecture__date", "lecture__subject_offering__subject__name", "status")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
 
-    return response
+    return stream_csv_response(
+        ["Date", "Subject", "Status"],
+        rows,
+        f"{student.name}_attendance_report.csv",
+        compress=wants_gzip(request.GET),
+    )
 
 @student_required
 def show_notification(request):
     notifications = Notification.objects.filter(recipient_role="student").order_by("-created_at")
     # Mark notifications as viewed by storing current timestamp
-    from django.utils import timezone
     request.session['last_notification_view'] = timezone.now().isoformat()
     return render(request, "notifications.html", {"notifications": notifications})
 
@@ -197,7 +204,6 @@ def view_leave(request):
     student = Student.objects.get(user=request.user)
     leaves = Leave.objects.filter(student=student).order_by("status")
     # Mark leave status as viewed
-    from django.utils import timezone
     request.session['last_leave_view'] = timezone.now().isoformat()
     # Store IDs of viewed leaves to track which ones have been seen
     viewed_ids = [leave.id for leave in leaves.filter(status__in=['approved', 'rejected'])]
@@ -289,19 +295,22 @@ def attendance_summary(request):
             subjects.append(subject)
             seen_subject_ids.add(subject.id)
     
-    # Find which semesters have attendance data
+    # Precomputed counters for every enrolled subject in one query
+    summaries = AttendanceSummary.objects.filter(
+        student=student,
+        subject_offering__subject_id__in=seen_subject_ids,
+    ).select_related("subject_offering__subject")
+
+    counters = defaultdict(lambda: {'conducted': 0, 'present': 0, 'absent': 0})
     semesters_with_data = set()
-    for subject in subjects:
-        lectures = Lecture.objects.filter(subject_offering__subject=subject)
-        if lectures.exists():
-            # Check if student has any attendance records for this subject
-            attendance_exists = Attendance.objects.filter(
-                student=student,
-                lecture__subject_offering__subject=subject
-            ).exists()
-            if attendance_exists:
-                if subject.semester:
-                    semesters_with_data.add(subject.semester)
+    for summary in summaries:
+        subject = summary.subject_offering.subject
+        if summary.present + summary.absent + summary.late > 0 and subject.semester:
+            semesters_with_data.add(subject.semester)
+        entry = counters[(subject.id, summary.lecture_type)]
+        entry['conducted'] += summary.conducted
+        entry['present'] += summary.present
+        entry['absent'] += summary.absent + summary.late
     
     # If no semester data found, use student's current semester or default to 7
     if not semesters_with_data:
@@ -330,47 +339,31 @@ def attendance_summary(request):
         if subject.semester == selected_semester
     ]
     
-    # Build attendance data for each subject
+    # Build attendance data for each subject and slot type
     attendance_data = []
     total_conducted = 0
     total_present = 0
     total_absent = 0
     
     for subject in subjects_for_semester:
-        # Get all lectures for this subject
-        lectures = Lecture.objects.filter(subject_offering__subject=subject)
-        
-        # Get theory and practical lectures separately
-        theory_lectures = lectures.count()  # Assume all are theory for now
-        practical_lectures = 0  # Can be extended based on lecture type
-        
-        # Get attendance records for theory
-        theory_attendance = Attendance.objects.filter(
-            student=student,
-            lecture__subject_offering__subject=subject
-        )
-        
-        theory_conducted = theory_lectures
-        theory_present = theory_attendance.filter(status='present').count()
-        theory_absent = theory_attendance.filter(Q(status='absent') | Q(status='late')).count()
-        theory_percentage = (theory_present / theory_conducted * 100) if theory_conducted > 0 else 0
-        
-        if theory_conducted > 0:
+        for slot_type, slot_label in Lecture.TYPE_CHOICES:
+            entry = counters.get((subject.id, slot_type))
+            if not entry or entry['conducted'] == 0:
+                continue
+
+            percentage = entry['present'] / entry['conducted'] * 100
             attendance_data.append({
-                'slot_type': 'Theory',
+                'slot_type': slot_label,
                 'subject_name': subject.name,
-                'conducted': theory_conducted,
-                'present': theory_present,
-                'absent': theory_absent,
-                'percentage': round(theory_percentage, 2)
+                'conducted': entry['conducted'],
+                'present': entry['present'],
+                'absent': entry['absent'],
+                'percentage': round(percentage, 2)
             })
-            
-            total_conducted += theory_conducted
-            total_present += theory_present
-            total_absent += theory_absent
-        
-        # Add practical if exists (placeholder for future implementation)
-        # You can add logic here to separate practical lectures
+
+            total_conducted += entry['conducted']
+            total_present += entry['present']
+            total_absent += entry['absent']
     
     # Calculate overall percentage
     overall_percentage = (total_present / total_conducted * 100) if total_conducted > 0 else 0
@@ -468,6 +461,7 @@ def view_timetable(request):
 def pay_fees(request):
     """Show payment confirmation page"""
     from admin_app.models import FeeStructure
+    from admin_app.payments import new_idempotency_key
     
     if request.method == 'POST':
         try:
@@ -486,6 +480,8 @@ def pay_fees(request):
                 'semester': semester,
                 'student': student,
                 'fee_structure': fee_structure,
+                # One key per rendered form, so a double submit pays once
+                'idempotency_key': new_idempotency_key(),
             }
             
             return render(request, 'student_app/payment_page.html', context)
@@ -510,59 +506,36 @@ def pay_fees(request):
 @student_required
 def payment_success(request):
     """Process payment and mark as paid"""
-    from admin_app.models import FeeStructure, FeeReceipt
-    from datetime import datetime
-    from decimal import Decimal
-    import random
+    from admin_app.models import FeeStructure
+    from admin_app.payments import record_payment
+    from decimal import Decimal, InvalidOperation
     
     if request.method == 'POST':
+        semester = request.POST.get('semester')
         try:
             student = Student.objects.get(user=request.user)
-            semester = int(request.POST.get('semester'))
+            semester = int(semester)
             amount = Decimal(str(request.POST.get('amount')))
             payment_method = request.POST.get('payment_method', 'online')
             
             # Get fee structure
             fee_structure = FeeStructure.objects.get(student=student, semester=semester)
             
-            # Validate amount
-            if amount <= 0:
-                messages.error(request, "Invalid payment amount.")
-                return redirect("student_app:fee_dashboard")
-            
-            if amount > fee_structure.outstanding:
-                messages.error(request, "Payment amount exceeds outstanding balance.")
+            # Balance update, receipt number and receipt are one transaction;
+            # a resubmitted form returns the receipt it already produced
+            try:
+                receipt, created = record_payment(
+                    fee_structure.id, amount, payment_method,
+                    idempotency_key=request.POST.get('idempotency_key'),
+                )
+            except ValueError as e:
+                messages.error(request, str(e))
                 return redirect("student_app:fee_dashboard")
             
-            # Update paid amount
-            fee_structure.paid += amount
-            fee_structure.save()  # This will auto-calculate outstanding in model save()
-            
-            # Generate receipt number and transaction ID
-            receipt_no = f"RCP{datetime.now().strftime('%Y%m%d')}{random.randint(1000, 9999)}"
-            txn_id = f"TXN{random.randint(100000000, 999999999)}"
-            
-            # Determine payment mode based on method
-            payment_mode_map = {
-                'card': 'online',
-                'upi': 'online',
-                'netbanking': 'online',
-            }
-            payment_mode = payment_mode_map.get(payment_method, 'online')
-            
-            # Create receipt
-            FeeReceipt.objects.create(
-                student=student,
-                fee_structure=fee_structure,
-                receipt_number=receipt_no,
-                payment_date=datetime.now().date(),
-                payment_mode=payment_mode,
-                transaction_id=txn_id,
-                bank_name='College Payment Gateway',
-                amount=amount,
-            )
-            
-            messages.success(request, f"✓ Payment Successful! Amount: ₹{amount:,.0f} | Receipt: {receipt_no} | Transaction: {txn_id}")
+            if created:
+                messages.success(request, f"✓ Payment Successful! Amount: ₹{receipt.amount:,.0f} | Receipt: {receipt.receipt_number} | Transaction: {receipt.transaction_id}")
+            else:
+                messages.info(request, f"This payment was already processed. Receipt: {receipt.receipt_number}")
             return redirect("student_app:fee_dashboard")
             
         except Student.DoesNotExist:
@@ -571,7 +544,7 @@ def payment_success(request):
         except FeeStructure.DoesNotExist:
             messages.error(request, f"Fee structure not found for semester {semester}.")
             return redirect("student_app:fee_dashboard")
-        except ValueError as e:
+        except (ValueError, TypeError, InvalidOperation):
             messages.error(request, "Invalid payment data provided.")
             return redirect("student_app:fee_dashboard")
         except Exception as e:
@@ -583,171 +556,17 @@ def payment_success(request):
 
 @student_required
 def download_receipt(request, receipt_id):
-    """Generate and download receipt as PDF"""
+    """Download receipt as PDF, rendered once and served from the PDF cache"""
     from admin_app.models import FeeReceipt
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-    from io import BytesIO
-    
+    from admin_app.documents import pdf_response, receipt_payload
+
     try:
         student = Student.objects.get(user=request.user)
-        receipt = FeeReceipt.objects.get(id=receipt_id, student=student)
-        
-        # Create PDF buffer
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-        
-        # Container for the PDF elements
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a73e8'),
-            spaceAfter=10,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        subtitle_style = ParagraphStyle(
-            'Subtitle',
-            parent=styles['Normal'],
-            fontSize=12,
-            textColor=colors.HexColor('#666666'),
-            spaceAfter=20,
-            alignment=TA_CENTER
-        )
-        
-        # Header
-        elements.append(Paragraph("COLLEGE PAYMENT RECEIPT", title_style))
-        elements.append(Paragraph("Official Fee Payment Confirmation", subtitle_style))
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Verified badge
-        badge_style = ParagraphStyle(
-            'Badge',
-            parent=styles['Normal'],
-            fontSize=12,
-            textColor=colors.HexColor('#2e7d32'),
-            backColor=colors.HexColor('#e8f5e9'),
-            borderColor=colors.HexColor('#2e7d32'),
-            borderWidth=1,
-            borderPadding=8,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
+        receipt = FeeReceipt.objects.select_related('student__user', 'fee_structure').get(
+            id=receipt_id, student=student,
         )
-        elements.append(Paragraph("✓ Payment Verified", badge_style))
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Receipt details table
-        data = [
-            ['Receipt Number:', receipt.receipt_number, 'Transaction ID:', receipt.transaction_id or 'N/A'],
-            ['Student Name:', student.name, 'Student ID:', student.user.username],
-            ['Semester:', f'Semester {receipt.fee_structure.semester}', 'Payment Date:', receipt.payment_date.strftime('%d %B %Y')],
-            ['Payment Mode:', receipt.get_payment_mode_display(), 'Payment Gateway:', receipt.bank_name or 'N/A'],
-        ]
-        
-        table = Table(data, colWidths=[1.5*inch, 2.5*inch, 1.5*inch, 2.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8f9fa')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
-            ('TEXTCOLOR', (2, 0), (2, -1), colors.HexColor('#666666')),
-            ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#202124')),
-            ('TEXTCOLOR', (3, 0), (3, -1), colors.HexColor('#202124')),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-            ('ALIGN', (2, 0), (2, -1), 'LEFT'),
-            ('ALIGN', (3, 0), (3, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTNAME', (3, 0), (3, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e0e0e0')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 0.4*inch))
-        
-        # Amount section
-        amount_style = ParagraphStyle(
-            'Amount',
-            parent=styles['Normal'],
-            fontSize=36,
-            textColor=colors.HexColor('#0d47a1'),
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold',
-            spaceAfter=5
-        )
-        amount_label_style = ParagraphStyle(
-            'AmountLabel',
-            parent=styles['Normal'],
-            fontSize=14,
-            textColor=colors.HexColor('#1565c0'),
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold',
-            spaceBefore=10
-        )
-        
-        # Amount box
-        amount_data = [[Paragraph("AMOUNT PAID", amount_label_style)], [Paragraph(f"₹{receipt.amount:,.0f}", amount_style)]]
-        amount_table = Table(amount_data, colWidths=[6*inch])
-        amount_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#e3f2fd')),
-            ('BOX', (0, 0), (-1, -1), 2, colors.HexColor('#1a73e8')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 20),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-        ]))
-        
-        elements.append(amount_table)
-        elements.append(Spacer(1, 0.4*inch))
-        
-        # Footer
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#666666'),
-            alignment=TA_CENTER
-        )
-        elements.append(Paragraph("<b>Note:</b> This is a computer-generated receipt and does not require a signature.", footer_style))
-        elements.append(Spacer(1, 0.1*inch))
-        elements.append(Paragraph("For any queries, please contact the accounts department.", footer_style))
-        elements.append(Spacer(1, 0.2*inch))
-        
-        timestamp_style = ParagraphStyle(
-            'Timestamp',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=colors.HexColor('#999999'),
-            alignment=TA_CENTER
-        )
-        elements.append(Paragraph(f"Generated on {receipt.created_at.strftime('%d %B %Y at %I:%M %p')}", timestamp_style))
-        
-        # Build PDF
-        doc.build(elements)
-        
-        # Get PDF data
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        # Return PDF response
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="Receipt_{receipt.receipt_number}.pdf"'
-        return response
-        
+        return pdf_response(request, receipt_payload(receipt), f"Receipt_{receipt.receipt_number}.pdf")
+
     except Student.DoesNotExist:
         messages.error(request, "Student profile not found.")
         return redirect("student_app:fee_dashboard")
@@ -762,183 +581,68 @@ def download_receipt(request, receipt_id):
 @student_required
 def view_marks(request):
     """View exam marks for all subjects in all semesters"""
-    from admin_app.models import ExamMarks
-    
-    try:
-        student = Student.objects.get(user=request.user)
-        
-        # Get all marks for this student organized by semester
-        all_marks = ExamMarks.objects.filter(student=student).select_related(
-            'exam_schedule',
-            'exam_schedule__subject',
-            'exam_schedule__exam_type'
-        ).order_by(
-            '-exam_schedule__subject__semester',
-            'exam_schedule__subject__name',
-            'exam_schedule__exam_type__name'
-        )
-        
-        # Organize by semester
-        marks_by_semester = {}
-        for mark in all_marks:
-            sem = mark.exam_schedule.subject.semester
-            if sem not in marks_by_semester:
-                marks_by_semester[sem] = []
-            marks_by_semester[sem].append(mark)
-        
-        # Get current semester
-        current_semester = student.semester
-        semesters = sorted(marks_by_semester.keys(), reverse=True)
-        
-        context = {
-            'student': student,
-            'marks_by_semester': marks_by_semester,
-            'semesters': semesters,
-            'current_semester': current_semester,
-        }
-        
-        return render(request, 'student_app/view_marks.html', context)
-    
-    except Student.DoesNotExist:
+    from admin_app.result_cache import student_results
+
+    # One cached payload per student serves both this page and view_results
+    payload = student_results(request.user.id)
+    if payload is None:
         messages.error(request, "Student profile not found.")
         return redirect("student_app:student_dashboard")
 
+    context = {
+        'student': payload['student'],
+        'marks_by_semester': payload['marks_by_semester'],
+        'semesters': payload['marks_semesters'],
+        'current_semester': payload['student']['semester'],
+    }
+    return render(request, 'student_app/view_marks.html', context)
+
 
 @student_required
 def view_results(request):
     """View semester results with grades"""
-    from admin_app.models import SemesterResult
-    
-    try:
-        student = Student.objects.get(user=request.user)
-        
-        # Get all semester results for this student
-        semester_results = SemesterResult.objects.filter(student=student).prefetch_related(
-            'subject_results',
-            'subject_results__subject'
-        ).order_by('-semester')
-
-        # Organize by semester
-        results_by_semester = {}
-        for sem_result in semester_results:
-            results_by_semester[sem_result.semester] = {
-                'subjects': list(sem_result.subject_results.all()),
-                'semester_gpa': sem_result.sgpa,
-                'total_subjects': sem_result.subject_results.count(),
-            }
-        
-        semesters = sorted(results_by_semester.keys(), reverse=True)
-        current_semester = student.semester
-        
-        context = {
-            'student': student,
-            'results_by_semester': results_by_semester,
-            'semesters': semesters,
-            'current_semester': current_semester,
-        }
-        
-        return render(request, 'student_app/view_results.html', context)
-    
-    except Student.DoesNotExist:
+    from admin_app.result_cache import student_results
+
+    payload = student_results(request.user.id)
+    if payload is None:
         messages.error(request, "Student profile not found.")
         return redirect("student_app:student_dashboard")
 
+    context = {
+        'student': payload['student'],
+        'results_by_semester': payload['results_by_semester'],
+        'semesters': payload['semesters'],
+        'current_semester': payload['student']['semester'],
+    }
+    return render(request, 'student_app/view_results.html', context)
+
 
 @student_required
 def download_result(request, semester):
-    """Download semester result as PDF"""
+    """Download semester result as PDF, rendered once and served from the PDF cache"""
     from admin_app.models import SemesterResult
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT
-    from io import BytesIO
-    
+    from admin_app.documents import pdf_response, result_payload
+
     try:
         student = Student.objects.get(user=request.user)
-        sem_result = SemesterResult.objects.filter(student=student, semester=semester).prefetch_related(
+        sem_result = SemesterResult.objects.filter(
+            student=student, semester=semester, published=True,
+        ).order_by('-academic_year').select_related(
+            'student__user'
+        ).prefetch_related(
             'subject_results',
             'subject_results__subject'
         ).first()
 
-        if not sem_result or not sem_result.subject_results.exists():
+        payload = result_payload(sem_result) if sem_result else None
+        if not payload or not payload['rows']:
             messages.error(request, "No results found for this semester.")
             return redirect("student_app:view_results")
-        
-        # Create PDF
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=22,
-            textColor=colors.HexColor('#1a73e8'),
-            spaceAfter=10,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
+
+        return pdf_response(
+            request, payload, f"Result_Semester_{semester}_{student.user.username}.pdf",
         )
-        
-        # Header
-        elements.append(Paragraph(f"SEMESTER {semester} RESULTS", title_style))
-        elements.append(Paragraph(f"Student: {student.name} | ID: {student.user.username}", styles['Normal']))
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Results table
-        data = [['Subject', 'Internal', 'External', 'Practical', 'Total', 'Grade', 'GPA']]
-        
-        total_gpa = 0
-        for result in sem_result.subject_results.all():
-            internal = f"{result.internal_marks:.1f}" if result.internal_marks else "-"
-            external = f"{result.external_marks:.1f}" if result.external_marks else "-"
-            practical = f"{result.practical_marks:.1f}" if result.practical_marks else "-"
-            
-            data.append([
-                result.subject.name,
-                internal,
-                external,
-                practical,
-                f"{result.total_marks:.1f}",
-                result.grade,
-                str(result.gpa)
-            ])
-            total_gpa += result.gpa
-        
-        # Add GPA row
-        total_subjects = sem_result.subject_results.count()
-        avg_gpa = round(total_gpa / total_subjects, 2) if total_subjects else 0
-        data.append(['', '', '', '', 'Average GPA:', '', str(avg_gpa)])
-        
-        table = Table(data, colWidths=[2*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a73e8')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#f0f0f0')]),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#e3f2fd')),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ]))
-        
-        elements.append(table)
-        
-        # Build PDF
-        doc.build(elements)
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="Result_Semester_{semester}_{student.user.username}.pdf"'
-        return response
-        
+
     except Student.DoesNotExist:
         messages.error(request, "Student profile not found.")
         return redirect("student_app:student_dashboard")
@@ -982,6 +686,18 @@ def attendance_risk(request):
             }
         subject_enrollments[subject.id]["offerings"].append(enrollment.subject_offering)
 
+    # Precomputed counters for all enrolled offerings in one query
+    offering_counters = {
+        row["subject_offering_id"]: row
+        for row in AttendanceSummary.objects.filter(
+            student=student,
+            subject_offering_id__in=[e.subject_offering_id for e in enrollments],
+        )
+        .values("subject_offering_id")
+        .annotate(total=Sum("conducted"), attended=Sum("present"))
+        .order_by()
+    }
+
     for subj_id, data in subject_enrollments.items():
         subject = data["subject"]
         offerings = data["offerings"]
@@ -992,13 +708,9 @@ def attendance_risk(request):
         type_breakdown = []
 
         for offering in offerings:
-            lectures = Lecture.objects.filter(subject_offering=offering)
-            offering_total = lectures.count()
-            offering_attended = Attendance.objects.filter(
-                student=student,
-                lecture__in=lectures,
-                status="present",
-            ).count()
+            counter = offering_counters.get(offering.id, {})
+            offering_total = counter.get("total") or 0
+            offering_attended = counter.get("attended") or 0
 
             if offering_total > 0:
                 # Determine type from the offering's division vs student batch
@@ -1118,75 +830,20 @@ def timetable_conflicts(request):
     ).filter(
         Q(lecture_type__in=['theory', 'tutorial'], subject_offering__division=division_value) |
         Q(lecture_type='practical', subject_offering__division=batch_value)
-    ).select_related("subject_offering__subject", "subject_offering__faculty").order_by('day', 'start_time')
-
-    days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
-    conflicts = []
-    day_schedules = {}
+    )
 
-    for day in days:
-        slots = list(timetable.filter(day=day))
-        day_schedules[day] = slots
-
-        # Check every pair for overlaps: startA < endB and startB < endA
-        for i in range(len(slots)):
-            for j in range(i + 1, len(slots)):
-                a = slots[i]
-                b = slots[j]
-                if a.start_time < b.end_time and b.start_time < a.end_time:
-                    conflicts.append({
-                        "day": day.capitalize(),
-                        "slot_a": {
-                            "subject": a.subject_offering.subject.name,
-                            "code": a.subject_offering.subject.code,
-                            "time": f"{a.start_time.strftime('%H:%M')} – {a.end_time.strftime('%H:%M')}",
-                            "type": a.get_lecture_type_display(),
-                            "room": a.room_number or "N/A",
-                            "faculty": a.subject_offering.faculty.name,
-                        },
-                        "slot_b": {
-                            "subject": b.subject_offering.subject.name,
-                            "code": b.subject_offering.subject.code,
-                            "time": f"{b.start_time.strftime('%H:%M')} – {b.end_time.strftime('%H:%M')}",
-                            "type": b.get_lecture_type_display(),
-                            "room": b.room_number or "N/A",
-                            "faculty": b.subject_offering.faculty.name,
-                        },
-                    })
-
-    # Build a gap analysis: for each day, compute total gaps between classes
-    gap_analysis = {}
-    for day in days:
-        slots = sorted(day_schedules[day], key=lambda s: s.start_time)
-        gaps = []
-        total_gap_minutes = 0
-        for k in range(1, len(slots)):
-            prev_end = slots[k - 1].end_time
-            curr_start = slots[k].start_time
-            from datetime import datetime, timedelta
-            end_dt = datetime.combine(date(2000, 1, 1), prev_end)
-            start_dt = datetime.combine(date(2000, 1, 1), curr_start)
-            gap_min = int((start_dt - end_dt).total_seconds() / 60)
-            if gap_min > 0:
-                gaps.append({
-                    "after": slots[k - 1].subject_offering.subject.name,
-                    "before": slots[k].subject_offering.subject.name,
-                    "minutes": gap_min,
-                })
-                total_gap_minutes += gap_min
-        if slots:
-            gap_analysis[day.capitalize()] = {
-                "num_classes": len(slots),
-                "gaps": gaps,
-                "total_gap_minutes": total_gap_minutes,
-            }
+    # Every slot here belongs to the same student, so any overlap is a clash.
+    slots = load_slots(timetable)
+    conflicts = find_conflicts(slots, dimensions={"schedule": lambda row: True})["schedule"]
+    day_schedules = group_by_day(slots)
+    days = list(day_schedules)
 
     context = {
         "student": student,
         "conflicts": conflicts,
         "conflict_count": len(conflicts),
         "day_schedules": day_schedules,
-        "gap_analysis": gap_analysis,
+        "gap_analysis": gap_analysis(slots),
         "days": days,
     }
 